@@ -0,0 +1,211 @@
+"""Graph store benchmarks against a live Neo4j.
+
+Usage:
+    python scripts/bench_graph.py edges [--sizes 1000 10000 50000] [--edges 200]
+    python scripts/bench_graph.py neighbors [--hubs "Dynamic Programming"] [--depth 3]
+
+``edges`` grows a throwaway graph through the given node counts and, at each
+size, times single ``upsert_edge`` calls between random endpoints — once with
+the label-scoped MATCH the store uses and once with the old label-less MATCH
+for comparison.  With the ``Entity.entity_id`` constraint in place the scoped
+latency should stay flat while the unscoped one grows with the graph.
+
+``neighbors`` runs against the existing graph (read-only) and times the
+neighbour expansion behind ``/graph/entities/{id}/neighbors`` around the
+given hub entities: the store's one-statement bounded BFS
+(``neighborhood``) against the old three queries (centre node,
+variable-length path match with DISTINCT, edges among the result).
+
+Benchmark nodes carry ``bench: true`` and are removed through the store when
+the run finishes, so neighbour degrees and the per-type summary are
+decremented again.  Edges created by the raw label-less MERGE bypass that
+bookkeeping; they are marked ``unscoped`` and deleted raw first.
+Connection settings come from the usual ``NEO4J_*`` environment variables.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+_SCRIPT_DIR = Path(__file__).resolve().parent
+_PROJECT_ROOT = _SCRIPT_DIR.parent
+sys.path.insert(0, str(_PROJECT_ROOT / "src"))
+
+from kg_rag.config import settings  # noqa: E402
+from kg_rag.models import make_entity_id  # noqa: E402
+from kg_rag.storage.neo4j_graph import Neo4jGraphStore  # noqa: E402
+
+_UNSCOPED = (
+    "MATCH (a {entity_id: $src}), (b {entity_id: $tgt}) "
+    "MERGE (a)-[r:RELATED_TO]->(b) ON CREATE SET r.unscoped = true "
+    "SET r += $props"
+)
+
+
+def _node_id(i: int) -> str:
+    return f"bench-{i}"
+
+
+async def _grow(store: Neo4jGraphStore, start: int, stop: int) -> None:
+    nodes = [
+        (_node_id(i), {"label": "Entity", "name": f"Bench {i}", "bench": True})
+        for i in range(start, stop)
+    ]
+    await store.upsert_nodes_bulk(nodes)
+
+
+async def _time_edges(
+    store: Neo4jGraphStore, n: int, count: int, rng: random.Random, scoped: bool
+) -> float:
+    pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(count)]
+    start = time.perf_counter()
+    for a, b in pairs:
+        if scoped:
+            await store.upsert_edge(
+                _node_id(a), _node_id(b), {"type": "RELATED_TO", "weight": 1.0}
+            )
+        else:
+            await store.query_cypher(
+                _UNSCOPED,
+                {"src": _node_id(a), "tgt": _node_id(b), "props": {"weight": 1.0}},
+            )
+    return (time.perf_counter() - start) * 1000 / count
+
+
+async def bench_edges(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    store = Neo4jGraphStore()
+    await store.initialize()
+    try:
+        print(f"{'nodes':>8} {'scoped ms/edge':>15} {'unscoped ms/edge':>17}")
+        have = 0
+        for size in sorted(args.sizes):
+            await _grow(store, have, size)
+            have = size
+            scoped = await _time_edges(store, size, args.edges, rng, scoped=True)
+            unscoped = (
+                await _time_edges(store, size, args.edges, rng, scoped=False)
+                if not args.skip_unscoped
+                else float("nan")
+            )
+            print(f"{size:>8} {scoped:>15.2f} {unscoped:>17.2f}")
+    finally:
+        await _cleanup(store)
+        await store.finalize()
+
+
+async def _cleanup(store: Neo4jGraphStore) -> None:
+    """Remove the bench graph, keeping degrees and the summary in step."""
+    await store.write_cypher(
+        "MATCH (:Entity {bench: true})-[r {unscoped: true}]->() DELETE r"
+    )
+    rows = await store.read_cypher(
+        "MATCH (n:Entity {bench: true}) RETURN n.entity_id AS id"
+    )
+    await store.delete_nodes_bulk([row["id"] for row in rows])
+
+
+async def _legacy_neighbors(
+    store: Neo4jGraphStore, eid: str, depth: int, limit: int
+) -> int:
+    center = await store.get_node(eid)
+    if center is None:
+        return 0
+    rows = await store.query_cypher(
+        f"MATCH (center:Entity {{entity_id: $eid}})-[*1..{depth}]-(e:Entity) "
+        "WHERE e <> center WITH DISTINCT e RETURN e.entity_id AS id LIMIT $limit",
+        {"eid": eid, "limit": limit},
+    )
+    await store.edges_among([eid, *(r["id"] for r in rows)])
+    return len(rows) + 1
+
+
+async def _time_ms(fn, runs: int) -> list[float]:
+    out = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn()
+        out.append((time.perf_counter() - start) * 1000)
+    return out
+
+
+def _p(values: list[float], q: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(q * len(values)))]
+
+
+async def bench_neighbors(args: argparse.Namespace) -> None:
+    store = Neo4jGraphStore()
+    await store.initialize()
+    try:
+        print(
+            f"{'hub':<28} {'degree':>6} {'path':<11} {'nodes':>5} "
+            f"{'p50 ms':>8} {'p95 ms':>8}"
+        )
+        for name in args.hubs:
+            eid = make_entity_id(name)
+            node = await store.get_node(eid)
+            if node is None:
+                print(f"{name:<28} not found")
+                continue
+
+            async def bfs():
+                return await store.neighborhood(
+                    eid, args.depth, args.limit, args.fanout
+                )
+
+            async def legacy():
+                return await _legacy_neighbors(store, eid, args.depth, args.limit)
+
+            hood = await bfs()
+            runs = [("neighborhood", bfs, len(hood["nodes"]))]
+            if not args.skip_legacy:
+                runs.append(("legacy", legacy, await legacy()))
+            for label, fn, count in runs:
+                times = await _time_ms(fn, args.runs)
+                print(
+                    f"{name[:28]:<28} {node.get('degree', 0):>6} {label:<11} "
+                    f"{count:>5} {statistics.median(times):>8.2f} "
+                    f"{_p(times, 0.95):>8.2f}"
+                )
+    finally:
+        await store.finalize()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    edges_p = sub.add_parser("edges", help="Per-edge upsert latency vs graph size")
+    edges_p.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    edges_p.add_argument("--edges", type=int, default=200, help="Edges timed per size")
+    edges_p.add_argument("--skip-unscoped", action="store_true")
+    edges_p.add_argument("--seed", type=int, default=0)
+
+    nb_p = sub.add_parser(
+        "neighbors", help="Neighbour expansion latency around hub entities"
+    )
+    nb_p.add_argument("--hubs", nargs="+", default=["Dynamic Programming"])
+    nb_p.add_argument("--depth", type=int, default=3)
+    nb_p.add_argument("--limit", type=int, default=200)
+    nb_p.add_argument("--fanout", type=int, default=settings.graph_neighbor_fanout)
+    nb_p.add_argument("--runs", type=int, default=20, help="Timed runs per hub and path")
+    nb_p.add_argument(
+        "--skip-legacy", action="store_true",
+        help="Skip the old path query (can take minutes on large hubs)",
+    )
+
+    args = parser.parse_args()
+    if args.command == "edges":
+        asyncio.run(bench_edges(args))
+    elif args.command == "neighbors":
+        asyncio.run(bench_neighbors(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Vector search benchmarks: recall vs latency against the exact path.
+
+Usage:
+    python scripts/bench_vector.py ann [--n 50000] [--dim 1024] [--nprobe 1 4 8 16 32]
+    python scripts/bench_vector.py ann --store data/nano_vector
+    python scripts/bench_vector.py quant [--n 50000] [--dim 1024] [--rerank 1 4 8]
+    python scripts/bench_vector.py concurrency [--n 50000] [--threads 1 2 4 8]
+    python scripts/bench_vector.py batch [--n 50000] [--batch 1 4 6 16]
+
+Vectors are synthetic clustered data unless ``--store`` points at an existing
+store base path, in which case its memory-mapped matrix is used.  Queries are
+perturbed copies of random rows, so every query has a meaningful neighbourhood.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+_SCRIPT_DIR = Path(__file__).resolve().parent
+_PROJECT_ROOT = _SCRIPT_DIR.parent
+sys.path.insert(0, str(_PROJECT_ROOT / "src"))
+
+from kg_rag.storage.ann import IVFIndex  # noqa: E402
+from kg_rag.storage.nano_vector import (  # noqa: E402
+    _query_with_lexical_boost,
+    _top_indices,
+)
+from kg_rag.storage.quantize import QuantizedMatrix  # noqa: E402
+from kg_rag.storage.vector_file import (  # noqa: E402
+    load_meta,
+    load_vector_file,
+    normalize_rows,
+)
+
+
+def _synthetic(n: int, dim: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = max(8, int(np.sqrt(n)) // 2)
+    means = rng.normal(size=(centers, dim)).astype(np.float32)
+    mat = means[rng.integers(centers, size=n)]
+    mat += 0.35 * rng.normal(size=(n, dim)).astype(np.float32)
+    return normalize_rows(mat)
+
+
+def _load_matrix(args: argparse.Namespace) -> np.ndarray:
+    if args.store:
+        meta = load_meta(args.store) or {}
+        dim = int(meta.get("embedding_dim", args.dim))
+        data, mat, _ = load_vector_file(args.store, dim)
+        print(f"Loaded {len(data)} vectors from {args.store}")
+        return mat
+    return _synthetic(args.n, args.dim, args.seed)
+
+
+def _queries(mat: np.ndarray, count: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed + 1)
+    rows = rng.choice(mat.shape[0], size=count, replace=False)
+    q = np.asarray(mat[rows], dtype=np.float32)
+    q += 0.05 * rng.normal(size=q.shape).astype(np.float32)
+    return normalize_rows(q)
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return len(set(found.tolist()) & set(truth.tolist())) / len(truth)
+
+
+def _timed(fn, queries: np.ndarray) -> tuple[list[np.ndarray], float]:
+    out: list[np.ndarray] = []
+    start = time.perf_counter()
+    for q in queries:
+        out.append(fn(q))
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return out, elapsed_ms
+
+
+def bench_ann(args: argparse.Namespace) -> None:
+    mat = _load_matrix(args)
+    queries = _queries(mat, args.queries, args.seed)
+    k = args.k
+
+    def exact(q: np.ndarray) -> np.ndarray:
+        return _top_indices(mat @ q, k)
+
+    truth, exact_ms = _timed(exact, queries)
+
+    start = time.perf_counter()
+    index = IVFIndex.train(mat, nlist=args.nlist, nprobe=1, seed=args.seed)
+    train_s = time.perf_counter() - start
+
+    print(
+        f"n={mat.shape[0]} dim={mat.shape[1]} nlist={index.nlist} "
+        f"k={k} queries={len(queries)} train={train_s:.2f}s"
+    )
+    print(f"{'mode':<14}{'recall@k':>10}{'ms/query':>10}{'scanned':>10}")
+    print(f"{'exact':<14}{1.0:>10.3f}{exact_ms:>10.2f}{1.0:>10.1%}")
+
+    for nprobe in args.nprobe:
+        scanned: list[int] = []
+
+        def approx(q: np.ndarray, nprobe: int = nprobe) -> np.ndarray:
+            rows = index.probe(q, nprobe)
+            scanned.append(len(rows))
+            return rows[_top_indices(np.asarray(mat[rows]) @ q, k)]
+
+        found, ms = _timed(approx, queries)
+        recall = float(np.mean([_recall(f, t) for f, t in zip(found, truth)]))
+        frac = float(np.mean(scanned)) / mat.shape[0]
+        print(f"{'ivf/' + str(nprobe):<14}{recall:>10.3f}{ms:>10.2f}{frac:>10.1%}")
+
+
+def bench_quant(args: argparse.Namespace) -> None:
+    mat = np.ascontiguousarray(_load_matrix(args), dtype=np.float32)
+    queries = _queries(mat, args.queries, args.seed)
+    k = args.k
+
+    def exact(q: np.ndarray) -> np.ndarray:
+        return _top_indices(mat @ q, k)
+
+    truth, exact_ms = _timed(exact, queries)
+    print(f"n={mat.shape[0]} dim={mat.shape[1]} k={k} queries={len(queries)}")
+    print(
+        f"{'mode':<16}{'scan MB':>10}{'saved':>8}{'recall@k':>10}{'ms/query':>10}"
+    )
+    mb = mat.nbytes / 2**20
+    print(f"{'float32':<16}{mb:>10.1f}{0.0:>8.0%}{1.0:>10.3f}{exact_ms:>10.2f}")
+
+    for mode in ("float16", "int8"):
+        codes = QuantizedMatrix.from_matrix(mat, mode)
+        code_mb = codes.nbytes / 2**20
+        for factor in args.rerank:
+
+            def approx(q: np.ndarray, factor: int = factor) -> np.ndarray:
+                if factor <= 1:
+                    return _top_indices(codes.scores(q), k)
+                rows = codes.shortlist(q, k * factor)
+                return rows[_top_indices(mat[rows] @ q, k)]
+
+            found, ms = _timed(approx, queries)
+            recall = float(np.mean([_recall(f, t) for f, t in zip(found, truth)]))
+            label = f"{mode}/rr{factor}" if factor > 1 else f"{mode}/raw"
+            saved = 1 - code_mb / mb
+            print(
+                f"{label:<16}{code_mb:>10.1f}{saved:>8.0%}{recall:>10.3f}{ms:>10.2f}"
+            )
+
+
+def bench_concurrency(args: argparse.Namespace) -> None:
+    """Queries/second of the lock-free read path at increasing parallelism."""
+    mat = np.ascontiguousarray(_load_matrix(args), dtype=np.float32)
+    data = [{"__id__": str(i), "content": ""} for i in range(mat.shape[0])]
+    queries = _queries(mat, args.queries, args.seed)
+
+    def search(q: np.ndarray) -> list:
+        return _query_with_lexical_boost(
+            data, mat, q, top_k=args.k, keyword_scores=None
+        )
+
+    print(f"n={mat.shape[0]} dim={mat.shape[1]} queries={len(queries)}")
+    print(f"{'threads':<10}{'qps':>10}{'speedup':>10}")
+    base_qps = 0.0
+    for threads in args.threads:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            start = time.perf_counter()
+            list(pool.map(search, queries))
+            qps = len(queries) / (time.perf_counter() - start)
+        base_qps = base_qps or qps
+        print(f"{threads:<10}{qps:>10.1f}{qps / base_qps:>10.2f}")
+
+
+def bench_batch(args: argparse.Namespace) -> None:
+    """Per-query cost of one (Q x D)(D x N) matmul vs Q separate scans."""
+    mat = np.ascontiguousarray(_load_matrix(args), dtype=np.float32)
+    queries = _queries(mat, max(args.batch) * 20, args.seed)
+    print(f"n={mat.shape[0]} dim={mat.shape[1]} k={args.k}")
+    print(f"{'Q':<6}{'separate ms/q':>15}{'batched ms/q':>15}")
+    for q_size in args.batch:
+        groups = [
+            queries[i : i + q_size]
+            for i in range(0, len(queries) - q_size + 1, q_size)
+        ]
+        start = time.perf_counter()
+        for group in groups:
+            for q in group:
+                _top_indices(mat @ q, args.k)
+        separate = (time.perf_counter() - start) * 1000 / (len(groups) * q_size)
+        start = time.perf_counter()
+        for group in groups:
+            scores = group @ mat.T
+            for row in scores:
+                _top_indices(row, args.k)
+        batched = (time.perf_counter() - start) * 1000 / (len(groups) * q_size)
+        print(f"{q_size:<6}{separate:>15.2f}{batched:>15.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ann_p = sub.add_parser("ann", help="IVF recall vs latency against exact search")
+    ann_p.add_argument("--store", help="Base path of an existing vector store")
+    ann_p.add_argument("--n", type=int, default=50000)
+    ann_p.add_argument("--dim", type=int, default=1024)
+    ann_p.add_argument("--k", type=int, default=10)
+    ann_p.add_argument("--queries", type=int, default=200)
+    ann_p.add_argument("--nlist", type=int, default=0)
+    ann_p.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    ann_p.add_argument("--seed", type=int, default=0)
+
+    quant_p = sub.add_parser(
+        "quant", help="float16/int8 scan memory and recall against float32"
+    )
+    quant_p.add_argument("--store", help="Base path of an existing vector store")
+    quant_p.add_argument("--n", type=int, default=50000)
+    quant_p.add_argument("--dim", type=int, default=1024)
+    quant_p.add_argument("--k", type=int, default=10)
+    quant_p.add_argument("--queries", type=int, default=200)
+    quant_p.add_argument(
+        "--rerank", type=int, nargs="+", default=[1, 4, 8],
+        help="Shortlist factors (1 = no float32 re-rank)",
+    )
+    quant_p.add_argument("--seed", type=int, default=0)
+
+    conc_p = sub.add_parser(
+        "concurrency", help="Parallel read throughput on one snapshot"
+    )
+    conc_p.add_argument("--store", help="Base path of an existing vector store")
+    conc_p.add_argument("--n", type=int, default=50000)
+    conc_p.add_argument("--dim", type=int, default=1024)
+    conc_p.add_argument("--k", type=int, default=10)
+    conc_p.add_argument("--queries", type=int, default=400)
+    conc_p.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    conc_p.add_argument("--seed", type=int, default=0)
+
+    batch_p = sub.add_parser("batch", help="Batched multi-query scan vs separate")
+    batch_p.add_argument("--store", help="Base path of an existing vector store")
+    batch_p.add_argument("--n", type=int, default=50000)
+    batch_p.add_argument("--dim", type=int, default=1024)
+    batch_p.add_argument("--k", type=int, default=10)
+    batch_p.add_argument("--batch", type=int, nargs="+", default=[1, 4, 6, 16])
+    batch_p.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "ann":
+        bench_ann(args)
+    elif args.command == "quant":
+        bench_quant(args)
+    elif args.command == "concurrency":
+        bench_concurrency(args)
+    elif args.command == "batch":
+        bench_batch(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,9 +15,7 @@ from pathlib import Path
 
 import asyncio
 
-import openai
 from openai import AsyncOpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 # ---------------------------------------------------------------------------
 # Resolve project root so we can import settings
@@ -27,6 +25,7 @@ _PROJECT_ROOT = _SCRIPT_DIR.parent
 sys.path.insert(0, str(_PROJECT_ROOT / "src"))
 
 from kg_rag.config import settings  # noqa: E402
+from kg_rag.llm_limiter import AdaptiveLimiter, retry_llm, shared_limiter  # noqa: E402
 
 
 # ========================== Phase 1: mechanical ============================
@@ -97,23 +96,22 @@ links, footnotes, normal code blocks, lists, and prose.
 
 
 def _build_client() -> AsyncOpenAI:
-    return AsyncOpenAI(api_key=settings.reasoning_llm_api_key, base_url=settings.reasoning_llm_base_url)
+    return AsyncOpenAI(
+        api_key=settings.reasoning_llm_api_key,
+        base_url=settings.reasoning_llm_base_url,
+        max_retries=0,
+    )
 
 
-@retry(
-    retry=retry_if_exception_type((openai.RateLimitError, openai.APITimeoutError)),
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=30),
-    reraise=True,
-)
+@retry_llm
 async def phase2(
-    text: str, client: AsyncOpenAI, sem: asyncio.Semaphore
+    text: str, client: AsyncOpenAI, limiter: AdaptiveLimiter
 ) -> str | None:
     """Use LLM to convert admonitions and tabbed blocks.
 
     Returns None if the response was truncated (finish_reason == 'length').
     """
-    async with sem:
+    async with limiter.slot():
         resp = await client.chat.completions.create(
             model=settings.reasoning_llm_model,
             messages=[
@@ -166,7 +164,7 @@ async def process_file(
     out_name: str,
     out_dir: Path,
     client: AsyncOpenAI,
-    sem: asyncio.Semaphore,
+    limiter: AdaptiveLimiter,
 ) -> bool:
     """Process a single markdown file. Returns True on success."""
     print(f"[{idx}/{total}] {out_name}")
@@ -179,7 +177,7 @@ async def process_file(
     # Phase 2 — only call LLM if needed
     if _needs_llm(text):
         try:
-            result = await phase2(text, client, sem)
+            result = await phase2(text, client, limiter)
         except Exception as exc:
             print(f"  WARN: Phase 2 failed for {out_name}: {exc}, using Phase 1 result")
             text = phase1_text
@@ -230,10 +228,10 @@ async def amain() -> None:
     print(f"Found {len(files)} .md files (recursive)")
 
     client = _build_client()
-    sem = asyncio.Semaphore(settings.llm_concurrency)
+    limiter = shared_limiter(settings.reasoning_llm_base_url)
 
     tasks = [
-        process_file(i, len(files), f, name, out_dir, client, sem)
+        process_file(i, len(files), f, name, out_dir, client, limiter)
         for i, (f, name) in enumerate(zip(files, out_names), 1)
     ]
     results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -245,6 +243,7 @@ async def amain() -> None:
             print(f"  FAILED {f.name}: {r}")
 
     print(f"\nDone: {ok} succeeded, {fail} failed")
+    print(f"LLM limiter: {limiter.stats()}")
 
 
 if __name__ == "__main__":
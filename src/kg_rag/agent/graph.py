@@ -31,6 +31,7 @@ from kg_rag.agent.prompts import (
 )
 from kg_rag.agent.state import AgentState
 from kg_rag.config import settings
+from kg_rag.llm_limiter import ainvoke_limited, astream_limited, stream_limited
 from kg_rag.utils import parse_final_answer, parse_react_action, strip_code_fences
 
 logger = logging.getLogger(__name__)
@@ -165,6 +166,7 @@ def _build_llm(temperature: float = 0) -> ChatOpenAI:
         base_url=settings.llm_base_url,
         temperature=temperature,
         request_timeout=settings.llm_request_timeout,
+        max_retries=0,
     )
 
 
@@ -176,6 +178,7 @@ def _build_reasoning_llm(temperature: float = 0) -> ChatOpenAI:
         base_url=settings.reasoning_llm_base_url,
         temperature=temperature,
         request_timeout=settings.llm_request_timeout,
+        max_retries=0,
     )
 
 
@@ -260,17 +263,24 @@ async def _stream_reasoning_chat(
     async with AsyncOpenAI(
         api_key=settings.reasoning_llm_api_key,
         base_url=settings.reasoning_llm_base_url,
+        max_retries=0,
     ) as client:
-        stream = await client.chat.completions.create(
-            model=settings.reasoning_llm_model,
-            messages=list(messages),
-            stream=True,
-        )
+
+        async def open_stream():
+            stream = await client.chat.completions.create(
+                model=settings.reasoning_llm_model,
+                messages=list(messages),
+                stream=True,
+            )
+            async for chunk in stream:
+                yield chunk
 
         answer_parts: list[str] = []
         reasoning_parts: list[str] = []
 
-        async for chunk in stream:
+        async for chunk in stream_limited(
+            open_stream, base_url=settings.reasoning_llm_base_url
+        ):
             choices = getattr(chunk, "choices", None) or []
             if not choices:
                 continue
@@ -399,7 +409,7 @@ async def plan_node(state: AgentState) -> dict[str, Any]:
         llm = _build_reasoning_llm(temperature=1)
         full_text = ""
         reasoning_text = ""
-        async for chunk in llm.astream(messages):
+        async for chunk in astream_limited(llm, messages):
             reasoning_delta = _collect_stream_text(
                 (chunk.additional_kwargs or {}).get("reasoning_content")
             )
@@ -516,7 +526,7 @@ async def _run_react_loop(
     did_repair = False
 
     for step in range(1, max_steps + 1):
-        response = await llm.ainvoke(messages)
+        response = await ainvoke_limited(llm, messages)
         text = response.content.strip()
         logger.debug("ReAct step %d raw output: %s", step, text[:200])
 
@@ -547,7 +557,7 @@ async def _run_react_loop(
                 AIMessage(content=text),
                 HumanMessage(content=format_repair_prompt),
             ]
-            repair_resp = await llm.ainvoke(repair_messages)
+            repair_resp = await ainvoke_limited(llm, repair_messages)
             repaired = repair_resp.content.strip()
             logger.debug("ReAct step %d repaired output: %s", step, repaired[:200])
 
@@ -649,7 +659,7 @@ async def _run_react_loop(
             )
         )
     )
-    response = await llm.ainvoke(messages)
+    response = await ainvoke_limited(llm, messages)
     text = response.content.strip()
     final = parse_final_answer(text)
     return (final if final is not None else text), state_messages
@@ -794,7 +804,7 @@ async def judge_node(state: AgentState) -> dict[str, Any]:
 
     verdict_parts: list[str] = []
     try:
-        async for chunk in llm.astream([HumanMessage(content=judge_prompt)]):
+        async for chunk in astream_limited(llm, [HumanMessage(content=judge_prompt)]):
             content_delta = _collect_stream_text(chunk.content)
             if content_delta:
                 verdict_parts.append(content_delta)
@@ -811,7 +821,7 @@ async def judge_node(state: AgentState) -> dict[str, Any]:
 
     verdict = "".join(verdict_parts).strip()
     if not verdict:
-        response = await llm.ainvoke([HumanMessage(content=judge_prompt)])
+        response = await ainvoke_limited(llm, [HumanMessage(content=judge_prompt)])
         verdict = response.content.strip()
         if verdict:
             _emit_stream_event(
@@ -913,7 +923,7 @@ async def respond_node(state: AgentState) -> dict[str, Any]:
         full_text = ""
         fallback_reasoning = ""
 
-        async for chunk in llm.astream([HumanMessage(content=respond_prompt)]):
+        async for chunk in astream_limited(llm, [HumanMessage(content=respond_prompt)]):
             rc = chunk.additional_kwargs.get("reasoning_content")
             if rc:
                 reasoning_delta = _collect_stream_text(rc)
@@ -7,6 +7,7 @@ import logging
 import sqlite3
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
+from typing import Any
 
 from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
@@ -35,6 +36,7 @@ from kg_rag.api.schemas import (
     SessionResponse,
     SessionSummaryResponse,
 )
+from kg_rag.llm_limiter import limiter_stats
 from kg_rag.models import ENTITY_TYPE_LABELS
 from kg_rag.api.service import ChatService
 from kg_rag.api.session_store import (
@@ -44,8 +46,9 @@ from kg_rag.api.session_store import (
     SqliteSessionStore,
 )
 from kg_rag.config import settings
+from kg_rag.storage import create_graph_store
+from kg_rag.storage.base import BaseGraphStore
 from kg_rag.storage.nano_vector import NanoVectorStore
-from kg_rag.storage.neo4j_graph import Neo4jGraphStore
 from kg_rag.tools.graph_query import create_graph_query
 from kg_rag.tools.vector_search import create_vector_search
 from kg_rag.tools.web_search import web_search
@@ -110,7 +113,7 @@ class AppRuntime:
     chat_service: ChatService
     session_store: SqliteSessionStore
     vector_store: NanoVectorStore
-    graph_store: Neo4jGraphStore
+    graph_store: BaseGraphStore
 
 
 def _runtime_from_request(request: Request) -> AppRuntime:
@@ -138,17 +141,16 @@ def create_app() -> FastAPI:
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         vector_store = NanoVectorStore()
-        graph_store = Neo4jGraphStore()
+        graph_store = create_graph_store(cached=True)
         session_store = SqliteSessionStore(settings.session_db_path)
 
         await graph_store.initialize()
         await session_store.initialize()
 
-        tools = [
-            create_vector_search(vector_store),
-            create_graph_query(graph_store),
-            web_search,
-        ]
+        tools = [create_vector_search(vector_store)]
+        if graph_store.supports_cypher:
+            tools.append(create_graph_query(graph_store))
+        tools.append(web_search)
         agent = build_agent_graph(tools)
         app.state.runtime = AppRuntime(
             chat_service=ChatService(
@@ -193,6 +195,13 @@ def create_app() -> FastAPI:
     async def health() -> dict[str, str]:
         return {"status": "ok"}
 
+    @app.get("/api/v1/metrics/llm")
+    async def llm_metrics(
+        user_id: str = Depends(get_current_user_id),
+    ) -> dict[str, dict[str, Any]]:
+        """Adaptive LLM limiter state (window, in flight, cuts) per endpoint."""
+        return limiter_stats()
+
     # --- Auth endpoints (no token required) ---
 
     @app.post(
@@ -414,16 +423,10 @@ def create_app() -> FastAPI:
         runtime = _runtime_from_request(request)
         gs = runtime.graph_store
 
-        entity_rows = await gs.query_cypher(
-            "MATCH (e:Entity) RETURN coalesce(e.type, 'Unknown') AS t, count(e) AS c"
-        )
-        entities_by_type: dict[str, int] = {r["t"]: r["c"] for r in entity_rows}
+        stats = await gs.graph_stats()
+        entities_by_type: dict[str, int] = stats["entities_by_type"]
+        relations_by_type: dict[str, int] = stats["relations_by_type"]
         total_entities = sum(entities_by_type.values())
-
-        rel_rows = await gs.query_cypher(
-            "MATCH (:Entity)-[r]->(:Entity) RETURN type(r) AS t, count(r) AS c"
-        )
-        relations_by_type: dict[str, int] = {r["t"]: r["c"] for r in rel_rows}
         total_relations = sum(relations_by_type.values())
 
         return GraphStatsResponse(
@@ -449,49 +452,12 @@ def create_app() -> FastAPI:
                 detail=f"Invalid entity_type. Must be one of: {sorted(ENTITY_TYPE_LABELS)}",
             )
 
-        if entity_type:
-            node_cypher = (
-                f"MATCH (e:{entity_type}) "
-                "OPTIONAL MATCH (e)-[r]-() "
-                "WITH e, count(r) AS degree "
-                "ORDER BY degree DESC "
-                "LIMIT $limit "
-                "RETURN e.entity_id AS id, e.name AS label, "
-                "coalesce(e.type, 'Unknown') AS type, "
-                "coalesce(e.description, '') AS description, "
-                "coalesce(e.aliases, []) AS aliases"
-            )
-        else:
-            node_cypher = (
-                "MATCH (e:Entity) "
-                "OPTIONAL MATCH (e)-[r]-() "
-                "WITH e, count(r) AS degree "
-                "ORDER BY degree DESC "
-                "LIMIT $limit "
-                "RETURN e.entity_id AS id, e.name AS label, "
-                "coalesce(e.type, 'Unknown') AS type, "
-                "coalesce(e.description, '') AS description, "
-                "coalesce(e.aliases, []) AS aliases"
-            )
-
-        node_rows = await gs.query_cypher(node_cypher, {"limit": limit})
-        node_ids = {r["id"] for r in node_rows}
+        node_rows = await gs.top_entities(limit, entity_type)
         is_truncated = len(node_rows) >= limit
 
         nodes = [_build_node_response(r) for r in node_rows]
-
-        if node_ids:
-            edge_rows = await gs.query_cypher(
-                "MATCH (a:Entity)-[r]->(b:Entity) "
-                "WHERE a.entity_id IN $ids AND b.entity_id IN $ids "
-                "RETURN a.entity_id AS source, b.entity_id AS target, "
-                "type(r) AS type, coalesce(r.description, '') AS description, "
-                "coalesce(r.weight, 1.0) AS weight",
-                {"ids": list(node_ids)},
-            )
-            edges = [_build_edge_response(r) for r in edge_rows]
-        else:
-            edges = []
+        edge_rows = await gs.edges_among([r["id"] for r in node_rows])
+        edges = [_build_edge_response(r) for r in edge_rows]
 
         return GraphOverviewResponse(nodes=nodes, edges=edges, is_truncated=is_truncated)
 
@@ -512,18 +478,7 @@ def create_app() -> FastAPI:
                 detail=f"Invalid entity_type. Must be one of: {sorted(ENTITY_TYPE_LABELS)}",
             )
 
-        type_filter = f":{entity_type}" if entity_type else ":Entity"
-        cypher = (
-            f"MATCH (e{type_filter}) "
-            "WHERE toLower(e.name) CONTAINS toLower($q) "
-            "   OR ANY(a IN coalesce(e.aliases, []) WHERE toLower(a) CONTAINS toLower($q)) "
-            "RETURN e.entity_id AS id, e.name AS label, "
-            "coalesce(e.type, 'Unknown') AS type, "
-            "coalesce(e.description, '') AS description, "
-            "coalesce(e.aliases, []) AS aliases "
-            "LIMIT $limit"
-        )
-        rows = await gs.query_cypher(cypher, {"q": q, "limit": limit})
+        rows = await gs.search_entities(q, entity_type, limit)
         return [_build_node_response(r) for r in rows]
 
     @app.get("/api/v1/graph/entities/{entity_id}/neighbors", response_model=GraphOverviewResponse)
@@ -537,45 +492,16 @@ def create_app() -> FastAPI:
         runtime = _runtime_from_request(request)
         gs = runtime.graph_store
 
-        center = await gs.query_cypher(
-            "MATCH (e:Entity {entity_id: $eid}) "
-            "RETURN e.entity_id AS id, e.name AS label, "
-            "coalesce(e.type, 'Unknown') AS type, "
-            "coalesce(e.description, '') AS description, "
-            "coalesce(e.aliases, []) AS aliases",
-            {"eid": entity_id},
+        hood = await gs.neighborhood(
+            entity_id, depth, limit, settings.graph_neighbor_fanout
         )
-        if not center:
+        if hood is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="entity not found")
 
-        neighbor_rows = await gs.query_cypher(
-            f"MATCH (center:Entity {{entity_id: $eid}})-[*1..{depth}]-(neighbor:Entity) "
-            "RETURN DISTINCT neighbor.entity_id AS id, neighbor.name AS label, "
-            "coalesce(neighbor.type, 'Unknown') AS type, "
-            "coalesce(neighbor.description, '') AS description, "
-            "coalesce(neighbor.aliases, []) AS aliases "
-            "LIMIT $limit",
-            {"eid": entity_id, "limit": limit},
-        )
-
-        all_rows = center + neighbor_rows
-        node_ids = {r["id"] for r in all_rows}
-        nodes = [_build_node_response(r) for r in all_rows]
-
-        edge_rows = await gs.query_cypher(
-            "MATCH (a:Entity)-[r]->(b:Entity) "
-            "WHERE a.entity_id IN $ids AND b.entity_id IN $ids "
-            "RETURN a.entity_id AS source, b.entity_id AS target, "
-            "type(r) AS type, coalesce(r.description, '') AS description, "
-            "coalesce(r.weight, 1.0) AS weight",
-            {"ids": list(node_ids)},
-        )
-        edges = [_build_edge_response(r) for r in edge_rows]
-
         return GraphOverviewResponse(
-            nodes=nodes,
-            edges=edges,
-            is_truncated=len(neighbor_rows) >= limit,
+            nodes=[_build_node_response(r) for r in hood["nodes"]],
+            edges=[_build_edge_response(r) for r in hood["edges"]],
+            is_truncated=hood["truncated"],
         )
 
     return app
@@ -87,6 +87,11 @@ class Settings:
         default_factory=lambda: _env("REASONING_LLM_MODEL")
         or _env("LLM_MODEL", "deepseek-chat")
     )
+    # Extraction cache — raw extraction responses keyed by chunk text, prompt
+    # and model, in a SQLite file under data_dir (empty = disabled).
+    extraction_cache_path: str = field(
+        default_factory=lambda: _env("EXTRACTION_CACHE_PATH", "extraction_cache.sqlite3")
+    )
 
     # Neo4j
     neo4j_uri: str = field(
@@ -101,6 +106,38 @@ class Settings:
     neo4j_database: str = field(
         default_factory=lambda: _env("NEO4J_DATABASE", "neo4j")
     )
+    # Driver pool: connections per server, seconds to wait for a free one,
+    # and records per fetch round trip.  Reads run in READ sessions, so a
+    # neo4j:// URI spreads them over the cluster's read replicas.
+    neo4j_max_pool_size: int = field(
+        default_factory=lambda: _int_env("NEO4J_MAX_POOL_SIZE", 100)
+    )
+    neo4j_acquisition_timeout: int = field(
+        default_factory=lambda: _int_env("NEO4J_ACQUISITION_TIMEOUT", 60)
+    )
+    neo4j_fetch_size: int = field(
+        default_factory=lambda: _int_env("NEO4J_FETCH_SIZE", 1000)
+    )
+    # Graph backend: "neo4j", or "memory" for the embedded store persisted
+    # to data_dir/memory_graph.npz (single node, no Cypher / graph_query tool).
+    graph_backend: str = field(
+        default_factory=lambda: _env("GRAPH_BACKEND", "neo4j")
+    )
+    # Read-through graph cache (node props, adjacency, read-only Cypher
+    # results) in the API / agent process; 0 entries disables it.  Writes
+    # through the cache invalidate it at once; writes from other processes
+    # (CLI ingest / merge) become visible after graph_cache_ttl seconds.
+    graph_cache_size: int = field(
+        default_factory=lambda: _int_env("GRAPH_CACHE_SIZE", 4096)
+    )
+    graph_cache_ttl: int = field(
+        default_factory=lambda: _int_env("GRAPH_CACHE_TTL", 30)
+    )
+    # Neighbour expansion (/graph/entities/{id}/neighbors): new nodes kept
+    # per BFS level, highest degree first, so hubs cannot flood the result.
+    graph_neighbor_fanout: int = field(
+        default_factory=lambda: _int_env("GRAPH_NEIGHBOR_FANOUT", 50)
+    )
 
     # Embedding
     embedding_api_key: str = field(
@@ -116,6 +153,20 @@ class Settings:
         default_factory=lambda: _int_env("EMBEDDING_DIM", 4096)
     )
 
+    # Embedding cache — in-memory LRU of embedding_cache_size entries plus an
+    # optional SQLite tier (relative paths resolve next to the vector store
+    # files, i.e. data_dir; empty = memory only).
+    # Entries older than embedding_cache_ttl seconds are ignored (0 = never).
+    embedding_cache_size: int = field(
+        default_factory=lambda: _int_env("EMBEDDING_CACHE_SIZE", 10000)
+    )
+    embedding_cache_ttl: int = field(
+        default_factory=lambda: _int_env("EMBEDDING_CACHE_TTL", 7 * 24 * 3600)
+    )
+    embedding_cache_path: str = field(
+        default_factory=lambda: _env("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+    )
+
     # Firecrawl
     firecrawl_api_key: str = field(
         default_factory=lambda: _env("FIRECRAWL_API_KEY")
@@ -128,6 +179,41 @@ class Settings:
     )
     top_k: int = field(default_factory=lambda: _int_env("TOP_K", 5))
 
+    # Vector index — IVF approximate search kicks in at vector_ann_min_size
+    # records (exact brute-force search below); nlist=0 means sqrt(n).
+    vector_ann_min_size: int = field(
+        default_factory=lambda: _int_env("VECTOR_ANN_MIN_SIZE", 20000)
+    )
+    vector_ann_nlist: int = field(
+        default_factory=lambda: _int_env("VECTOR_ANN_NLIST", 0)
+    )
+    vector_ann_nprobe: int = field(
+        default_factory=lambda: _int_env("VECTOR_ANN_NPROBE", 8)
+    )
+    # First-pass scan codes: none | float16 | int8.  With quantization the
+    # best top_k * vector_rerank_factor rows are re-ranked in float32.
+    vector_quantization: str = field(
+        default_factory=lambda: _env("VECTOR_QUANTIZATION", "none").lower()
+    )
+    vector_rerank_factor: int = field(
+        default_factory=lambda: _int_env("VECTOR_RERANK_FACTOR", 8)
+    )
+    # Upserts/deletes are appended to <base>.wal; once the log exceeds this
+    # many MB it is compacted into the base files in the background
+    # (0 = compact after every write).
+    vector_wal_compact_mb: int = field(
+        default_factory=lambda: _int_env("VECTOR_WAL_COMPACT_MB", 64)
+    )
+    # Concurrent query() calls arriving within this window (ms) are embedded
+    # and scanned as one batch of at most vector_query_batch_max queries
+    # (0 disables coalescing).
+    vector_query_batch_window_ms: int = field(
+        default_factory=lambda: _int_env("VECTOR_QUERY_BATCH_WINDOW_MS", 2)
+    )
+    vector_query_batch_max: int = field(
+        default_factory=lambda: _int_env("VECTOR_QUERY_BATCH_MAX", 32)
+    )
+
     # Agent
     max_iterations: int = field(
         default_factory=lambda: _int_env("MAX_ITERATIONS", 3)
@@ -136,16 +222,40 @@ class Settings:
         default_factory=lambda: _int_env("AGENT_CONCURRENCY", 3)
     )
 
-    # Concurrency
+    # Concurrency.  LLM calls go through an adaptive limiter (see
+    # kg_rag.llm_limiter): it starts at LLM_CONCURRENCY_START and grows up to
+    # LLM_CONCURRENCY while calls finish within LLM_LATENCY_TARGET seconds.
     llm_concurrency: int = field(
         default_factory=lambda: _int_env("LLM_CONCURRENCY", 50)
     )
+    llm_concurrency_start: int = field(
+        default_factory=lambda: _int_env("LLM_CONCURRENCY_START", 8)
+    )
+    llm_latency_target: int = field(
+        default_factory=lambda: _int_env("LLM_LATENCY_TARGET", 120)
+    )
     storage_concurrency: int = field(
         default_factory=lambda: _int_env("STORAGE_CONCURRENCY", 50)
     )
+    # Rows per UNWIND statement in bulk graph upserts (one transaction each).
+    graph_bulk_batch_size: int = field(
+        default_factory=lambda: _int_env("GRAPH_BULK_BATCH_SIZE", 500)
+    )
+    # ingest-dir runs a staged pipeline: files in LLM extraction at once,
+    # concurrent embedding requests and graph writers, and the bound of the
+    # queue in front of each stage.
     file_concurrency: int = field(
         default_factory=lambda: _int_env("FILE_CONCURRENCY", 25)
     )
+    embed_concurrency: int = field(
+        default_factory=lambda: _int_env("EMBED_CONCURRENCY", 4)
+    )
+    graph_write_concurrency: int = field(
+        default_factory=lambda: _int_env("GRAPH_WRITE_CONCURRENCY", 4)
+    )
+    ingest_queue_size: int = field(
+        default_factory=lambda: _int_env("INGEST_QUEUE_SIZE", 8)
+    )
     llm_request_timeout: int = field(
         default_factory=lambda: _int_env("LLM_REQUEST_TIMEOUT", 600)
     )
@@ -0,0 +1,94 @@
+"""Per-file stage checkpoints for ``ingest-dir --resume``.
+
+Each file goes through four stages — ``chunked`` (stale chunks dropped, the
+chunks to ingest chosen), ``extracted``, ``vector`` and ``graph`` (stored).
+Finishing a stage appends one JSON line to a journal in ``data_dir`` and
+fsyncs it, so a crash, timeout or Ctrl-C loses at most the stage in flight.
+A ``chunked`` line starts a new attempt for its file; later lines add to it
+(the ``extracted`` line carries the entities, relations and failed chunk
+ids, so a resumed file does not repeat extraction or its LLM dedup call).
+
+Attempts are tied to the file's text hash and the chunker settings: a file
+edited since, or chunked differently, starts over.  The manifest (see
+:mod:`kg_rag.ingest.manifest`) is only saved at the end of a run; a resumed
+``graph`` attempt is replayed into it.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("chunked", "extracted", "vector", "graph")
+
+
+def checkpoint_path(data_dir: Path) -> Path:
+    return Path(data_dir) / "ingest_checkpoint.jsonl"
+
+
+class IngestCheckpoint:
+    """Append-only journal of the latest attempt per file."""
+
+    def __init__(self, path: Path, chunking: list[int]) -> None:
+        self.path = Path(path)
+        self.chunking = list(chunking)
+        self.attempts: dict[str, dict[str, Any]] = {}
+
+    @classmethod
+    def open(
+        cls, path: Path, chunking: list[int], *, resume: bool
+    ) -> IngestCheckpoint:
+        """Load the journal at *path* when resuming, else start a fresh one."""
+        checkpoint = cls(path, chunking)
+        if not resume:
+            checkpoint.clear()
+        elif checkpoint.path.exists():
+            with open(checkpoint.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        checkpoint._apply(json.loads(line))
+                    except json.JSONDecodeError:
+                        # a line torn by the crash; its stage is redone
+                        logger.warning("Skipping unreadable checkpoint line")
+        return checkpoint
+
+    def _apply(self, entry: dict[str, Any]) -> dict[str, Any]:
+        key = entry["file"]
+        if entry["stage"] == "chunked" or key not in self.attempts:
+            self.attempts[key] = dict(entry)
+        else:
+            self.attempts[key].update(entry)
+        return self.attempts[key]
+
+    def attempt(self, key: str, text_hash: str) -> dict[str, Any] | None:
+        """The recorded attempt for *key*, if it matches the current text."""
+        entry = self.attempts.get(key)
+        if (
+            entry is None
+            or entry.get("hash") != text_hash
+            or entry.get("chunking") != self.chunking
+        ):
+            return None
+        return dict(entry)
+
+    def mark(self, key: str, text_hash: str, stage: str, **data: Any) -> dict[str, Any]:
+        """Durably record that *key* finished *stage*; returns the attempt."""
+        entry = {
+            "file": key, "hash": text_hash, "chunking": self.chunking,
+            "stage": stage, **data,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return dict(self._apply(entry))
+
+    def clear(self) -> None:
+        self.attempts.clear()
+        self.path.unlink(missing_ok=True)
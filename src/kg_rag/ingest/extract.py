@@ -8,33 +8,26 @@ import logging
 import re
 from collections import Counter
 
-import openai
 from langchain_core.messages import HumanMessage
 from langchain_openai import ChatOpenAI
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type,
-)
 
 from kg_rag.config import settings
+from kg_rag.ingest.extraction_cache import (
+    ExtractionCache,
+    default_cache,
+    extraction_key,
+)
+from kg_rag.llm_limiter import (
+    AdaptiveLimiter,
+    ainvoke_limited,
+    retry_llm,
+    shared_limiter,
+)
 from kg_rag.models import Entity, Relation, TextChunk, make_entity_id
 from kg_rag.utils import strip_code_fences
 
 logger = logging.getLogger(__name__)
 
-# Retry LLM calls on transient network / rate-limit errors
-_retry_llm = retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=2, min=2, max=30),
-    retry=retry_if_exception_type((
-        TimeoutError, ConnectionError, OSError,
-        openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
-    )),
-    reraise=True,
-)
-
 _EXTRACTION_PROMPT = f"""\
 You are an algorithm knowledge extraction expert for competitive programming \
 (OI / ICPC). Given the text below, extract **entities** and **relations**.
@@ -96,31 +89,52 @@ Return ONLY valid JSON, no explanation.
 """
 
 
-@_retry_llm
+async def _ainvoke_in_slot(
+    llm: ChatOpenAI, limiter: AdaptiveLimiter, prompt: str
+) -> str:
+    """One LLM call holding its own *limiter* slot; returns the stripped text."""
+    async with limiter.slot():
+        response = await llm.ainvoke([HumanMessage(content=prompt)])
+    return response.content.strip()
+
+
+_RETRY_SUFFIX = "\n\nReturn ONLY valid JSON, no extra text."
+
+
+@retry_llm
 async def _extract_one_chunk(
     chunk: TextChunk,
     llm: ChatOpenAI,
-    sem: asyncio.Semaphore,
+    limiter: AdaptiveLimiter,
+    cache: ExtractionCache | None = None,
 ) -> tuple[list[Entity], list[Relation]]:
-    """Extract entities and relations from a single chunk (with semaphore)."""
-    async with sem:
-        prompt = _EXTRACTION_PROMPT.format(text=chunk.content)
-        response = await llm.ainvoke([HumanMessage(content=prompt)])
-        raw = response.content.strip()
+    """Extract entities and relations from a single chunk (within *limiter*).
 
+    The first try and, if it does not parse, one format retry each take
+    their own limiter slot.  Every raw response is stored in *cache* under
+    its own prompt's key and replayed before calling the LLM, so re-parsing
+    a chunk — even one whose responses failed to parse — makes no LLM calls.
+    """
+    prompt = _EXTRACTION_PROMPT.format(text=chunk.content)
+    attempts = (
+        (_EXTRACTION_PROMPT, prompt),
+        (_EXTRACTION_PROMPT + _RETRY_SUFFIX, prompt + _RETRY_SUFFIX),
+    )
+    entities: list[Entity] = []
+    relations: list[Relation] = []
+    for i, (template, content) in enumerate(attempts):
+        key = extraction_key(chunk.content, template, llm.model_name)
+        raw = await cache.get(key) if cache is not None else None
+        if raw is None:
+            if i:
+                logger.info("Retrying extraction for chunk %s", chunk.id)
+            raw = await _ainvoke_in_slot(llm, limiter, content)
+            if cache is not None:
+                await cache.put(key, llm.model_name, raw)
         entities, relations = _parse_extraction(raw, chunk.id)
-
-        # Retry once if parsing failed
-        if not entities and not relations:
-            logger.info("Retrying extraction for chunk %s", chunk.id)
-            retry_resp = await llm.ainvoke(
-                [HumanMessage(content=prompt + "\n\nReturn ONLY valid JSON, no extra text.")]
-            )
-            entities, relations = _parse_extraction(
-                retry_resp.content.strip(), chunk.id
-            )
-
-        return entities, relations
+        if entities or relations:
+            break
+    return entities, relations
 
 
 def merge_entities(entity_lists: list[list[Entity]]) -> list[Entity]:
@@ -306,7 +320,7 @@ async def dedup_by_llm(
     entity_list = "\n".join(lines)
 
     prompt = _DEDUP_PROMPT.format(entity_list=entity_list)
-    response = await llm.ainvoke([HumanMessage(content=prompt)])
+    response = await ainvoke_limited(llm, [HumanMessage(content=prompt)])
     raw = response.content.strip()
 
     data = _extract_json_object(raw)
@@ -401,14 +415,18 @@ def remap_relations(
 async def extract_entities_and_relations(
     chunks: list[TextChunk],
     *,
-    sem: asyncio.Semaphore | None = None,
+    limiter: AdaptiveLimiter | None = None,
     llm: ChatOpenAI | None = None,
+    cache: ExtractionCache | None = None,
 ) -> tuple[list[Entity], list[Relation], list[dict]]:
     """Extract entities and relations from a list of text chunks via LLM.
 
-    Uses up to ``settings.llm_concurrency`` parallel LLM calls.
-    Accepts optional shared *sem* and *llm* for batch mode; creates its own
-    when not provided (single-file backward compat).
+    Parallel LLM calls are bounded by *limiter*, by default the endpoint's
+    :func:`~kg_rag.llm_limiter.shared_limiter`.  Accepts optional shared
+    *llm* and *cache* for batch mode; creates its own when not provided
+    (single-file backward compat).  Responses are
+    replayed from the extraction cache where possible (see
+    :mod:`kg_rag.ingest.extraction_cache`).
 
     Returns (entities, relations, failed_chunks) where *failed_chunks* is a
     list of ``{"chunk_id": ..., "error": ...}`` dicts.
@@ -420,12 +438,15 @@ async def extract_entities_and_relations(
             base_url=settings.reasoning_llm_base_url,
             temperature=0,
             request_timeout=settings.llm_request_timeout,
+            max_retries=0,
         )
-    if sem is None:
-        sem = asyncio.Semaphore(settings.llm_concurrency)
+    if limiter is None:
+        limiter = shared_limiter(settings.reasoning_llm_base_url)
+    if cache is None:
+        cache = default_cache()
 
     results = await asyncio.gather(
-        *(_extract_one_chunk(chunk, llm, sem) for chunk in chunks),
+        *(_extract_one_chunk(chunk, llm, limiter, cache) for chunk in chunks),
         return_exceptions=True,
     )
     # Filter out failed chunks
@@ -0,0 +1,108 @@
+"""Content-addressed cache of raw extraction responses.
+
+Entity / relation extraction is the expensive step of ingest.  Responses are
+stored verbatim, keyed by sha256 of the model, the extraction prompt
+template and the chunk text, so a change to any of the three is a miss while
+re-ingesting the same text — or re-parsing it after a change to
+``_parse_extraction`` — replays without LLM calls.  Responses that do not
+parse are stored too, and the format retry is keyed by its own prompt, so
+the replay covers both calls.  Entries never expire:
+the key already changes with everything that could invalidate them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+from kg_rag.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def extraction_key(text: str, prompt: str, model: str) -> str:
+    raw = "\0".join((model, prompt, text))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """SQLite table of :func:`extraction_key` -> raw response.
+
+    There is at most one lookup and one store per LLM call, so :meth:`get`
+    and :meth:`put` simply open a connection in a worker thread and close
+    it again.
+    """
+
+    def __init__(self, db_path: str | Path) -> None:
+        self._db_path = Path(db_path)
+        self._db_ready = False
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    async def get(self, key: str) -> str | None:
+        raw = await asyncio.to_thread(self._db_get, key)
+        if raw is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return raw
+
+    async def put(self, key: str, model: str, raw: str) -> None:
+        await asyncio.to_thread(self._db_put, key, model, raw)
+
+    # -- SQLite --------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._db_ready:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self._db_path)
+        if not self._db_ready:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS extractions (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    stored_at REAL NOT NULL
+                )
+                """
+            )
+            conn.commit()
+            self._db_ready = True
+        return conn
+
+    def _db_get(self, key: str) -> str | None:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT response FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _db_put(self, key: str, model: str, raw: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, model, response, stored_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, model, raw, time.time()),
+            )
+
+
+def default_cache() -> ExtractionCache | None:
+    """Cache at ``settings.extraction_cache_path`` (``None`` when unset)."""
+    if not settings.extraction_cache_path:
+        return None
+    return ExtractionCache(settings.data_dir / settings.extraction_cache_path)
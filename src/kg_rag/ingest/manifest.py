@@ -0,0 +1,144 @@
+"""Persistent record of what ``ingest-dir`` has already stored.
+
+The manifest maps each ingested file to the hash of its text and, per chunk
+id, the hash of the chunk text.  A re-run compares the current files with
+it: unchanged files are skipped before chunking, and of a changed file only
+the chunks whose text changed (or that are new) go through extraction and
+storage again.  Chunks that disappeared or changed are *stale*: the caller
+removes them from the vector store and from the graph's ``source_chunks``.
+
+Chunk ids are positional (``doc_id::index``), so an edited chunk keeps its
+id with a new hash.  A file is only marked up to date when every one of its
+chunks was stored; otherwise its text hash is left blank so the next run
+revisits it and picks up the missing chunks.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+from kg_rag.models import TextChunk
+
+logger = logging.getLogger(__name__)
+
+_VERSION = 1
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def manifest_path(data_dir: Path) -> Path:
+    return Path(data_dir) / "ingest_manifest.json"
+
+
+class IngestManifest:
+    """File and chunk hashes of previously ingested documents.
+
+    Files are keyed by their resolved path.  *chunking* identifies the
+    chunker settings: a file chunked with other settings counts as changed.
+    """
+
+    def __init__(self, path: Path, chunking: list[int]) -> None:
+        self.path = Path(path)
+        self.chunking = list(chunking)
+        self.files: dict[str, dict[str, Any]] = {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Path, chunking: list[int]) -> IngestManifest:
+        manifest = cls(path, chunking)
+        if not manifest.path.exists():
+            return manifest
+        try:
+            data = json.loads(manifest.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("Ignoring unreadable ingest manifest %s: %s", path, exc)
+            return manifest
+        if data.get("version") == _VERSION:
+            manifest.files = data.get("files") or {}
+        return manifest
+
+    @staticmethod
+    def key(path: Path) -> str:
+        return str(Path(path).resolve())
+
+    def is_current(self, path: Path, text: str) -> bool:
+        """Whether *path* was fully ingested with exactly this *text*."""
+        entry = self.files.get(self.key(path))
+        return (
+            entry is not None
+            and entry.get("chunking") == self.chunking
+            and entry.get("hash") == text_hash(text)
+        )
+
+    def plan(
+        self, path: Path, chunks: list[TextChunk]
+    ) -> tuple[list[TextChunk], list[str]]:
+        """Split *chunks* into ``(to ingest, stale chunk ids)``.
+
+        Chunks already stored with the same text are left out; stale ids are
+        stored chunks that are gone or whose text changed.
+        """
+        entry = self.files.get(self.key(path)) or {}
+        known: dict[str, str] = {}
+        if entry.get("chunking") == self.chunking:
+            known = entry.get("chunks") or {}
+        current = {c.id: text_hash(c.content) for c in chunks}
+        fresh = [c for c in chunks if known.get(c.id) != current[c.id]]
+        stale = [cid for cid, h in (entry.get("chunks") or {}).items()
+                 if current.get(cid) != h]
+        return fresh, stale
+
+    def record(
+        self,
+        path: Path,
+        text: str,
+        chunks: list[TextChunk],
+        failed: set[str] = frozenset(),
+    ) -> None:
+        """Record *chunks* of *path* as stored, except the *failed* ids."""
+        self.files[self.key(path)] = {
+            "hash": "" if failed else text_hash(text),
+            "chunking": self.chunking,
+            "chunks": {
+                c.id: text_hash(c.content) for c in chunks if c.id not in failed
+            },
+        }
+        self._dirty = True
+
+    def forget(self, key: str) -> list[str]:
+        """Drop a file; returns the chunk ids that were stored for it."""
+        entry = self.files.pop(key, None)
+        if entry is None:
+            return []
+        self._dirty = True
+        return list(entry.get("chunks") or {})
+
+    def missing_under(self, root: Path, present: list[Path]) -> list[str]:
+        """Keys of recorded files directly in *root* that are not *present*."""
+        root = Path(root).resolve()
+        keep = {self.key(p) for p in present}
+        return [
+            key for key in self.files
+            if Path(key).parent == root and key not in keep
+        ]
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(
+            json.dumps(
+                {"version": _VERSION, "files": self.files},
+                ensure_ascii=False, separators=(",", ":"),
+            ),
+            encoding="utf-8",
+        )
+        tmp.replace(self.path)
+        self._dirty = False
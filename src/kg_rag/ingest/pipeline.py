@@ -0,0 +1,133 @@
+"""Staged streaming pipeline with bounded queues between stages.
+
+Each :class:`Stage` has its own worker pool and an input queue of at most
+``queue_size`` items.  A worker hands its result to the next stage's queue
+and blocks while that queue is full, so a slow stage holds back the ones
+before it — down to the source, which only reads the next item when the
+first queue has room — and the number of items in flight stays bounded
+however long the input is.  Meanwhile every stage works on a different
+item, keeping their backends (LLM, embedding endpoint, database) busy at
+the same time.
+
+A handler returning ``None`` drops its item; an exception drops it too and
+is collected in :attr:`Pipeline.failures`.  Per-stage counters are logged
+every ``report_s`` seconds and returned by :meth:`Pipeline.stats`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class Stage:
+    """One pipeline step: *handler* run by *workers* concurrent tasks."""
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        *,
+        workers: int = 1,
+    ) -> None:
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.done = 0
+        self.failed = 0
+        self.busy_s = 0.0
+        self.max_queued = 0
+
+
+class Pipeline:
+    """Run items through *stages* in order (see the module docstring)."""
+
+    def __init__(
+        self, stages: list[Stage], *, queue_size: int, report_s: float = 30.0
+    ) -> None:
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.report_s = report_s
+        self.failures: list[tuple[Any, BaseException]] = []
+        self._queues: list[asyncio.Queue] = []
+        self._started = 0.0
+
+    async def run(self, items: Iterable[Any]) -> None:
+        self._queues = [asyncio.Queue(self.queue_size) for _ in self.stages]
+        self._started = time.monotonic()
+        pools = [
+            [asyncio.create_task(self._work(i)) for _ in range(stage.workers)]
+            for i, stage in enumerate(self.stages)
+        ]
+        reporter = asyncio.create_task(self._report()) if self.report_s > 0 else None
+        try:
+            for item in items:
+                await self._put(0, item)
+            # close the stages in order: a stage's queue is closed once
+            # every worker upstream has handed over its last item
+            for i, pool in enumerate(pools):
+                for _ in pool:
+                    await self._queues[i].put(_DONE)
+                await asyncio.gather(*pool)
+        finally:
+            for task in [t for pool in pools for t in pool]:
+                task.cancel()
+            if reporter is not None:
+                reporter.cancel()
+        logger.info("Pipeline finished: %s", self.stats())
+
+    async def _put(self, i: int, item: Any) -> None:
+        queue = self._queues[i]
+        await queue.put(item)
+        stage = self.stages[i]
+        stage.max_queued = max(stage.max_queued, queue.qsize())
+
+    async def _work(self, i: int) -> None:
+        stage = self.stages[i]
+        queue = self._queues[i]
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            start = time.monotonic()
+            try:
+                out = await stage.handler(item)
+            except Exception as exc:
+                stage.failed += 1
+                self.failures.append((item, exc))
+                logger.error("%s stage failed: %s", stage.name, exc)
+                continue
+            finally:
+                stage.busy_s += time.monotonic() - start
+            stage.done += 1
+            if out is not None and i + 1 < len(self.stages):
+                await self._put(i + 1, out)
+
+    async def _report(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_s)
+            for name, row in self.stats().items():
+                logger.info("  %-8s %s", name, row)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per stage: items done / failed, items per second, worker
+        utilisation (busy time over workers x wall time), queue depth."""
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        out = {}
+        for i, stage in enumerate(self.stages):
+            out[stage.name] = {
+                "done": stage.done,
+                "failed": stage.failed,
+                "per_s": round(stage.done / elapsed, 3),
+                "utilisation": round(stage.busy_s / (stage.workers * elapsed), 3),
+                "queued": self._queues[i].qsize() if self._queues else 0,
+                "max_queued": stage.max_queued,
+            }
+        return out
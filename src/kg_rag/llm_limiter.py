@@ -0,0 +1,320 @@
+"""Adaptive (AIMD) concurrency limit for LLM calls.
+
+A fixed semaphore either overruns the provider's rate limit — every call
+then backs off on its own through tenacity — or leaves headroom unused.
+:class:`AdaptiveLimiter` instead keeps a congestion *window* the way TCP
+does:
+
+- each healthy call (latency EWMA under the target, error rate low) grows
+  the window by ``1 / window``, i.e. by one slot per window of calls;
+- a ``RateLimitError`` or timeout multiplies it by ``decrease`` — once per
+  round: failures of calls started before the last cut are the same burst
+  and do not cut again;
+- a ``Retry-After`` header pauses new calls for that long.
+
+Every LLM call in the package shares one limiter per endpoint via
+:func:`shared_limiter`; each call holds a slot (``async with
+limiter.slot(): ...``), usually through :func:`call_limited`,
+:func:`ainvoke_limited` or :func:`astream_limited`.  Clients are built
+with ``max_retries=0`` so that a retry re-enters the limiter: the SDK's
+own retry loop would resend from inside the slot, hiding the 429 from
+the window.  Retries live in :data:`retry_llm`, outside the slot.  The
+window is reported by :meth:`AdaptiveLimiter.stats` and
+:func:`limiter_stats`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any, TypeVar
+
+import openai
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from kg_rag.config import settings
+
+logger = logging.getLogger(__name__)
+
+_CONGESTION = (openai.RateLimitError, openai.APITimeoutError, TimeoutError)
+_ALPHA = 0.2  # EWMA weight of the newest latency / error sample
+_MAX_ERROR_RATE = 0.1
+
+T = TypeVar("T")
+
+# Transient network / rate-limit / server errors worth another attempt
+TRANSIENT_LLM_ERRORS = (
+    TimeoutError, ConnectionError, OSError,
+    openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+    openai.InternalServerError,
+)
+_ATTEMPTS = 3
+
+retry_llm = retry(
+    stop=stop_after_attempt(_ATTEMPTS),
+    wait=wait_exponential(multiplier=2, min=2, max=30),
+    retry=retry_if_exception_type(TRANSIENT_LLM_ERRORS),
+    reraise=True,
+)
+
+
+def retry_after_s(exc: BaseException) -> float | None:
+    """Seconds asked for by the ``Retry-After`` header of *exc*'s response."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            when = email.utils.parsedate_to_datetime(value)
+            return max(0.0, when.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _Slot:
+    """One admission to an :class:`AdaptiveLimiter`, timing its call."""
+
+    __slots__ = ("_limiter", "_started")
+
+    def __init__(self, limiter: AdaptiveLimiter) -> None:
+        self._limiter = limiter
+        self._started: float | None = None
+
+    async def __aenter__(self) -> _Slot:
+        await self._limiter._acquire()
+        self._started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._limiter._release(self._started, exc)
+
+
+class AdaptiveLimiter:
+    """Admits at most ``int(window)`` calls at once, each in a :meth:`slot`."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        initial: int,
+        maximum: int,
+        minimum: int = 1,
+        latency_target_s: float,
+        decrease: float = 0.5,
+    ) -> None:
+        self.name = name
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.window = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_target_s = latency_target_s
+        self.decrease = decrease
+        self.in_flight = 0
+        self.calls = 0
+        self.cuts = 0
+        self.latency_s: float | None = None
+        self.error_rate = 0.0
+        self._paused_until = 0.0
+        self._last_cut = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def limit(self) -> int:
+        return max(self.minimum, int(self.window))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "window": round(self.window, 2),
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "calls": self.calls,
+            "cuts": self.cuts,
+            "latency_s": round(self.latency_s, 3) if self.latency_s is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "paused_s": round(max(0.0, self._paused_until - time.monotonic()), 3),
+        }
+
+    # -- admission -----------------------------------------------------------
+
+    def _admissible(self) -> bool:
+        return (
+            self.in_flight < self.limit
+            and time.monotonic() >= self._paused_until
+        )
+
+    def _wake(self) -> None:
+        """Hand free slots to waiters in FIFO order."""
+        while self._waiters and self._admissible():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def slot(self) -> _Slot:
+        """Async context manager holding one call's place in the window."""
+        return _Slot(self)
+
+    async def _acquire(self) -> None:
+        if not self._waiters and self._admissible():
+            self.in_flight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # granted just as we were cancelled: pass the slot on
+                    self.in_flight -= 1
+                    self._wake()
+                else:
+                    self._waiters.remove(waiter)
+                raise
+
+    def _release(self, started: float, exc: BaseException | None) -> None:
+        self.in_flight -= 1
+        if exc is None:
+            self._on_success(time.monotonic() - started)
+        elif isinstance(exc, _CONGESTION):
+            self._on_congestion(exc, started)
+        elif isinstance(exc, Exception):
+            self.error_rate += _ALPHA * (1.0 - self.error_rate)
+        self._wake()
+
+    # -- AIMD ----------------------------------------------------------------
+
+    def _on_success(self, latency: float) -> None:
+        self.calls += 1
+        self.error_rate *= 1.0 - _ALPHA
+        if self.latency_s is None:
+            self.latency_s = latency
+        else:
+            self.latency_s += _ALPHA * (latency - self.latency_s)
+        if (
+            self.latency_s <= self.latency_target_s
+            and self.error_rate < _MAX_ERROR_RATE
+            and self.window < self.maximum
+        ):
+            before = self.limit
+            self.window = min(self.maximum, self.window + 1.0 / self.window)
+            if self.limit != before:
+                logger.debug("LLM limiter %s: window → %d", self.name, self.limit)
+
+    def _on_congestion(self, exc: BaseException, started: float) -> None:
+        self.error_rate += _ALPHA * (1.0 - self.error_rate)
+        now = time.monotonic()
+        pause = retry_after_s(exc)
+        if pause:
+            self._paused_until = max(self._paused_until, now + pause)
+            # queued callers are otherwise only woken by a release
+            asyncio.get_running_loop().call_later(pause, self._wake)
+        if started < self._last_cut:
+            return  # same burst as the last cut
+        self._last_cut = now
+        self.cuts += 1
+        before = self.window
+        self.window = max(float(self.minimum), self.window * self.decrease)
+        logger.info(
+            "LLM limiter %s: %s, window %.1f → %.1f%s",
+            self.name, type(exc).__name__, before, self.window,
+            f", pausing {pause:.1f}s" if pause else "",
+        )
+
+
+_limiters: dict[str, AdaptiveLimiter] = {}
+
+
+def shared_limiter(base_url: str | None = None) -> AdaptiveLimiter:
+    """The process-wide limiter for the LLM endpoint at *base_url*.
+
+    Defaults to the reasoning model's endpoint (extraction, preprocess).
+    """
+    key = base_url if base_url is not None else settings.reasoning_llm_base_url
+    if key not in _limiters:
+        _limiters[key] = AdaptiveLimiter(
+            key or "default",
+            initial=settings.llm_concurrency_start,
+            maximum=settings.llm_concurrency,
+            latency_target_s=settings.llm_latency_target,
+        )
+    return _limiters[key]
+
+
+def limiter_stats() -> dict[str, dict[str, Any]]:
+    """:meth:`AdaptiveLimiter.stats` of every shared limiter, by endpoint."""
+    return {key: limiter.stats() for key, limiter in _limiters.items()}
+
+
+def _endpoint(llm: Any) -> str | None:
+    """Base URL a LangChain ``ChatOpenAI`` talks to (None if unknown)."""
+    base = getattr(llm, "openai_api_base", None)
+    return base if isinstance(base, str) else None
+
+
+async def call_limited(
+    call: Callable[[], Awaitable[T]], *, base_url: str | None = None
+) -> T:
+    """Await ``call()`` in a slot of *base_url*'s limiter, with :data:`retry_llm`.
+
+    Each attempt takes its own slot; the back-off between attempts does not
+    hold one.
+    """
+    limiter = shared_limiter(base_url)
+
+    @retry_llm
+    async def attempt() -> T:
+        async with limiter.slot():
+            return await call()
+
+    return await attempt()
+
+
+async def ainvoke_limited(llm: Any, messages: Any) -> Any:
+    """``llm.ainvoke(messages)`` through :func:`call_limited`."""
+    return await call_limited(
+        lambda: llm.ainvoke(messages), base_url=_endpoint(llm)
+    )
+
+
+async def stream_limited(
+    open_stream: Callable[[], AsyncIterator[T]], *, base_url: str | None = None
+) -> AsyncIterator[T]:
+    """Yield from ``open_stream()`` while holding a slot of *base_url*'s limiter.
+
+    A transient error is retried like :data:`retry_llm` only while nothing
+    has been yielded yet; once the caller has seen output it propagates.
+    """
+    limiter = shared_limiter(base_url)
+    for attempt in range(1, _ATTEMPTS + 1):
+        streamed = False
+        try:
+            async with limiter.slot():
+                async for item in open_stream():
+                    streamed = True
+                    yield item
+            return
+        except TRANSIENT_LLM_ERRORS:
+            if streamed or attempt == _ATTEMPTS:
+                raise
+        await asyncio.sleep(min(30, 2 * 2 ** (attempt - 1)))
+
+
+def astream_limited(llm: Any, messages: Any) -> AsyncIterator[Any]:
+    """``llm.astream(messages)`` through :func:`stream_limited`."""
+    return stream_limited(lambda: llm.astream(messages), base_url=_endpoint(llm))
@@ -13,12 +13,14 @@ import asyncio
 import json
 import logging
 import sys
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
 
 from langchain_core.messages import HumanMessage
 
 from kg_rag.config import settings
-from kg_rag.models import KNOWLEDGE_REL_TYPES
+from kg_rag.models import KNOWLEDGE_REL_TYPES, TextChunk
 
 logging.basicConfig(
     level=logging.INFO,
@@ -62,7 +64,8 @@ async def _preflight_checks() -> None:
     if not settings.llm_api_key:
         errors.append("LLM_API_KEY is not set")
 
-    errors.extend(await _check_neo4j_connectivity())
+    if settings.graph_backend == "neo4j":
+        errors.extend(await _check_neo4j_connectivity())
 
     if not settings.embedding_api_key:
         errors.append("EMBEDDING_API_KEY is not set")
@@ -80,29 +83,39 @@ async def _preflight_checks() -> None:
     logger.info("Preflight checks passed")
 
 
-async def _init_stores():
-    """Initialize storage backends and return (vector_store, graph_store)."""
+async def _init_stores(*, writer: bool = False):
+    """Initialize storage backends and return (vector_store, graph_store).
+
+    A *writer* (ingest, merge) also builds any derived graph data the store
+    lacks, so readers never have to.
+    """
+    from kg_rag.storage import create_graph_store
     from kg_rag.storage.nano_vector import NanoVectorStore
-    from kg_rag.storage.neo4j_graph import Neo4jGraphStore
 
     vector_store = NanoVectorStore()
-    graph_store = Neo4jGraphStore()
+    graph_store = create_graph_store()
     await graph_store.initialize()
+    if writer:
+        await graph_store.ensure_derived()
 
     return vector_store, graph_store
 
 
-async def _init_graph_only():
+async def _init_graph_only(*, writer: bool = False):
     """Initialize only the graph store (no vector/embedding deps)."""
-    from kg_rag.storage.neo4j_graph import Neo4jGraphStore
+    from kg_rag.storage import create_graph_store
 
-    graph_store = Neo4jGraphStore()
+    graph_store = create_graph_store()
     await graph_store.initialize()
+    if writer:
+        await graph_store.ensure_derived()
     return graph_store
 
 
 async def _preflight_graph_only() -> None:
     """Validate Neo4j connectivity only (no LLM key required)."""
+    if settings.graph_backend != "neo4j":
+        return
     errors = await _check_neo4j_connectivity()
     if errors:
         for msg in errors:
@@ -116,11 +129,11 @@ def _build_tools(vector_store, graph_store):
     from kg_rag.tools.graph_query import create_graph_query
     from kg_rag.tools.web_search import web_search
 
-    return [
-        create_vector_search(vector_store),
-        create_graph_query(graph_store),
-        web_search,
-    ]
+    tools = [create_vector_search(vector_store)]
+    if graph_store.supports_cypher:
+        tools.append(create_graph_query(graph_store))
+    tools.append(web_search)
+    return tools
 
 
 # ---------------------------------------------------------------------------
@@ -201,45 +214,79 @@ async def _chat(user_id: str = "default") -> None:
 # Shared ingest helpers
 # ---------------------------------------------------------------------------
 
-async def _upsert_entities(entities, graph_store, sem):
-    async def _do(ent):
+@dataclass
+class _FileJob:
+    """One file moving through the ``ingest-dir`` pipeline."""
+
+    path: Path
+    retry: bool = False  # second pass over a resumed file's failed chunks
+    resumed: bool = False
+    key: str = ""
+    text: str = ""
+    chunks: list[TextChunk] = field(default_factory=list)
+    fresh: list[TextChunk] = field(default_factory=list)
+    attempt: dict[str, Any] = field(default_factory=dict)
+    prepared: Any = None
+
+
+async def _upsert_entities(entities, graph_store, sem) -> int:
+    """Bulk-upsert *entities*; returns how many failed (all or nothing)."""
+    nodes = [
+        (
+            ent.id,
+            {
+                "label": ent.type,
+                "name": ent.name,
+                "description": ent.description,
+                "aliases": ent.aliases,
+                "source_chunks": ent.source_chunks,
+            },
+        )
+        for ent in entities
+    ]
+    if not nodes:
+        return 0
+    try:
         async with sem:
-            await graph_store.upsert_node(
-                ent.id,
-                {
-                    "label": ent.type,
-                    "name": ent.name,
-                    "description": ent.description,
-                    "aliases": ent.aliases,
-                },
-            )
-    results = await asyncio.gather(*(_do(ent) for ent in entities), return_exceptions=True)
-    return [r for r in results if isinstance(r, Exception)]
+            await graph_store.upsert_nodes_bulk(nodes)
+    except Exception:
+        logger.exception("Bulk node upsert failed")
+        return len(nodes)
+    return 0
 
 
-async def _upsert_relations(relations, graph_store, sem):
+async def _upsert_relations(relations, graph_store, sem) -> int:
+    """Bulk-upsert *relations*; returns how many failed (all or nothing)."""
     from kg_rag.models import make_entity_id
 
-    async def _do(rel):
-        async with sem:
-            if rel.type not in KNOWLEDGE_REL_TYPES:
-                logger.warning(
-                    "LLM produced unknown relation type %r (%s->%s), "
-                    "storage layer will remap",
-                    rel.type, rel.source, rel.target,
-                )
-            src_id = make_entity_id(rel.source)
-            tgt_id = make_entity_id(rel.target)
-            await graph_store.upsert_edge(
-                src_id, tgt_id,
+    edges = []
+    for rel in relations:
+        if rel.type not in KNOWLEDGE_REL_TYPES:
+            logger.warning(
+                "LLM produced unknown relation type %r (%s->%s), "
+                "storage layer will remap",
+                rel.type, rel.source, rel.target,
+            )
+        edges.append(
+            (
+                make_entity_id(rel.source),
+                make_entity_id(rel.target),
                 {
                     "type": rel.type,
                     "description": rel.description,
                     "weight": rel.weight,
                 },
             )
-    results = await asyncio.gather(*(_do(rel) for rel in relations), return_exceptions=True)
-    return [r for r in results if isinstance(r, Exception)]
+        )
+    if not edges:
+        return 0
+    try:
+        async with sem:
+            await graph_store.upsert_edges_bulk(edges)
+    except Exception:
+        logger.exception("Bulk edge upsert failed")
+        return len(edges)
+    return 0
 
 
 # ---------------------------------------------------------------------------
@@ -276,7 +323,7 @@ async def _ingest(file_path: str) -> None:
             print(f"    - {fc['chunk_id']}: {fc['error']}")
 
     # Step 3: store
-    vector_store, graph_store = await _init_stores()
+    vector_store, graph_store = await _init_stores(writer=True)
 
     try:
         # Upsert chunks into vector store
@@ -284,22 +331,26 @@ async def _ingest(file_path: str) -> None:
             c.id: {"content": c.content, "doc_id": c.doc_id, **c.metadata} for c in chunks
         }
         try:
-            await vector_store.upsert(chunk_data)
-            print(f"  → {len(chunks)} chunks stored in vector DB")
+            counts = await vector_store.upsert(chunk_data)
+            print(
+                f"  → {len(chunks)} chunks stored in vector DB "
+                f"({counts['inserted']} new, {counts['updated']} updated, "
+                f"{counts['skipped']} unchanged)"
+            )
         except Exception as e:
             logger.warning("Vector upsert failed: %s", e)
 
         # Upsert entities into graph store (concurrent)
         sem = asyncio.Semaphore(settings.storage_concurrency)
 
-        node_errors = await _upsert_entities(entities, graph_store, sem)
-        if node_errors:
-            logger.error("Failed to upsert %d/%d nodes", len(node_errors), len(entities))
+        node_failed = await _upsert_entities(entities, graph_store, sem)
+        if node_failed:
+            logger.error("Failed to upsert %d/%d nodes", node_failed, len(entities))
 
         # Upsert relations into graph store (concurrent)
-        edge_errors = await _upsert_relations(relations, graph_store, sem)
-        if edge_errors:
-            logger.error("Failed to upsert %d/%d edges", len(edge_errors), len(relations))
+        edge_failed = await _upsert_relations(relations, graph_store, sem)
+        if edge_failed:
+            logger.error("Failed to upsert %d/%d edges", edge_failed, len(relations))
 
         print(f"  → {len(entities)} nodes, {len(relations)} edges stored in Neo4j")
         print("Done.")
@@ -313,11 +364,33 @@ async def _ingest(file_path: str) -> None:
 # Batch ingest subcommand
 # ---------------------------------------------------------------------------
 
-async def _ingest_batch(dir_path: str) -> None:
-    """Ingest all .md files under *dir_path* with globally shared concurrency."""
+async def _ingest_batch(
+    dir_path: str, *, full: bool = False, resume: bool = False
+) -> None:
+    """Ingest all .md files under *dir_path* through a staged pipeline.
+
+    Files stream through chunk → extract → embed → vector write → graph
+    write stages (:mod:`kg_rag.ingest.pipeline`), each with its own workers
+    and a bounded queue, so the LLM, the embedding endpoint and the graph
+    store are all busy at once while memory stays flat.
+
+    Files and chunks already stored with the same text (per the ingest
+    manifest in ``data_dir``) are skipped; chunks that changed or vanished
+    since the last run are removed from the vector store and the graph's
+    provenance first.  *full* ignores the manifest and re-ingests everything.
+
+    Every file's progress is checkpointed per stage; *resume* continues the
+    previous run's attempts from their last finished stage and then retries
+    just the chunks that failed in them.
+    """
+    from kg_rag.ingest.checkpoint import IngestCheckpoint, checkpoint_path
     from kg_rag.ingest.chunking import chunk_by_tokens
     from kg_rag.ingest.extract import extract_entities_and_relations
-    from kg_rag.models import make_entity_id
+    from kg_rag.ingest.extraction_cache import default_cache
+    from kg_rag.ingest.manifest import IngestManifest, manifest_path, text_hash
+    from kg_rag.ingest.pipeline import Pipeline, Stage
+    from kg_rag.llm_limiter import shared_limiter
+    from kg_rag.models import Entity, Relation
     from langchain_openai import ChatOpenAI
 
     await _preflight_checks()
@@ -341,80 +414,221 @@ async def _ingest_batch(dir_path: str) -> None:
         base_url=settings.reasoning_llm_base_url,
         temperature=0,
         request_timeout=settings.llm_request_timeout,
+        max_retries=0,
     )
-    llm_sem = asyncio.Semaphore(settings.llm_concurrency)
+    llm_limiter = shared_limiter(settings.reasoning_llm_base_url)
+    extraction_cache = default_cache()
     storage_sem = asyncio.Semaphore(settings.storage_concurrency)
-    file_sem = asyncio.Semaphore(settings.file_concurrency)
-    vector_store, graph_store = await _init_stores()
+    chunking = [settings.chunk_size, settings.chunk_overlap]
+    manifest = IngestManifest.load(manifest_path(settings.data_dir), chunking)
+    checkpoint = IngestCheckpoint.open(
+        checkpoint_path(settings.data_dir), chunking, resume=resume
+    )
+    if resume:
+        print(f"Resuming {len(checkpoint.attempts)} checkpointed files")
+    vector_store, graph_store = await _init_stores(writer=True)
     total = len(md_files)
     done_count = [0]  # mutable counter for nested scope
+    unchanged = [0]
+    retries: list[_FileJob] = []
+
+    async def _drop_chunks(name: str, chunk_ids: list[str]) -> None:
+        """Remove stale chunks from the vector store and graph provenance."""
+        await vector_store.delete(chunk_ids)
+        async with storage_sem:
+            result = await graph_store.remove_chunk_sources(chunk_ids)
+        logger.info(
+            "  %s → %d stale chunks removed (%d entities updated, %d deleted)",
+            name, len(chunk_ids), result["updated"], len(result["deleted"]),
+        )
 
-    async def _process_one_file(path: Path) -> None:
-        async with file_sem:
-            text = path.read_text(encoding="utf-8")
-            doc_id = path.stem
-            logger.info("Ingesting %s (%d chars)", path.name, len(text))
-
-            # chunk
-            chunks = chunk_by_tokens(text, doc_id=doc_id)
-            logger.info("  %s → %d chunks", path.name, len(chunks))
+    # Stages.  Each one skips the work a resumed attempt already finished;
+    # finishing a checkpointed stage marks it before handing the file on.
+
+    async def _chunk(job: _FileJob) -> _FileJob | None:
+        path = job.path
+        text = await asyncio.to_thread(path.read_text, encoding="utf-8")
+        if not job.retry and not full and manifest.is_current(path, text):
+            unchanged[0] += 1
+            return None
+        logger.info("Ingesting %s (%d chars)", path.name, len(text))
+        job.text, job.key, digest = text, manifest.key(path), text_hash(text)
+        job.chunks = await asyncio.to_thread(chunk_by_tokens, text, doc_id=path.stem)
+
+        attempt = None if job.retry else checkpoint.attempt(job.key, digest)
+        job.resumed = attempt is not None
+        if attempt is None:
+            # keep only chunks the manifest has not seen
+            if full and not job.retry:
+                fresh, stale = job.chunks, manifest.forget(job.key)
+            else:
+                fresh, stale = manifest.plan(path, job.chunks)
+            if stale:
+                await _drop_chunks(path.name, stale)
+            attempt = checkpoint.mark(
+                job.key, digest, "chunked", fresh=[c.id for c in fresh]
+            )
+        job.attempt = attempt
+        by_id = {c.id: c for c in job.chunks}
+        job.fresh = [by_id[cid] for cid in attempt["fresh"]]
+        logger.info(
+            "  %s → %d chunks (%d new or changed, from stage %s)",
+            path.name, len(job.chunks), len(job.fresh), attempt["stage"],
+        )
+        return job
 
-            # extract (shared llm & llm_sem)
+    async def _extract(job: _FileJob) -> _FileJob:
+        if job.attempt["stage"] != "chunked":
+            return job
+        entities, relations, failed_chunks = [], [], []
+        if job.fresh:
             entities, relations, failed_chunks = await extract_entities_and_relations(
-                chunks, sem=llm_sem, llm=llm,
+                job.fresh, limiter=llm_limiter, llm=llm, cache=extraction_cache,
             )
-            logger.info(
-                "  %s → %d entities, %d relations",
-                path.name, len(entities), len(relations),
+        logger.info(
+            "  %s → %d entities, %d relations",
+            job.path.name, len(entities), len(relations),
+        )
+        if failed_chunks:
+            logger.warning(
+                "  %s: %d chunks failed extraction: %s",
+                job.path.name, len(failed_chunks),
+                ", ".join(fc["chunk_id"] for fc in failed_chunks),
             )
-            if failed_chunks:
-                logger.warning(
-                    "  %s: %d chunks failed extraction: %s",
-                    path.name, len(failed_chunks),
-                    ", ".join(fc["chunk_id"] for fc in failed_chunks),
-                )
+        job.attempt = checkpoint.mark(
+            job.key, job.attempt["hash"], "extracted",
+            entities=[e.model_dump() for e in entities],
+            relations=[r.model_dump() for r in relations],
+            failed=[fc["chunk_id"] for fc in failed_chunks],
+        )
+        return job
 
-            # store chunks (non-blocking: vector failure must not prevent graph writes)
-            chunk_data = {
-                c.id: {"content": c.content, "doc_id": c.doc_id, **c.metadata} for c in chunks
-            }
-            try:
-                await vector_store.upsert(chunk_data)
-            except Exception as e:
-                logger.warning("%s: vector upsert failed: %s", path.name, e)
+    # store chunks (non-blocking: vector failure must not prevent graph writes)
+    async def _embed(job: _FileJob) -> _FileJob:
+        if job.attempt["stage"] != "extracted":
+            return job
+        chunk_data = {
+            c.id: {"content": c.content, "doc_id": c.doc_id, **c.metadata}
+            for c in job.fresh
+        }
+        try:
+            job.prepared = await vector_store.prepare_upsert(chunk_data)
+        except Exception as e:
+            logger.warning("%s: embedding failed: %s", job.path.name, e)
+        return job
 
+    async def _write_vectors(job: _FileJob) -> _FileJob:
+        if job.attempt["stage"] != "extracted":
+            return job
+        failed = set(job.attempt["failed"])
+        try:
+            if job.prepared is None:
+                raise RuntimeError("no embeddings")
+            counts = await vector_store.write_prepared(job.prepared)
+            if counts:
+                logger.info(
+                    "  %s → vector store: %d new, %d updated, %d unchanged",
+                    job.path.name, counts["inserted"], counts["updated"],
+                    counts["skipped"],
+                )
+        except Exception as e:
+            logger.warning("%s: vector upsert failed: %s", job.path.name, e)
+            failed.update(c.id for c in job.fresh)
+        job.prepared = None
+        job.attempt = checkpoint.mark(
+            job.key, job.attempt["hash"], "vector", failed=sorted(failed)
+        )
+        return job
+
+    async def _write_graph(job: _FileJob) -> None:
+        attempt = job.attempt
+        entities = [Entity.model_validate(e) for e in attempt["entities"]]
+        relations = [Relation.model_validate(r) for r in attempt["relations"]]
+        failed = set(attempt["failed"])
+        if attempt["stage"] == "vector":
             # store entities (shared storage_sem)
-            node_errors = await _upsert_entities(entities, graph_store, storage_sem)
-            if node_errors:
+            node_failed = await _upsert_entities(entities, graph_store, storage_sem)
+            if node_failed:
                 logger.error(
                     "%s: failed to upsert %d/%d nodes",
-                    path.name, len(node_errors), len(entities),
+                    job.path.name, node_failed, len(entities),
                 )
 
             # store relations (shared storage_sem)
-            edge_errors = await _upsert_relations(relations, graph_store, storage_sem)
-            if edge_errors:
+            edge_failed = await _upsert_relations(relations, graph_store, storage_sem)
+            if edge_failed:
                 logger.error(
                     "%s: failed to upsert %d/%d edges",
-                    path.name, len(edge_errors), len(relations),
+                    job.path.name, edge_failed, len(relations),
                 )
+            if node_failed or edge_failed:
+                failed.update(c.id for c in job.fresh)
+            checkpoint.mark(job.key, attempt["hash"], "graph", failed=sorted(failed))
+
+        # only now is the file recorded: a crash above redoes the stage
+        manifest.record(job.path, job.text, job.chunks, failed)
+        if job.resumed and failed:
+            # the manifest now lacks exactly the failed chunks
+            retries.append(_FileJob(job.path, retry=True))
+        done_count[0] += 1
+        print(
+            f"  [{done_count[0]}/{total}] {job.path.name}: {len(entities)} entities, "
+            f"{len(relations)} relations, {len(job.fresh)}/{len(job.chunks)} chunks"
+            + (f", {len(failed)} failed" if failed else "")
+        )
 
-            done_count[0] += 1
-            print(
-                f"  [{done_count[0]}/{total}] {path.name}: {len(entities)} entities, "
-                f"{len(relations)} relations, {len(chunks)} chunks"
-            )
+    def _pipeline() -> Pipeline:
+        return Pipeline(
+            [
+                Stage("chunk", _chunk, workers=2),
+                Stage("extract", _extract, workers=settings.file_concurrency),
+                Stage("embed", _embed, workers=settings.embed_concurrency),
+                Stage("vector", _write_vectors, workers=1),
+                Stage("graph", _write_graph, workers=settings.graph_write_concurrency),
+            ],
+            queue_size=settings.ingest_queue_size,
+        )
 
     try:
-        results = await asyncio.gather(
-            *(_process_one_file(p) for p in md_files),
-            return_exceptions=True,
+        removed = manifest.missing_under(root, md_files)
+        for key in removed:
+            chunk_ids = manifest.forget(key)
+            if chunk_ids:
+                await _drop_chunks(Path(key).name, chunk_ids)
+        pipeline = _pipeline()
+        await pipeline.run(_FileJob(p) for p in md_files)
+        failures = list(pipeline.failures)
+        if retries:
+            print(f"Retrying failed chunks of {len(retries)} resumed files")
+            retry_pipeline = _pipeline()
+            await retry_pipeline.run(retries)
+            failures += retry_pipeline.failures
+
+        for job, exc in failures:
+            logger.error("Failed to ingest %s: %s", job.path.name, exc)
+        print(
+            f"All {len(md_files)} files ingested ({len(failures)} failed, "
+            f"{unchanged[0]} unchanged, {len(removed)} removed)."
         )
-        failed = [(md_files[i], r) for i, r in enumerate(results) if isinstance(r, Exception)]
-        for path, exc in failed:
-            logger.error("Failed to ingest %s: %s", path.name, exc)
-        print(f"All {len(md_files)} files ingested ({len(failed)} failed).")
+        for name, row in pipeline.stats().items():
+            print(
+                f"  {name:<8} {row['done']:>6} files  {row['per_s']:>8.2f}/s  "
+                f"{row['utilisation']:>5.0%} busy  max queue {row['max_queued']}"
+            )
+        limits = llm_limiter.stats()
+        print(
+            f"  LLM limit {limits['limit']} (window {limits['window']}, "
+            f"{limits['cuts']} rate-limit cuts)"
+        )
+        if failures:
+            print("Re-run with --resume to continue the failed files.")
+        else:
+            checkpoint.clear()
     finally:
+        manifest.save()
+        if extraction_cache is not None:
+            logger.info("Extraction cache: %s", extraction_cache.stats())
+        logger.info("LLM limiter: %s", llm_limiter.stats())
         await graph_store.finalize()
         await vector_store.finalize()
 
@@ -424,7 +638,7 @@ async def _ingest_batch(dir_path: str) -> None:
 # ---------------------------------------------------------------------------
 
 async def _vector_retag(dir_path: str, *, dry_run: bool = False) -> None:
-    """Backfill missing ``doc_id`` in the NanoVectorDB storage file.
+    """Backfill missing ``doc_id`` in the vector store side file.
 
     The initial vector DB may have been created before we stored provenance.
     Since chunk IDs are deterministic (doc_id + index → sha256), we can
@@ -432,6 +646,8 @@ async def _vector_retag(dir_path: str, *, dry_run: bool = False) -> None:
     then attach it to existing vector records without re-embedding.
     """
     from kg_rag.ingest.chunking import chunk_by_tokens
+    from kg_rag.storage.vector_file import load_meta, meta_path, migrate_legacy_json
+    from kg_rag.storage.vector_wal import wal_path
 
     root = Path(dir_path)
     if not root.is_dir():
@@ -443,13 +659,22 @@ async def _vector_retag(dir_path: str, *, dry_run: bool = False) -> None:
         print(f"No .md files found in {root}")
         sys.exit(1)
 
-    vector_path = settings.data_dir / "nano_vector.json"
-    if not vector_path.exists():
+    vector_base = settings.data_dir / "nano_vector"
+    vector_path = meta_path(vector_base)
+    if wal_path(vector_base).exists():
+        # Fold pending WAL entries into the side file before editing it.
+        from kg_rag.storage.nano_vector import NanoVectorStore
+
+        print("Compacting vector WAL...")
+        await NanoVectorStore().finalize()
+    if not vector_path.exists() and not migrate_legacy_json(
+        vector_base, settings.embedding_dim
+    ):
         print(f"Vector DB not found: {vector_path}")
         sys.exit(1)
 
     print(f"Loading vector DB: {vector_path}")
-    db = json.loads(vector_path.read_text(encoding="utf-8"))
+    db = load_meta(vector_base) or {}
     records = db.get("data") or []
     if not isinstance(records, list):
         print("Vector DB format error: 'data' is not a list")
@@ -489,10 +714,12 @@ async def _vector_retag(dir_path: str, *, dry_run: bool = False) -> None:
         return
 
     print("Writing updated vector DB...")
-    vector_path.write_text(
+    tmp_path = vector_path.with_name(vector_path.name + ".tmp")
+    tmp_path.write_text(
         json.dumps(db, ensure_ascii=False, separators=(",", ":")),
         encoding="utf-8",
     )
+    tmp_path.replace(vector_path)
     print("Done.")
 
 
@@ -500,115 +727,143 @@ async def _vector_retag(dir_path: str, *, dry_run: bool = False) -> None:
 # Merge subcommand
 # ---------------------------------------------------------------------------
 
-async def _merge(source_names: list[str], target_name: str) -> None:
-    """Merge source entities into the target entity in Neo4j."""
+def _load_merge_groups(path: Path) -> list[tuple[list[str], str]]:
+    """Read ``(source names, target name)`` groups from a JSON or CSV file.
+
+    JSON: ``[{"target": "...", "sources": ["...", ...]}, ...]``.
+    CSV: a header with ``target`` and ``source`` columns, one source per
+    row; rows sharing a target form one group.
+    """
+    import csv
+
+    if path.suffix.lower() == ".json":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return [(list(g["sources"]), g["target"]) for g in data]
+    groups: dict[str, list[str]] = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            target = (row.get("target") or "").strip()
+            source = (row.get("source") or "").strip()
+            if target and source:
+                groups.setdefault(target, []).append(source)
+    return [(sources, target) for target, sources in groups.items()]
+
+
+async def _merge(
+    source_names: list[str] | None,
+    target_name: str | None,
+    groups_file: Path | None = None,
+) -> None:
+    """Merge source entities into target entities in the graph store."""
     from kg_rag.models import make_entity_id
+    from kg_rag.storage.base import check_merge_groups
+
+    if groups_file is not None:
+        named = _load_merge_groups(groups_file)
+    else:
+        named = [(source_names or [], target_name or "")]
+    groups = [
+        ([make_entity_id(s) for s in sources], make_entity_id(target))
+        for sources, target in named
+    ]
+    try:
+        check_merge_groups(groups)
+    except ValueError as exc:
+        print(f"Invalid merge groups: {exc}")
+        sys.exit(1)
 
     await _preflight_graph_only()
-    graph_store = await _init_graph_only()
+    graph_store = await _init_graph_only(writer=True)
+    try:
+        result = await graph_store.merge_entities_bulk(groups)
+    finally:
+        await graph_store.finalize()
+
+    targets = {target for _, target in groups}
+    for entity_id in result["missing"]:
+        kind = "Target" if entity_id in targets else "Source"
+        print(f"  {kind} entity '{entity_id}' not found, skipped")
+    print(
+        f"Merged {len(result['merged'])} entities into {len(groups)} targets "
+        f"({result['edges']} edges moved)."
+    )
+    if groups_file is None and result["missing"] and not result["merged"]:
+        sys.exit(1)
 
-    target_id = make_entity_id(target_name)
 
+# ---------------------------------------------------------------------------
+# Graph-refresh subcommand
+# ---------------------------------------------------------------------------
+
+async def _graph_refresh() -> None:
+    """Recompute the graph store's derived data (search text, degrees, summary)."""
+    await _preflight_graph_only()
+    graph_store = await _init_graph_only()
     try:
-        # Verify target exists
-        rows = await graph_store.query_cypher(
-            "MATCH (n:Entity {entity_id: $eid}) RETURN n.name AS name",
-            {"eid": target_id},
-        )
-        if not rows:
-            print(f"Target entity '{target_name}' not found in graph.")
-            sys.exit(1)
-
-        for src_name in source_names:
-            src_id = make_entity_id(src_name)
-            if src_id == target_id:
-                print(f"  Skipping '{src_name}' (same as target)")
-                continue
-
-            src_rows = await graph_store.query_cypher(
-                "MATCH (n:Entity {entity_id: $eid}) "
-                "RETURN n.name AS name, n.description AS description, "
-                "n.aliases AS aliases",
-                {"eid": src_id},
-            )
-            if not src_rows:
-                print(f"  Source entity '{src_name}' not found, skipping")
-                continue
-
-            # Collect outgoing edges from source (excluding edges to target)
-            out_edges = await graph_store.query_cypher(
-                "MATCH (s:Entity {entity_id: $sid})-[r]->(t:Entity) "
-                "RETURN t.entity_id AS tid, type(r) AS rtype, "
-                "properties(r) AS props",
-                {"sid": src_id},
-            )
-            # Collect incoming edges to source (excluding edges from target)
-            in_edges = await graph_store.query_cypher(
-                "MATCH (t:Entity)-[r]->(s:Entity {entity_id: $sid}) "
-                "RETURN t.entity_id AS tid, type(r) AS rtype, "
-                "properties(r) AS props",
-                {"sid": src_id},
-            )
+        await graph_store.refresh_derived()
+        print("Done.")
+    finally:
+        await graph_store.finalize()
 
-            # Redirect outgoing edges preserving relationship type
-            for edge in out_edges:
-                neighbor_id = edge["tid"]
-                if neighbor_id == target_id:
-                    logger.info(
-                        "Dropping source→target edge (%s)-[%s]->(%s)",
-                        src_name, edge["rtype"], target_name,
-                    )
-                    continue
-                props = dict(edge.get("props") or {})
-                props["type"] = edge["rtype"]
-                await graph_store.upsert_edge(target_id, neighbor_id, props)
-
-            # Redirect incoming edges preserving relationship type
-            for edge in in_edges:
-                neighbor_id = edge["tid"]
-                if neighbor_id == target_id:
-                    logger.info(
-                        "Dropping target→source edge (%s)-[%s]->(%s)",
-                        target_name, edge["rtype"], src_name,
-                    )
-                    continue
-                props = dict(edge.get("props") or {})
-                props["type"] = edge["rtype"]
-                await graph_store.upsert_edge(neighbor_id, target_id, props)
-
-            # Merge description and aliases into target
-            src_desc = src_rows[0].get("description", "") or ""
-            src_aliases = src_rows[0].get("aliases") or []
-            stored_name = src_rows[0].get("name", "") or ""
-            # Include both CLI arg and stored canonical name
-            new_aliases = list({stored_name, src_name} - {""}) + src_aliases
-
-            await graph_store.query_cypher(
-                "MATCH (n:Entity {entity_id: $tid}) "
-                "SET n.description = CASE "
-                "  WHEN n.description IS NULL OR n.description = '' "
-                "    THEN $desc "
-                "  WHEN $desc = '' THEN n.description "
-                "  ELSE n.description + '\n' + $desc END, "
-                "n.aliases = CASE "
-                "  WHEN n.aliases IS NULL THEN $new_aliases "
-                "  ELSE n.aliases + "
-                "    [x IN $new_aliases WHERE NOT x IN n.aliases] END",
-                {"tid": target_id, "desc": src_desc,
-                 "new_aliases": new_aliases},
-            )
 
-            # Delete source node
-            await graph_store.query_cypher(
-                "MATCH (n:Entity {entity_id: $eid}) DETACH DELETE n",
-                {"eid": src_id},
-            )
-            print(f"  Merged '{src_name}' → '{target_name}'")
+# ---------------------------------------------------------------------------
+# Graph-snapshot subcommand
+# ---------------------------------------------------------------------------
 
-        print("Done.")
+async def _graph_snapshot() -> None:
+    """Copy the Neo4j graph into the embedded store's snapshot file."""
+    from kg_rag.models import ENTITY_TYPE_LABELS
+    from kg_rag.storage.memory_graph import MemoryGraphStore
+    from kg_rag.storage.neo4j_graph import Neo4jGraphStore
 
+    errors = await _check_neo4j_connectivity()
+    if errors:
+        for msg in errors:
+            logger.error("Preflight check failed: %s", msg)
+        sys.exit(1)
+
+    source = Neo4jGraphStore()
+    await source.initialize()
+    target = MemoryGraphStore()
+    try:
+        # streamed batch by batch: only the target graph is held in full
+        node_count = edge_count = 0
+        async for batch in source.stream_cypher(
+            "MATCH (n:Entity) RETURN n.entity_id AS id, properties(n) AS props"
+        ):
+            nodes = []
+            for row in batch:
+                props = dict(row["props"])
+                props.pop("degree", None)  # the embedded store derives it
+                etype = props.get("type")
+                props["label"] = etype if etype in ENTITY_TYPE_LABELS else "Entity"
+                nodes.append((row["id"], props))
+            await target.upsert_nodes_bulk(nodes)
+            node_count += len(nodes)
+        async for batch in source.stream_cypher(
+            "MATCH (u:User) RETURN u.user_id AS id, properties(u) AS props"
+        ):
+            await target.upsert_nodes_bulk(
+                [(row["id"], {**row["props"], "label": "User"}) for row in batch]
+            )
+            node_count += len(batch)
+        async for batch in source.stream_cypher(
+            "MATCH (a)-[r]->(b:Entity) WHERE a:Entity OR a:User "
+            "RETURN CASE WHEN a:User THEN a.user_id ELSE a.entity_id END AS src, "
+            "b.entity_id AS tgt, type(r) AS type, properties(r) AS props"
+        ):
+            await target.upsert_edges_bulk(
+                [(r["src"], r["tgt"], {**r["props"], "type": r["type"]}) for r in batch]
+            )
+            edge_count += len(batch)
+        target.save()
+        print(
+            f"Wrote {node_count} nodes and {edge_count} edges to "
+            f"{target.path}"
+        )
     finally:
-        await graph_store.finalize()
+        await source.finalize()
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(
@@ -630,6 +885,16 @@ def main() -> None:
     # ingest-dir
     ingest_dir_p = sub.add_parser("ingest-dir", help="Batch ingest all .md files in a directory")
     ingest_dir_p.add_argument("dir", help="Path to the directory containing .md files")
+    ingest_dir_p.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the ingest manifest and re-ingest every file",
+    )
+    ingest_dir_p.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from its per-file stage checkpoints",
+    )
 
     # vector-retag
     vec_p = sub.add_parser(
@@ -662,13 +927,30 @@ def main() -> None:
         "merge", help="Merge duplicate entities in the knowledge graph",
     )
     merge_p.add_argument(
-        "--source", nargs="+", required=True,
+        "--source", nargs="+",
         help="Source entity names to merge away",
     )
     merge_p.add_argument(
-        "--target", required=True,
+        "--target",
         help="Target entity name to merge into",
     )
+    merge_p.add_argument(
+        "--file", type=Path,
+        help="Bulk mode: JSON list of {target, sources} or CSV with "
+             "target,source columns (replaces --source/--target)",
+    )
+
+    # graph-refresh
+    sub.add_parser(
+        "graph-refresh",
+        help="Recompute derived graph data (search text, degrees, summary)",
+    )
+
+    # graph-snapshot
+    sub.add_parser(
+        "graph-snapshot",
+        help="Export the Neo4j graph to the embedded backend's snapshot file",
+    )
 
     args = parser.parse_args()
 
@@ -677,11 +959,17 @@ def main() -> None:
     elif args.command == "ingest":
         asyncio.run(_ingest(args.file))
     elif args.command == "ingest-dir":
-        asyncio.run(_ingest_batch(args.dir))
+        asyncio.run(_ingest_batch(args.dir, full=args.full, resume=args.resume))
     elif args.command == "vector-retag":
         asyncio.run(_vector_retag(args.dir, dry_run=args.dry_run))
     elif args.command == "merge":
-        asyncio.run(_merge(args.source, args.target))
+        if args.file is None and not (args.source and args.target):
+            parser.error("merge needs --source and --target, or --file")
+        asyncio.run(_merge(args.source, args.target, args.file))
+    elif args.command == "graph-refresh":
+        asyncio.run(_graph_refresh())
+    elif args.command == "graph-snapshot":
+        asyncio.run(_graph_snapshot())
     elif args.command == "serve":
         import uvicorn
         uvicorn.run(
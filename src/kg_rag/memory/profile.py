@@ -1,31 +1,20 @@
-"""User profile CRUD operations backed by Neo4j."""
+"""User profile CRUD operations backed by the graph store."""
 
 from __future__ import annotations
 
 import logging
 
-from kg_rag.storage.neo4j_graph import Neo4jGraphStore
+from kg_rag.storage.base import BaseGraphStore
 
 logger = logging.getLogger(__name__)
 
 
-async def read_profile(user_id: str, graph: Neo4jGraphStore) -> str:
-    """Read a user's profile from Neo4j and return a formatted string.
+async def read_profile(user_id: str, graph: BaseGraphStore) -> str:
+    """Read a user's profile from the graph store and return a formatted string.
 
     The profile includes mastered algorithms, weak concepts, and interests.
     """
-    cypher = """
-    MATCH (u:User {user_id: $uid})
-    OPTIONAL MATCH (u)-[r]->(t)
-    RETURN type(r) AS rel_type,
-           t.entity_id AS entity,
-           t.name AS name,
-           r.confidence AS confidence,
-           r.evidence AS evidence,
-           r.last_updated AS last_updated
-    ORDER BY rel_type, r.confidence DESC
-    """
-    records = await graph.query_cypher(cypher, {"uid": user_id})
+    records = await graph.get_user_relations(user_id)
 
     if not records:
         return f"User {user_id}: no profile data yet."
@@ -15,6 +15,7 @@ from langchain_openai import ChatOpenAI
 
 from kg_rag.agent.prompts import PROFILE_EXTRACTION_PROMPT
 from kg_rag.config import settings
+from kg_rag.llm_limiter import ainvoke_limited
 from kg_rag.models import PROFILE_REL_TYPES, UserProfileUpdate, make_entity_id
 from kg_rag.storage.base import BaseGraphStore
 from kg_rag.utils import strip_code_fences
@@ -33,6 +34,7 @@ def _get_llm() -> ChatOpenAI:
             base_url=settings.llm_base_url,
             temperature=0,
             request_timeout=settings.llm_request_timeout,
+            max_retries=0,
         )
     return _llm
 
@@ -45,7 +47,7 @@ async def extract_proposals(
     llm = _get_llm()
 
     prompt = PROFILE_EXTRACTION_PROMPT.format(conversation=conversation)
-    response = await llm.ainvoke([HumanMessage(content=prompt)])
+    response = await ainvoke_limited(llm, [HumanMessage(content=prompt)])
     raw = response.content.strip()
 
     # Parse JSON array from LLM output
@@ -92,9 +94,13 @@ _ALLOWED_PROFILE_RELS = PROFILE_REL_TYPES
 async def apply_proposals(
     proposals: list[UserProfileUpdate], graph: BaseGraphStore
 ) -> int:
-    """Write accepted proposals to Neo4j. Returns the number applied."""
+    """Write accepted proposals to Neo4j. Returns the number applied.
 
-    applied = 0
+    All valid proposals are written with two bulk upserts (nodes, then
+    edges), so a failure applies none of them.
+    """
+
+    valid: list[UserProfileUpdate] = []
     for p in proposals:
         if p.relation_type not in _ALLOWED_PROFILE_RELS:
             logger.warning(
@@ -102,36 +108,41 @@ async def apply_proposals(
                 p.relation_type, p.target_entity,
             )
             continue
-        try:
-            # Ensure User node exists
-            await graph.upsert_node(
-                p.user_id, {"label": "User", "user_id": p.user_id}
-            )
-            # Ensure target entity node exists
-            # Stub node — type unknown from conversation context.
-            # If entity was previously ingested, MERGE preserves existing type labels.
-            entity_id = make_entity_id(p.target_entity)
-            await graph.upsert_node(
-                entity_id,
-                {"label": "Entity", "name": p.target_entity},
-            )
-            # Upsert the relationship
-            await graph.upsert_edge(
+        valid.append(p)
+    if not valid:
+        logger.info("Applied 0/%d proposals", len(proposals))
+        return 0
+
+    now = datetime.now(tz=timezone.utc).isoformat()
+    nodes: dict[str, dict] = {}
+    edges = []
+    for p in valid:
+        # Ensure User node exists
+        nodes[p.user_id] = {"label": "User", "user_id": p.user_id}
+        # Ensure target entity node exists
+        # Stub node — type unknown from conversation context.
+        # If entity was previously ingested, MERGE preserves existing type labels.
+        entity_id = make_entity_id(p.target_entity)
+        nodes.setdefault(entity_id, {"label": "Entity", "name": p.target_entity})
+        edges.append(
+            (
                 p.user_id,
                 entity_id,
                 {
                     "type": p.relation_type,
                     "confidence": p.confidence,
                     "evidence": p.evidence,
-                    "last_updated": datetime.now(tz=timezone.utc).isoformat(),
+                    "last_updated": now,
                 },
             )
-            applied += 1
-        except Exception as e:
-            logger.warning(
-                "Failed to apply proposal %s->%s: %s",
-                p.user_id, p.target_entity, e,
-            )
+        )
 
-    logger.info("Applied %d/%d proposals", applied, len(proposals))
-    return applied
+    try:
+        await graph.upsert_nodes_bulk(list(nodes.items()))
+        await graph.upsert_edges_bulk(edges)
+    except Exception as e:
+        logger.warning("Failed to apply %d proposals: %s", len(valid), e)
+        return 0
+
+    logger.info("Applied %d/%d proposals", len(valid), len(proposals))
+    return len(valid)
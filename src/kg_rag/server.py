@@ -22,14 +22,14 @@ def _build_tools():
 
     Runs in a worker thread to avoid blocking the ASGI event loop.
     """
+    from kg_rag.storage import create_graph_store
     from kg_rag.storage.nano_vector import NanoVectorStore
-    from kg_rag.storage.neo4j_graph import Neo4jGraphStore
     from kg_rag.tools.vector_search import create_vector_search
     from kg_rag.tools.graph_query import create_graph_query
     from kg_rag.tools.web_search import web_search
 
     vector_store = NanoVectorStore()
-    graph_store = Neo4jGraphStore()
+    graph_store = create_graph_store(cached=True)
 
     # Neo4j driver needs async init — run in a fresh event loop (we're in a
     # worker thread, so there is no running loop here).
@@ -37,6 +37,8 @@ def _build_tools():
         asyncio.run(asyncio.wait_for(graph_store.initialize(), timeout=15))
     except Exception as exc:
         logger.warning("Neo4j init failed (%s), graph_query tool will be unavailable", exc)
+        graph_store = None
+    if graph_store is None or not graph_store.supports_cypher:
         return [
             create_vector_search(vector_store),
             web_search,
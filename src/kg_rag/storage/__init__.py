@@ -1,5 +1,43 @@
 """storage — vector and graph storage backends."""
 
-from kg_rag.storage.base import BaseGraphStore, BaseVectorStore
+from kg_rag.storage.base import BaseGraphStore, BaseVectorStore, CypherGraphStore
 
-__all__ = ["BaseVectorStore", "BaseGraphStore"]
+__all__ = [
+    "BaseVectorStore", "BaseGraphStore", "CypherGraphStore", "create_graph_store",
+]
+
+GRAPH_BACKENDS = ("neo4j", "memory")
+
+
+def create_graph_store(*, cached: bool = False) -> BaseGraphStore:
+    """Build the graph store selected by ``settings.graph_backend``.
+
+    With *cached*, the store is wrapped in a :class:`CachedGraphStore` when
+    ``settings.graph_cache_size`` is positive.  Backends are imported lazily
+    so the memory backend works without the Neo4j driver installed.
+    """
+    from kg_rag.config import settings
+
+    backend = settings.graph_backend.strip().lower()
+    if backend == "neo4j":
+        from kg_rag.storage.neo4j_graph import Neo4jGraphStore
+
+        store: BaseGraphStore = Neo4jGraphStore()
+    elif backend == "memory":
+        from kg_rag.storage.memory_graph import MemoryGraphStore
+
+        store = MemoryGraphStore()
+    else:
+        raise ValueError(
+            f"Unsupported GRAPH_BACKEND {settings.graph_backend!r}; "
+            f"expected one of {GRAPH_BACKENDS}"
+        )
+    if cached and settings.graph_cache_size > 0:
+        from kg_rag.storage.graph_cache import CachedGraphStore
+
+        store = CachedGraphStore(
+            store,
+            max_entries=settings.graph_cache_size,
+            ttl_s=settings.graph_cache_ttl,
+        )
+    return store
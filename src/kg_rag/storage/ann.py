@@ -0,0 +1,225 @@
+"""IVF-flat approximate nearest-neighbour index in pure numpy.
+
+Vectors are L2-normalised, so cosine similarity is a dot product and the
+coarse quantiser is spherical k-means.  Each row of the store's matrix is
+assigned to its closest centroid; a query scores only the rows of the
+``nprobe`` closest centroids.  The index stores row *positions* into the
+matrix (not ids), so callers must report deletions through :meth:`remap`.
+
+Labels and lists live in buffers with spare capacity: :meth:`IVFIndex.assign`
+writes appended rows into the tail past what the index exposes, and gives a
+list or the labels a fresh array before changing rows already in them.  A
+shallow ``copy.copy`` of an index is therefore an independent snapshot, and
+appending a batch costs O(batch) amortised rather than O(n).
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows per block when assigning the full matrix, to bound peak memory.
+_ASSIGN_BLOCK = 8192
+# Training sample per centroid — enough for stable centroids at a fraction
+# of the cost of clustering the whole corpus.
+_SAMPLE_PER_LIST = 32
+
+
+def _assign(mat: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    labels = np.empty(mat.shape[0], dtype=np.int32)
+    for start in range(0, mat.shape[0], _ASSIGN_BLOCK):
+        block = np.asarray(mat[start : start + _ASSIGN_BLOCK], dtype=np.float32)
+        labels[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def _append(
+    view: np.ndarray, buf: np.ndarray | None, add: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Append *add* to *view* (a prefix of *buf*, or unbuffered when *buf*
+    is ``None``); returns the new view and its buffer."""
+    m = len(view)
+    need = m + len(add)
+    if buf is None or buf.shape[0] < need:
+        grown = np.empty(max(need, int(m * 1.5), 16), dtype=view.dtype)
+        grown[:m] = view
+        buf = grown
+    buf[m:need] = add
+    return buf[:need], buf
+
+
+def _spherical_kmeans(
+    sample: np.ndarray, nlist: int, *, iters: int, rng: np.random.Generator
+) -> np.ndarray:
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(iters):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=nlist)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            # Re-seed empty clusters from random sample points.
+            sums[empty] = sample[rng.choice(len(sample), size=len(empty))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file index over the rows of a normalised float32 matrix."""
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        labels: np.ndarray,
+        *,
+        nprobe: int,
+        trained_size: int | None = None,
+    ) -> None:
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.nprobe = max(1, int(nprobe))
+        self._labels = np.asarray(labels, dtype=np.int32)
+        self.trained_size = (
+            len(self._labels) if trained_size is None else int(trained_size)
+        )
+        self._lists: list[np.ndarray] = []
+        # Spare-capacity backing arrays of ``_labels`` / each list; ``None``
+        # where the array is exactly sized or shared with another list.
+        self._label_buf: np.ndarray | None = None
+        self._list_bufs: list[np.ndarray | None] = []
+        self._rebuild_lists()
+
+    # -- construction --------------------------------------------------------
+
+    @classmethod
+    def train(
+        cls,
+        mat: np.ndarray,
+        *,
+        nlist: int = 0,
+        nprobe: int = 8,
+        iters: int = 8,
+        seed: int = 0,
+    ) -> IVFIndex:
+        """Cluster *mat* into *nlist* lists (``0`` → ``sqrt(n)``)."""
+        n = mat.shape[0]
+        if n == 0:
+            raise ValueError("cannot train an IVF index on an empty matrix")
+        if nlist <= 0:
+            nlist = int(np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+        rng = np.random.default_rng(seed)
+        sample_size = min(n, nlist * _SAMPLE_PER_LIST)
+        sample_rows = np.sort(rng.choice(n, size=sample_size, replace=False))
+        sample = np.asarray(mat[sample_rows], dtype=np.float32)
+        centroids = _spherical_kmeans(sample, nlist, iters=iters, rng=rng)
+        index = cls(centroids, _assign(mat, centroids), nprobe=nprobe)
+        logger.info("Trained IVF index: %d rows, %d lists", n, nlist)
+        return index
+
+    def _rebuild_lists(self) -> None:
+        order = np.argsort(self._labels, kind="stable").astype(np.int64)
+        bounds = np.searchsorted(
+            self._labels[order], np.arange(len(self.centroids) + 1)
+        )
+        self._lists = [
+            order[bounds[c] : bounds[c + 1]] for c in range(len(self.centroids))
+        ]
+        # the lists are slices of one array: none may grow in place
+        self._list_bufs = [None] * len(self._lists)
+
+    # -- maintenance ---------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def assign(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """(Re)assign matrix *rows* whose vectors are *vectors*.
+
+        Rows at or beyond the current size are appended; existing rows are
+        moved to the list of their new closest centroid.  Appending costs
+        O(batch) amortised; moving existing rows copies the labels.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return
+        new_labels = _assign(vectors, self.centroids)
+        n = len(self._labels)
+        size = max(n, int(rows.max()) + 1)
+        buf = self._label_buf
+        if int(rows.min()) < n or buf is None or buf.shape[0] < size:
+            buf = np.empty(max(size, int(n * 1.5), 64), dtype=np.int32)
+            buf[:n] = self._labels
+            self._label_buf = buf
+        buf[n:size] = -1
+        labels = buf[:size]
+        lists = list(self._lists)
+        bufs = list(self._list_bufs)
+        old_labels = labels[rows]
+        for c in np.unique(old_labels[old_labels >= 0]):
+            members = lists[c]
+            lists[c] = members[~np.isin(members, rows)]
+            bufs[c] = None
+        for c in np.unique(new_labels):
+            lists[c], bufs[c] = _append(lists[c], bufs[c], rows[new_labels == c])
+        labels[rows] = new_labels
+        self._labels = labels
+        self._lists = lists
+        self._list_bufs = bufs
+
+    def remap(self, keep: np.ndarray) -> None:
+        """Drop rows not in *keep* (sorted old positions) and renumber."""
+        self._labels = self._labels[np.asarray(keep, dtype=np.int64)]
+        self._label_buf = None
+        self._rebuild_lists()
+
+    # -- search --------------------------------------------------------------
+
+    def probe(self, q: np.ndarray, nprobe: int | None = None) -> np.ndarray:
+        """Return the sorted row positions in the lists closest to *q*."""
+        nprobe = min(self.nlist, nprobe or self.nprobe)
+        sims = self.centroids @ q
+        if nprobe >= self.nlist:
+            probed = range(self.nlist)
+        else:
+            probed = np.argpartition(sims, -nprobe)[-nprobe:]
+        rows = np.concatenate([self._lists[c] for c in probed])
+        rows.sort()
+        return rows
+
+    # -- persistence ---------------------------------------------------------
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids,
+                labels=self._labels,
+                trained_size=np.int64(self.trained_size),
+            )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: str | Path, *, nprobe: int) -> IVFIndex | None:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path) as f:
+            return cls(
+                f["centroids"],
+                f["labels"],
+                nprobe=nprobe,
+                trained_size=int(f["trained_size"]),
+            )
@@ -2,23 +2,224 @@
 
 from __future__ import annotations
 
+import asyncio
+import logging
+import re
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from typing import Any
 
+from kg_rag.models import ENTITY_TYPE_LABELS, KNOWLEDGE_REL_TYPES, PROFILE_REL_TYPES
+
+logger = logging.getLogger(__name__)
+
+_BASE_LABELS = {"Entity", "User"}
+_ALLOWED_REL_TYPES = KNOWLEDGE_REL_TYPES | PROFILE_REL_TYPES
+
+# Any of these makes a statement a (potential) write.  Matching inside string
+# literals only errs on the side of treating a read as a write.  ``CALL`` is
+# not one of them: a ``CALL { ... }`` subquery writes only through these
+# clauses, and procedures are checked by name below.
+_WRITE_RE = re.compile(
+    r"\b(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|LOAD|FOREACH)\b",
+    re.IGNORECASE,
+)
+_PROCEDURE_RE = re.compile(r"\bCALL\s+([A-Za-z_][\w.]*)", re.IGNORECASE)
+
+# Name prefixes (lower-case) of procedures that write to or administer the
+# database; any other procedure, e.g. db.index.fulltext.queryNodes, reads.
+_WRITE_PROCEDURES = (
+    "apoc.create.", "apoc.merge.", "apoc.refactor.", "apoc.periodic.",
+    "apoc.atomic.", "apoc.do.", "apoc.nodes.delete", "apoc.trigger.",
+    "apoc.cypher.doit", "apoc.cypher.runwrite", "apoc.cypher.runschema",
+    "db.create", "db.index.fulltext.createnodeindex",
+    "db.index.fulltext.createrelationshipindex", "db.index.fulltext.drop",
+    "db.clearquerycaches", "dbms.",
+)
+
+
+def is_read_only(cypher: str) -> bool:
+    if _WRITE_RE.search(cypher):
+        return False
+    return not any(
+        name.lower().startswith(_WRITE_PROCEDURES)
+        for name in _PROCEDURE_RE.findall(cypher)
+    )
+
+
+def prepare_node(
+    node_id: str, node_data: dict[str, Any]
+) -> tuple[str, dict[str, Any]]:
+    """Resolve *node_data* into ``(label, props)`` for an upsert.
+
+    *label* is a known entity type, ``"User"``, or ``"Entity"`` for
+    everything else (the unknown type is kept in the ``type`` property).
+    """
+    data = dict(node_data)  # avoid mutating caller's dict
+    label = data.pop("label", "Entity")
+    props = {**data, "entity_id": node_id}
+
+    if label in ENTITY_TYPE_LABELS:
+        # Known entity type: stored as :Entity plus the type label
+        props.setdefault("type", label)
+    elif label not in _BASE_LABELS:
+        # Unknown type: fall back to :Entity, store in type property
+        props["type"] = label
+        label = "Entity"
+    return label, props
+
+
+def prepare_edge(edge_data: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+    """Resolve *edge_data* into ``(rel_type, props)``, remapping unknown types."""
+    data = dict(edge_data)  # avoid mutating caller's dict
+    rel_type = data.pop("type", "RELATED_TO")
+    if rel_type not in _ALLOWED_REL_TYPES:
+        logger.warning("Unknown rel type %r mapped to RELATED_TO", rel_type)
+        data["original_type"] = rel_type
+        rel_type = "RELATED_TO"
+    return rel_type, data
+
+
+def entity_row(props: dict[str, Any]) -> dict[str, Any]:
+    """Entity properties in the row shape returned by the query methods."""
+    aliases = props.get("aliases")
+    return {
+        "id": props.get("entity_id"),
+        "label": props.get("name"),
+        "type": props.get("type") or "Unknown",
+        "description": props.get("description") or "",
+        "aliases": aliases if isinstance(aliases, list) else [],
+    }
+
+
+def check_merge_groups(
+    groups: list[tuple[list[str], str]],
+) -> list[tuple[list[str], str]]:
+    """Normalise ``(sources, target)`` merge groups.
+
+    Sources equal to their target and repeated sources are dropped.  An id
+    merged into two targets, or both merged away and kept as a target, is
+    ambiguous and raises :class:`ValueError`.
+    """
+    out: list[tuple[list[str], str]] = []
+    merged: dict[str, str] = {}
+    for sources, target in groups:
+        kept = []
+        for src in dict.fromkeys(sources):
+            if src == target:
+                continue
+            if src in merged:
+                if merged[src] != target:
+                    raise ValueError(f"entity {src!r} is merged into two targets")
+                continue
+            merged[src] = target
+            kept.append(src)
+        if kept:
+            out.append((kept, target))
+    both = merged.keys() & {target for _, target in out}
+    if both:
+        raise ValueError(f"entities both merged away and kept: {sorted(both)}")
+    return out
+
+
+def merged_text(
+    target: dict[str, Any], sources: list[dict[str, Any]]
+) -> tuple[str, list[str]]:
+    """Target ``(description, aliases)`` after absorbing *sources*.
+
+    Descriptions are appended on new lines; each source's name and aliases
+    become target aliases (existing ones first, no duplicates).
+    """
+    description = target.get("description") or ""
+    aliases = list(target.get("aliases") or [])
+    for src in sources:
+        extra = src.get("description") or ""
+        if extra:
+            description = f"{description}\n{extra}" if description else extra
+        for alias in [src.get("name"), *(src.get("aliases") or [])]:
+            if alias and alias not in aliases:
+                aliases.append(alias)
+    return description, aliases
+
+
+def merged_sources(
+    target: dict[str, Any], sources: list[dict[str, Any]]
+) -> list[str] | None:
+    """Target ``source_chunks`` after absorbing *sources*.
+
+    A target without provenance stays without it, so it is never deleted as
+    an orphan by :meth:`BaseGraphStore.remove_chunk_sources`.
+    """
+    chunks = target.get("source_chunks")
+    if chunks is None:
+        return None
+    out = list(chunks)
+    for src in sources:
+        out += [c for c in src.get("source_chunks") or [] if c not in out]
+    return out
+
 
 class BaseVectorStore(ABC):
     """Interface for vector similarity search backends."""
 
     @abstractmethod
     async def query(
-        self, query: str, top_k: int = 5, *, query_embedding: list[float] | None = None
+        self,
+        query: str,
+        top_k: int = 5,
+        *,
+        query_embedding: list[float] | None = None,
+        filter: dict[str, Any] | None = None,
     ) -> list[dict[str, Any]]:
         """Return top-k similar records.  Each dict contains at least
-        ``id``, ``distance``, and the stored metadata fields."""
+        ``id``, ``distance``, and the stored metadata fields.
+
+        *filter* restricts the search to records whose metadata match every
+        ``field: value`` pair (a list value matches any of its items)."""
+
+    async def query_many(
+        self,
+        queries: list[str],
+        top_k: int = 5,
+        *,
+        query_embeddings: list[list[float] | None] | None = None,
+        filter: dict[str, Any] | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        """Run several queries at once; results are in *queries* order.
+
+        Backends override this to share embedding requests and matrix scans;
+        the default simply issues the queries concurrently.
+        """
+        embeddings = query_embeddings or [None] * len(queries)
+        return list(
+            await asyncio.gather(
+                *(
+                    self.query(q, top_k, query_embedding=e, filter=filter)
+                    for q, e in zip(queries, embeddings)
+                )
+            )
+        )
 
     @abstractmethod
-    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
-        """Insert or update records.  *data* maps ``id -> {content, metadata…}``."""
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> dict[str, int] | None:
+        """Insert or update records.  *data* maps ``id -> {content, metadata…}``.
+
+        Backends that detect unchanged records return
+        ``{"inserted": …, "updated": …, "skipped": …}``.
+        """
+
+    async def prepare_upsert(self, data: dict[str, dict[str, Any]]) -> Any:
+        """First half of :meth:`upsert`: the slow work that needs no lock
+        (embedding).  Returns an opaque batch for :meth:`write_prepared`.
+
+        Lets a pipeline embed several batches while another is written; the
+        default defers all work to the write.
+        """
+        return data
+
+    async def write_prepared(self, prepared: Any) -> dict[str, int] | None:
+        """Second half of :meth:`upsert`: store a :meth:`prepare_upsert` batch."""
+        return await self.upsert(prepared)
 
     @abstractmethod
     async def delete(self, ids: list[str]) -> None:
@@ -34,6 +235,11 @@ class BaseVectorStore(ABC):
 class BaseGraphStore(ABC):
     """Interface for labelled-property-graph backends (Neo4j, etc.)."""
 
+    #: Whether the store runs arbitrary Cypher, i.e. is a
+    #: :class:`CypherGraphStore` (the ``graph_query`` tool is only offered
+    #: for backends that do).
+    supports_cypher = False
+
     # -- node operations -----------------------------------------------------
 
     @abstractmethod
@@ -48,6 +254,23 @@ class BaseGraphStore(ABC):
     @abstractmethod
     async def delete_node(self, node_id: str) -> None: ...
 
+    async def delete_nodes_bulk(self, node_ids: list[str]) -> None:
+        """Delete many entities with their relationships (see
+        :meth:`upsert_nodes_bulk`)."""
+        for node_id in node_ids:
+            await self.delete_node(node_id)
+
+    async def upsert_nodes_bulk(
+        self, nodes: list[tuple[str, dict[str, Any]]]
+    ) -> None:
+        """Upsert many ``(node_id, node_data)`` pairs.
+
+        Backends override this to batch round trips; the default falls back
+        to one :meth:`upsert_node` call per node.
+        """
+        for node_id, node_data in nodes:
+            await self.upsert_node(node_id, node_data)
+
     # -- edge operations -----------------------------------------------------
 
     @abstractmethod
@@ -61,12 +284,106 @@ class BaseGraphStore(ABC):
         self, source: str, target: str, edge_data: dict[str, Any]
     ) -> None: ...
 
-    # -- query ---------------------------------------------------------------
+    async def upsert_edges_bulk(
+        self, edges: list[tuple[str, str, dict[str, Any]]]
+    ) -> None:
+        """Upsert many ``(source, target, edge_data)`` triples (see
+        :meth:`upsert_nodes_bulk`)."""
+        for source, target, edge_data in edges:
+            await self.upsert_edge(source, target, edge_data)
+
+    # -- maintenance writes --------------------------------------------------
+
+    async def merge_entities(self, sources: list[str], target: str) -> dict[str, Any]:
+        """Merge entities *sources* into *target* (see :meth:`merge_entities_bulk`)."""
+        return await self.merge_entities_bulk([(sources, target)])
 
     @abstractmethod
-    async def query_cypher(
-        self, cypher: str, params: dict[str, Any] | None = None
-    ) -> list[dict[str, Any]]: ...
+    async def merge_entities_bulk(
+        self, groups: list[tuple[list[str], str]]
+    ) -> dict[str, Any]:
+        """Merge each ``(sources, target)`` group of entity ids.
+
+        Every relationship of a source (including profile edges) is moved to
+        its target — or to the target of a neighbour that is itself merged —
+        keeping its type and properties; edges that would become self-loops
+        are dropped.  Source descriptions, names / aliases and source chunks
+        are folded into the target (:func:`merged_text`,
+        :func:`merged_sources`) and the sources deleted.  Groups
+        whose target does not exist are skipped, as are missing sources.
+
+        Returns ``{"merged": [source ids], "missing": [ids], "edges": n}``.
+        """
+
+    @abstractmethod
+    async def remove_chunk_sources(self, chunk_ids: list[str]) -> dict[str, Any]:
+        """Drop *chunk_ids* from every entity's ``source_chunks``.
+
+        Entity upserts union ``source_chunks`` into the stored list; an
+        entity whose list becomes empty was only backed by the removed
+        chunks and is deleted with its relationships.  Entities without
+        the property (created by hand or before provenance was stored) are
+        left alone.
+
+        Returns ``{"updated": n, "deleted": [entity ids]}``.
+        """
+
+    # Backend-neutral read API used by the API endpoints and the profile
+    # reader.  Entity rows are dicts shaped like :func:`entity_row`; edge
+    # rows carry ``source``, ``target``, ``type``, ``description`` and
+    # ``weight``.  Only edges between two entities are reported.
+
+    @abstractmethod
+    async def get_node_edges(self, node_id: str) -> list[dict[str, Any]]:
+        """Edge rows incident to entity *node_id* (both directions)."""
+
+    @abstractmethod
+    async def edges_among(self, ids: list[str]) -> list[dict[str, Any]]:
+        """Edge rows whose endpoints are both in *ids*."""
+
+    @abstractmethod
+    async def top_entities(
+        self, limit: int, entity_type: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Entity rows with the most relationships, highest degree first."""
+
+    @abstractmethod
+    async def search_entities(
+        self, q: str, entity_type: str | None = None, limit: int = 20
+    ) -> list[dict[str, Any]]:
+        """Entity rows whose name or an alias contains *q* (case-insensitive)."""
+
+    @abstractmethod
+    async def neighborhood(
+        self, entity_id: str, depth: int = 1, limit: int = 50, fanout: int = 50
+    ) -> dict[str, Any] | None:
+        """Bounded BFS around *entity_id* over entity nodes.
+
+        Each level keeps at most *fanout* new nodes (highest degree first)
+        and at most *limit* nodes are returned in all.  Returns ``None`` when
+        the entity does not exist, else ``{"nodes": [...], "edges": [...],
+        "truncated": bool}`` — entity rows with the centre first, and every
+        edge among them.
+        """
+
+    @abstractmethod
+    async def graph_stats(self) -> dict[str, dict[str, int]]:
+        """``{"entities_by_type": {...}, "relations_by_type": {...}}``."""
+
+    @abstractmethod
+    async def get_user_relations(self, user_id: str) -> list[dict[str, Any]]:
+        """Profile edges of *user_id*: ``rel_type``, ``entity``, ``name``,
+        ``confidence``, ``evidence``, ``last_updated`` — ordered by type,
+        then confidence descending."""
+
+    # -- maintenance ---------------------------------------------------------
+
+    async def refresh_derived(self) -> None:  # noqa: B027
+        """Recompute derived data (search text, degrees, …) from the stored graph."""
+
+    async def ensure_derived(self) -> None:  # noqa: B027
+        """Build derived data the store does not have yet (called once by
+        writer processes at start; a no-op where it is always maintained)."""
 
     # -- lifecycle -----------------------------------------------------------
 
@@ -75,3 +392,35 @@ class BaseGraphStore(ABC):
 
     async def finalize(self) -> None:  # noqa: B027
         """Close driver / release resources."""
+
+
+class CypherGraphStore(BaseGraphStore):
+    """A :class:`BaseGraphStore` that also executes arbitrary Cypher.
+
+    Callers holding a plain ``BaseGraphStore`` check ``supports_cypher``
+    before using :meth:`query_cypher` / :meth:`stream_cypher`.
+    """
+
+    supports_cypher = True
+
+    @abstractmethod
+    async def query_cypher(
+        self, cypher: str, params: dict[str, Any] | None = None
+    ) -> list[dict[str, Any]]: ...
+
+    async def stream_cypher(
+        self,
+        cypher: str,
+        params: dict[str, Any] | None = None,
+        *,
+        batch_size: int | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yield the rows of a read-only *cypher* in batches.
+
+        Default: run :meth:`query_cypher` and slice its result; backends
+        that can stream override this to keep only one batch in memory.
+        """
+        rows = await self.query_cypher(cypher, params)
+        size = max(1, batch_size or 1000)
+        for start in range(0, len(rows), size):
+            yield rows[start : start + size]
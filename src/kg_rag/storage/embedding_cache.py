@@ -0,0 +1,201 @@
+"""Two-tier cache for text embeddings.
+
+Entries are keyed by ``(model, normalized text)``; normalisation applies
+NFKC and collapses whitespace, so trivially different spellings of the same
+query share an entry.  The in-memory tier is an LRU bounded by entry count;
+the optional persistent tier is a SQLite table that survives restarts and is
+shared by every process pointing at the same file.  Both tiers honour the
+same TTL (``0`` = entries never expire).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WS_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class EmbeddingCache:
+    """LRU + optional SQLite cache of embedding vectors for one model.
+
+    Notes
+    -----
+    - Vectors are held as float32 arrays and returned as ``list[float]``.
+    - Disk lookups and writes happen in ``asyncio.to_thread``; each opens
+      its own SQLite connection and closes it before returning, so no
+      handle is shared across worker threads.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        *,
+        max_entries: int,
+        ttl_s: float = 0,
+        db_path: str | Path | None = None,
+    ) -> None:
+        self._model = model
+        self._max_entries = max(0, max_entries)
+        self._ttl_s = max(0.0, float(ttl_s))
+        self._db_path = Path(db_path) if db_path else None
+        self._db_ready = False
+        self._memory: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # -- stats ---------------------------------------------------------------
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+    # -- lookup / store ------------------------------------------------------
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return bool(self._ttl_s) and now - stored_at > self._ttl_s
+
+    async def get_many(self, texts: list[str]) -> list[list[float] | None]:
+        """Return cached vectors for *texts* (``None`` where missing)."""
+        now = time.time()
+        keys = [self._key(t) for t in texts]
+        found: dict[str, np.ndarray] = {}
+        for key in set(keys):
+            entry = self._memory.get(key)
+            if entry is None:
+                continue
+            if self._expired(entry[0], now):
+                del self._memory[key]
+                continue
+            self._memory.move_to_end(key)
+            found[key] = entry[1]
+        memory_found = set(found)
+
+        missing = [k for k in set(keys) if k not in found]
+        if missing and self._db_path is not None:
+            from_disk = await asyncio.to_thread(self._db_get, missing, now)
+            for key, (stored_at, vec) in from_disk.items():
+                self._remember(key, stored_at, vec)
+                found[key] = vec
+
+        out: list[list[float] | None] = []
+        for key in keys:
+            vec = found.get(key)
+            if vec is None:
+                self.misses += 1
+                out.append(None)
+            else:
+                if key in memory_found:
+                    self.memory_hits += 1
+                else:
+                    self.disk_hits += 1
+                out.append(vec.tolist())
+        return out
+
+    async def put_many(
+        self, texts: list[str], vectors: list[list[float]]
+    ) -> None:
+        now = time.time()
+        rows = {}
+        for text, vec in zip(texts, vectors):
+            key = self._key(text)
+            arr = np.asarray(vec, dtype=np.float32)
+            self._remember(key, now, arr)
+            rows[key] = arr
+        if rows and self._db_path is not None:
+            await asyncio.to_thread(self._db_put, rows, now)
+
+    def _remember(self, key: str, stored_at: float, vec: np.ndarray) -> None:
+        if not self._max_entries:
+            return
+        self._memory[key] = (stored_at, vec)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+    # -- SQLite tier ---------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._db_ready:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self._db_path)
+        if not self._db_ready:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    stored_at REAL NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                )
+                """
+            )
+            if self._ttl_s:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE stored_at < ?",
+                    (time.time() - self._ttl_s,),
+                )
+            conn.commit()
+            self._db_ready = True
+        return conn
+
+    def _db_get(
+        self, keys: list[str], now: float
+    ) -> dict[str, tuple[float, np.ndarray]]:
+        out: dict[str, tuple[float, np.ndarray]] = {}
+        with closing(self._connect()) as conn:
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                marks = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector, stored_at FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({marks})",
+                    [self._model, *batch],
+                ).fetchall()
+                for key, blob, stored_at in rows:
+                    if not self._expired(stored_at, now):
+                        out[key] = (stored_at, np.frombuffer(blob, dtype=np.float32))
+        return out
+
+    def _db_put(self, rows: dict[str, np.ndarray], now: float) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings "
+                "(model, text_hash, vector, stored_at) VALUES (?, ?, ?, ?)",
+                [
+                    (self._model, key, vec.tobytes(), now)
+                    for key, vec in rows.items()
+                ],
+            )
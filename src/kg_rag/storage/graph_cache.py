@@ -0,0 +1,287 @@
+"""Read-through cache in front of a :class:`BaseGraphStore`.
+
+The knowledge graph changes only during ingest, merges and profile updates,
+while the browsing endpoints and the ``graph_query`` tool read it on every
+request.  :class:`CachedGraphStore` keeps one LRU of node properties,
+adjacency lists, the read API results and read-only Cypher results.
+
+Every entry is tagged with the graph *version* current when its read
+started; write methods bump the version, so entries read before a write are
+never served after it — including reads that were still in flight when the
+write landed.  Writes made by other processes (the CLI ingest / merge
+commands) cannot bump this counter, so entries also expire after ``ttl_s``
+seconds (``0`` = only version invalidation).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from typing import Any
+
+from kg_rag.storage.base import BaseGraphStore, is_read_only
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CachedGraphStore(BaseGraphStore):
+    """Wrap *store* with a version-invalidated LRU of read results.
+
+    Notes
+    -----
+    - Cached rows are returned as shallow copies; nested lists (aliases) are
+      shared, so callers must not mutate them in place.
+    - Lifecycle calls are forwarded to the wrapped store.
+    - ``supports_cypher`` mirrors the wrapped store; :meth:`query_cypher`
+      and :meth:`stream_cypher` are only usable when it is set.
+    """
+
+    def __init__(
+        self, store: BaseGraphStore, *, max_entries: int, ttl_s: float = 0
+    ) -> None:
+        self.store = store
+        self.supports_cypher = store.supports_cypher
+        self._max_entries = max(0, max_entries)
+        self._ttl_s = max(0.0, float(ttl_s))
+        self._entries: OrderedDict[tuple, tuple[int, float, Any]] = OrderedDict()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    # -- stats ---------------------------------------------------------------
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    # -- cache core ----------------------------------------------------------
+
+    def invalidate(self) -> None:
+        """Drop every entry (bumps the version)."""
+        self.version += 1
+        self._entries.clear()
+
+    def _lookup(self, key: tuple) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            version, stored_at, value = entry
+            fresh = not self._ttl_s or time.monotonic() - stored_at <= self._ttl_s
+            if version == self.version and fresh:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return _MISSING
+
+    def _remember(self, key: tuple, version: int, value: Any) -> None:
+        if not self._max_entries or version != self.version:
+            return  # a write landed while this read was in flight
+        self._entries[key] = (version, time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def _cached(self, key: tuple, load) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            version = self.version
+            value = await load()
+            self._remember(key, version, value)
+        return value
+
+    # -- node operations -----------------------------------------------------
+
+    async def has_node(self, node_id: str) -> bool:
+        return await self.get_node(node_id) is not None
+
+    async def get_node(self, node_id: str) -> dict[str, Any] | None:
+        props = await self._cached(
+            ("node", node_id), lambda: self.store.get_node(node_id)
+        )
+        return dict(props) if props is not None else None
+
+    async def upsert_node(self, node_id: str, node_data: dict[str, Any]) -> None:
+        try:
+            await self.store.upsert_node(node_id, node_data)
+        finally:
+            self.invalidate()
+
+    async def upsert_nodes_bulk(
+        self, nodes: list[tuple[str, dict[str, Any]]]
+    ) -> None:
+        try:
+            await self.store.upsert_nodes_bulk(nodes)
+        finally:
+            self.invalidate()
+
+    async def delete_node(self, node_id: str) -> None:
+        try:
+            await self.store.delete_node(node_id)
+        finally:
+            self.invalidate()
+
+    async def delete_nodes_bulk(self, node_ids: list[str]) -> None:
+        try:
+            await self.store.delete_nodes_bulk(node_ids)
+        finally:
+            self.invalidate()
+
+    # -- edge operations -----------------------------------------------------
+
+    async def has_edge(self, source: str, target: str) -> bool:
+        return await self.get_edge(source, target) is not None
+
+    async def get_edge(self, source: str, target: str) -> dict[str, Any] | None:
+        props = await self._cached(
+            ("edge", source, target), lambda: self.store.get_edge(source, target)
+        )
+        return dict(props) if props is not None else None
+
+    async def upsert_edge(
+        self, source: str, target: str, edge_data: dict[str, Any]
+    ) -> None:
+        try:
+            await self.store.upsert_edge(source, target, edge_data)
+        finally:
+            self.invalidate()
+
+    async def upsert_edges_bulk(
+        self, edges: list[tuple[str, str, dict[str, Any]]]
+    ) -> None:
+        try:
+            await self.store.upsert_edges_bulk(edges)
+        finally:
+            self.invalidate()
+
+    async def merge_entities_bulk(
+        self, groups: list[tuple[list[str], str]]
+    ) -> dict[str, Any]:
+        try:
+            return await self.store.merge_entities_bulk(groups)
+        finally:
+            self.invalidate()
+
+    async def remove_chunk_sources(self, chunk_ids: list[str]) -> dict[str, Any]:
+        try:
+            return await self.store.remove_chunk_sources(chunk_ids)
+        finally:
+            self.invalidate()
+
+    # -- query ---------------------------------------------------------------
+
+    async def query_cypher(
+        self, cypher: str, params: dict[str, Any] | None = None
+    ) -> list[dict[str, Any]]:
+        # a (potential) write bypasses the cache and bumps the version
+        if not is_read_only(cypher):
+            try:
+                return await self.store.query_cypher(cypher, params)
+            finally:
+                self.invalidate()
+        key = ("cypher", cypher, json.dumps(params or {}, sort_keys=True, default=str))
+        return await self._cached_rows(
+            key, lambda: self.store.query_cypher(cypher, params)
+        )
+
+    async def stream_cypher(
+        self,
+        cypher: str,
+        params: dict[str, Any] | None = None,
+        *,
+        batch_size: int | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        # bulk scans are not cached; they would only evict hot entries
+        async for batch in self.store.stream_cypher(
+            cypher, params, batch_size=batch_size
+        ):
+            yield batch
+
+    # -- read API ------------------------------------------------------------
+
+    async def _cached_rows(self, key: tuple, load) -> list[dict[str, Any]]:
+        return [dict(r) for r in await self._cached(key, load)]
+
+    async def get_node_edges(self, node_id: str) -> list[dict[str, Any]]:
+        return await self._cached_rows(
+            ("adj", node_id), lambda: self.store.get_node_edges(node_id)
+        )
+
+    async def edges_among(self, ids: list[str]) -> list[dict[str, Any]]:
+        return await self._cached_rows(
+            ("among", *sorted(ids)), lambda: self.store.edges_among(ids)
+        )
+
+    async def top_entities(
+        self, limit: int, entity_type: str | None = None
+    ) -> list[dict[str, Any]]:
+        return await self._cached_rows(
+            ("top", limit, entity_type),
+            lambda: self.store.top_entities(limit, entity_type),
+        )
+
+    async def search_entities(
+        self, q: str, entity_type: str | None = None, limit: int = 20
+    ) -> list[dict[str, Any]]:
+        return await self._cached_rows(
+            ("search", q, entity_type, limit),
+            lambda: self.store.search_entities(q, entity_type, limit),
+        )
+
+    async def neighborhood(
+        self, entity_id: str, depth: int = 1, limit: int = 50, fanout: int = 50
+    ) -> dict[str, Any] | None:
+        hood = await self._cached(
+            ("hood", entity_id, depth, limit, fanout),
+            lambda: self.store.neighborhood(entity_id, depth, limit, fanout),
+        )
+        if hood is None:
+            return None
+        return {
+            "nodes": [dict(r) for r in hood["nodes"]],
+            "edges": [dict(r) for r in hood["edges"]],
+            "truncated": hood["truncated"],
+        }
+
+    async def graph_stats(self) -> dict[str, dict[str, int]]:
+        stats = await self._cached(("stats",), self.store.graph_stats)
+        return {k: dict(v) for k, v in stats.items()}
+
+    async def get_user_relations(self, user_id: str) -> list[dict[str, Any]]:
+        return await self._cached_rows(
+            ("profile", user_id), lambda: self.store.get_user_relations(user_id)
+        )
+
+    # -- maintenance ---------------------------------------------------------
+
+    async def refresh_derived(self) -> None:
+        try:
+            await self.store.refresh_derived()
+        finally:
+            self.invalidate()
+
+    async def ensure_derived(self) -> None:
+        try:
+            await self.store.ensure_derived()
+        finally:
+            self.invalidate()
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def initialize(self) -> None:
+        await self.store.initialize()
+
+    async def finalize(self) -> None:
+        logger.info("Graph cache stats: %s", self.stats())
+        await self.store.finalize()
@@ -0,0 +1,143 @@
+"""Inverted index backing the lexical boost in vector search.
+
+The lexical score of a record is the number of (non-overlapping) occurrences
+of each query keyword in its content — English keywords are matched against
+the lower-cased content, Chinese keywords against the raw content.  Query
+keywords come from ``_EN_TOKEN_RE`` / ``_ZH_TOKEN_RE`` and therefore consist
+of a single script, so every occurrence lies inside one maximal run of that
+script.  We index those runs:
+
+- ``run -> {record_id: count}`` posting lists, and
+- ``bigram -> {run}`` so the runs containing a keyword are found by
+  intersecting a few small sets instead of scanning the vocabulary.
+
+``score(k)`` then sums ``count * run.count(k)`` over the matching postings,
+which equals ``content.count(k)`` exactly, at a cost proportional to the
+number of posting-list hits rather than corpus bytes.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import Counter, defaultdict
+
+_EN_RUN_RE = re.compile(r"[a-z]+")
+_ZH_RUN_RE = re.compile(r"[\u4e00-\u9fff]+")
+
+# Per-keyword run matches are memoised until the vocabulary changes; cap the
+# memo so a stream of distinct queries cannot grow it without bound.
+_MATCH_CACHE_MAX = 4096
+
+
+def _bigrams(text: str) -> set[str]:
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+class _RunIndex:
+    """Posting lists for the maximal runs of one script."""
+
+    def __init__(self, run_re: re.Pattern[str]) -> None:
+        self._run_re = run_re
+        self._postings: dict[str, dict[str, int]] = {}
+        self._grams: dict[str, set[str]] = defaultdict(set)
+        self._doc_runs: dict[str, Counter[str]] = {}
+        self._match_cache: dict[str, list[tuple[str, int]]] = {}
+
+    def add(self, rid: str, text: str) -> None:
+        runs = Counter(self._run_re.findall(text))
+        if not runs:
+            return
+        self._doc_runs[rid] = runs
+        for run, cnt in runs.items():
+            postings = self._postings.get(run)
+            if postings is None:
+                postings = self._postings[run] = {}
+                for g in _bigrams(run):
+                    self._grams[g].add(run)
+                self._match_cache.clear()
+            postings[rid] = cnt
+
+    def remove(self, rid: str) -> None:
+        runs = self._doc_runs.pop(rid, None)
+        if not runs:
+            return
+        for run in runs:
+            postings = self._postings[run]
+            postings.pop(rid, None)
+            if postings:
+                continue
+            del self._postings[run]
+            for g in _bigrams(run):
+                bucket = self._grams[g]
+                bucket.discard(run)
+                if not bucket:
+                    del self._grams[g]
+            self._match_cache.clear()
+
+    def _matching_runs(self, keyword: str) -> list[tuple[str, int]]:
+        cached = self._match_cache.get(keyword)
+        if cached is not None:
+            return cached
+        buckets = [self._grams.get(g) for g in _bigrams(keyword)]
+        if not buckets or any(b is None for b in buckets):
+            matches: list[tuple[str, int]] = []
+        else:
+            buckets.sort(key=len)
+            candidates = buckets[0].intersection(*buckets[1:])
+            matches = [
+                (run, n) for run in candidates if (n := run.count(keyword)) > 0
+            ]
+        if len(self._match_cache) >= _MATCH_CACHE_MAX:
+            self._match_cache.clear()
+        self._match_cache[keyword] = matches
+        return matches
+
+    def accumulate(self, keyword: str, scores: dict[str, int]) -> None:
+        for run, mult in self._matching_runs(keyword):
+            for rid, cnt in self._postings[run].items():
+                scores[rid] = scores.get(rid, 0) + cnt * mult
+
+
+class KeywordIndex:
+    """Incrementally maintained inverted index over record content.
+
+    Safe to share between one writer and concurrent readers: every method
+    holds a short internal mutex, so scoring never observes a half-applied
+    update.
+    """
+
+    def __init__(self) -> None:
+        self._en = _RunIndex(_EN_RUN_RE)
+        self._zh = _RunIndex(_ZH_RUN_RE)
+        self._mutex = threading.Lock()
+
+    def add(self, rid: str, content: str) -> None:
+        """Index *content* under *rid*, replacing any previous entry."""
+        with self._mutex:
+            self._remove(rid)
+            if not content:
+                return
+            self._en.add(rid, content.lower())
+            self._zh.add(rid, content)
+
+    def remove(self, rid: str) -> None:
+        with self._mutex:
+            self._remove(rid)
+
+    def _remove(self, rid: str) -> None:
+        self._en.remove(rid)
+        self._zh.remove(rid)
+
+    def score(self, en: list[str], zh: list[str]) -> dict[str, int]:
+        """Return ``{record_id: keyword_score}`` for records with a hit.
+
+        *en* must already be lower-cased (as produced by ``_extract_keywords``).
+        """
+        scores: dict[str, int] = {}
+        with self._mutex:
+            for k in en:
+                self._en.accumulate(k, scores)
+            for k in zh:
+                self._zh.accumulate(k, scores)
+        return scores
@@ -0,0 +1,533 @@
+"""Embedded in-process graph store.
+
+Nodes are row-indexed: ``(kind, id)`` resolves to a row, and each row keeps
+its incident edge ids in two compact ``array('q')`` lists (outgoing and
+incoming), so neighbour expansion only touches the rows it visits.  Edges
+are ``(source_row, target_row, rel_type)`` triples with a property dict.
+Deleted rows and edges are tombstoned and dropped when a snapshot is saved.
+
+Node and edge semantics follow :class:`Neo4jGraphStore`: entities are keyed
+by ``entity_id`` (typed entities carry their type in ``type``), users by
+``user_id``, profile edges run from a user to an entity, and upserts merge
+properties into the existing node / edge.
+
+Per-type entity / relation counts are kept up to date by every write, as
+is a reverse index from source chunk id to the entities citing it (for
+:meth:`remove_chunk_sources`), and the degree ordering behind :meth:`top_entities` is sorted once after a write
+and then served from memory, so the dashboard reads do not walk the graph.
+
+The whole graph is persisted as one ``<base>.npz`` snapshot (edge triples as
+an int64 array plus a JSON blob of ids and properties), loaded in
+:meth:`initialize` and written in :meth:`finalize`.  The snapshot has a
+single writer: processes that only read (the API, the agent) should not
+write through their own copy.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from kg_rag.config import settings
+from kg_rag.models import PROFILE_REL_TYPES
+from kg_rag.storage.base import (
+    BaseGraphStore,
+    check_merge_groups,
+    entity_row,
+    merged_sources,
+    merged_text,
+    prepare_edge,
+    prepare_node,
+)
+from kg_rag.storage.name_index import NameIndex
+
+logger = logging.getLogger(__name__)
+
+_ENTITY = "Entity"
+_USER = "User"
+
+
+def snapshot_path(base: str | Path) -> Path:
+    return Path(f"{base}.npz")
+
+
+class MemoryGraphStore(BaseGraphStore):
+    """In-memory :class:`BaseGraphStore` persisted to a local snapshot."""
+
+    def __init__(self, persist_path: str | Path | None = None) -> None:
+        self.path = snapshot_path(persist_path or settings.data_dir / "memory_graph")
+        self._clear()
+
+    def _clear(self) -> None:
+        self._keys: list[tuple[str, str] | None] = []
+        self._rows: dict[tuple[str, str], int] = {}
+        self._props: list[dict[str, Any] | None] = []
+        self._out: list[array] = []
+        self._in: list[array] = []
+        self._edges: list[tuple[int, int, str] | None] = []
+        self._edge_props: list[dict[str, Any] | None] = []
+        self._edge_ids: dict[tuple[int, int, str], int] = {}
+        self._names = NameIndex()
+        self._chunk_rows: dict[str, set[int]] = {}
+        self._entity_counts: Counter[str] = Counter()
+        self._relation_counts: Counter[str] = Counter()
+        self._by_degree: dict[str | None, list[int]] = {}
+        self._dirty = False
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def initialize(self) -> None:
+        self.load()
+
+    async def finalize(self) -> None:
+        if self._dirty:
+            self.save()
+
+    def load(self) -> None:
+        """Replace the in-memory graph with the saved snapshot (if any)."""
+        self._clear()
+        path = self.path
+        if not path.exists():
+            logger.info("No graph snapshot at %s, starting empty", path)
+            return
+        with np.load(path) as snap:
+            meta = json.loads(snap["meta"].tobytes().decode("utf-8"))
+            triples = snap["edges"]
+        for kind, node_id, props in meta["nodes"]:
+            row = self._add_row((kind, node_id))
+            self._props[row] = props
+            self._index_names(row)
+            self._index_chunks(row)
+        rel_types = meta["rel_types"]
+        for (a, b, t), props in zip(triples.tolist(), meta["edge_props"]):
+            self._add_edge(a, b, rel_types[t])
+            self._edge_props[-1] = props
+        self._recount()
+        logger.info(
+            "Loaded graph snapshot %s (%d nodes, %d edges)",
+            path, len(self._rows), len(self._edge_ids),
+        )
+
+    def save(self) -> None:
+        """Write a compacted snapshot (atomic replace)."""
+        renumber: dict[int, int] = {}
+        nodes = []
+        for row, key in enumerate(self._keys):
+            if key is not None:
+                renumber[row] = len(nodes)
+                nodes.append([key[0], key[1], self._props[row]])
+        rel_types: dict[str, int] = {}
+        triples = []
+        edge_props = []
+        for edge, props in zip(self._edges, self._edge_props):
+            if edge is None:
+                continue
+            a, b, rel_type = edge
+            t = rel_types.setdefault(rel_type, len(rel_types))
+            triples.append((renumber[a], renumber[b], t))
+            edge_props.append(props)
+        meta = json.dumps(
+            {"nodes": nodes, "rel_types": list(rel_types), "edge_props": edge_props},
+            ensure_ascii=False,
+            default=str,
+        ).encode("utf-8")
+
+        path = self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                edges=np.asarray(triples, dtype=np.int64).reshape(-1, 3),
+                meta=np.frombuffer(meta, dtype=np.uint8),
+            )
+        os.replace(tmp, path)
+        self._dirty = False
+        logger.info(
+            "Saved graph snapshot %s (%d nodes, %d edges)",
+            path, len(nodes), len(triples),
+        )
+
+    # -- row / edge primitives -----------------------------------------------
+
+    def _changed(self) -> None:
+        self._by_degree.clear()
+        self._dirty = True
+
+    def _entity_type(self, row: int) -> str:
+        return self._props[row].get("type") or "Unknown"
+
+    def _count_edge(self, eid: int, delta: int) -> None:
+        a, b, rel_type = self._edges[eid]
+        if self._is_entity(a) and self._is_entity(b):
+            self._relation_counts[rel_type] += delta
+
+    def _recount(self) -> None:
+        self._entity_counts = Counter(
+            self._entity_type(row) for row in self._entity_rows()
+        )
+        self._relation_counts = Counter()
+        for eid, edge in enumerate(self._edges):
+            if edge is not None:
+                self._count_edge(eid, 1)
+        self._by_degree.clear()
+
+    def _add_row(self, key: tuple[str, str]) -> int:
+        row = len(self._keys)
+        self._keys.append(key)
+        self._rows[key] = row
+        self._props.append({})
+        self._out.append(array("q"))
+        self._in.append(array("q"))
+        return row
+
+    def _add_edge(self, a: int, b: int, rel_type: str) -> int:
+        eid = len(self._edges)
+        self._edges.append((a, b, rel_type))
+        self._edge_props.append({})
+        self._edge_ids[(a, b, rel_type)] = eid
+        self._out[a].append(eid)
+        self._in[b].append(eid)
+        return eid
+
+    def _index_names(self, row: int) -> None:
+        if self._keys[row][0] == _ENTITY:
+            props = self._props[row]
+            self._names.add(row, props.get("name"), props.get("aliases") or [])
+
+    def _index_chunks(self, row: int) -> None:
+        for chunk_id in self._props[row].get("source_chunks") or ():
+            self._chunk_rows.setdefault(chunk_id, set()).add(row)
+
+    def _unindex_chunks(self, row: int) -> None:
+        for chunk_id in self._props[row].get("source_chunks") or ():
+            rows = self._chunk_rows.get(chunk_id)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._chunk_rows[chunk_id]
+
+    def _entity(self, node_id: str) -> int | None:
+        return self._rows.get((_ENTITY, node_id))
+
+    def _is_entity(self, row: int) -> bool:
+        key = self._keys[row]
+        return key is not None and key[0] == _ENTITY
+
+    def _incident(self, row: int) -> list[int]:
+        """Edge ids touching *row*, each once (self-loops included)."""
+        return list(dict.fromkeys([*self._out[row], *self._in[row]]))
+
+    def _edge_row(self, eid: int) -> dict[str, Any]:
+        a, b, rel_type = self._edges[eid]
+        props = self._edge_props[eid]
+        weight = props.get("weight")
+        return {
+            "source": self._keys[a][1],
+            "target": self._keys[b][1],
+            "type": rel_type,
+            "description": props.get("description") or "",
+            "weight": 1.0 if weight is None else weight,
+        }
+
+    def _entity_rows(self, entity_type: str | None = None):
+        for row, key in enumerate(self._keys):
+            if key is None or key[0] != _ENTITY:
+                continue
+            if entity_type and self._props[row].get("type") != entity_type:
+                continue
+            yield row
+
+    def _degree(self, row: int) -> int:
+        return len(self._out[row]) + len(self._in[row])
+
+    # -- node operations -----------------------------------------------------
+
+    async def has_node(self, node_id: str) -> bool:
+        return self._entity(node_id) is not None
+
+    async def get_node(self, node_id: str) -> dict[str, Any] | None:
+        row = self._entity(node_id)
+        return dict(self._props[row]) if row is not None else None
+
+    async def upsert_node(self, node_id: str, node_data: dict[str, Any]) -> None:
+        label, props = prepare_node(node_id, node_data)
+        key = (_USER if label == _USER else _ENTITY, node_id)
+        row = self._rows.get(key)
+        if row is None:
+            row = self._add_row(key)
+        elif key[0] == _ENTITY:
+            self._entity_counts[self._entity_type(row)] -= 1
+        old_chunks = self._props[row].get("source_chunks")
+        self._props[row].update(props)
+        if old_chunks and props.get("source_chunks") is not None:
+            self._props[row]["source_chunks"] = merged_sources(
+                {"source_chunks": old_chunks}, [props]
+            )
+        if key[0] == _ENTITY:
+            self._entity_counts[self._entity_type(row)] += 1
+            self._index_chunks(row)
+        self._index_names(row)
+        self._changed()
+
+    async def delete_node(self, node_id: str) -> None:
+        row = self._rows.pop((_ENTITY, node_id), None)
+        if row is None:
+            return
+        self._entity_counts[self._entity_type(row)] -= 1
+        for eid in self._incident(row):
+            self._count_edge(eid, -1)
+            a, b, rel_type = self._edges[eid]
+            if a != row:
+                self._out[a].remove(eid)
+            if b != row:
+                self._in[b].remove(eid)
+            del self._edge_ids[(a, b, rel_type)]
+            self._edges[eid] = None
+            self._edge_props[eid] = None
+        self._names.remove(row)
+        self._unindex_chunks(row)
+        self._keys[row] = None
+        self._props[row] = None
+        self._out[row] = array("q")
+        self._in[row] = array("q")
+        self._changed()
+
+    # -- edge operations -----------------------------------------------------
+
+    def _first_edge(self, source: str, target: str) -> int | None:
+        a, b = self._entity(source), self._entity(target)
+        if a is None or b is None:
+            return None
+        for eid in self._out[a]:
+            if self._edges[eid][1] == b:
+                return eid
+        return None
+
+    async def has_edge(self, source: str, target: str) -> bool:
+        return self._first_edge(source, target) is not None
+
+    async def get_edge(self, source: str, target: str) -> dict[str, Any] | None:
+        eid = self._first_edge(source, target)
+        if eid is None:
+            return None
+        return {**self._edge_props[eid], "type": self._edges[eid][2]}
+
+    async def upsert_edge(
+        self, source: str, target: str, edge_data: dict[str, Any]
+    ) -> None:
+        rel_type, props = prepare_edge(edge_data)
+        src_kind = _USER if rel_type in PROFILE_REL_TYPES else _ENTITY
+        a = self._rows.get((src_kind, source))
+        b = self._entity(target)
+        if a is None or b is None:
+            logger.warning(
+                "upsert_edge(%s, %s): endpoint(s) do not exist", source, target
+            )
+            return
+        eid = self._edge_ids.get((a, b, rel_type))
+        if eid is None:
+            eid = self._add_edge(a, b, rel_type)
+            self._count_edge(eid, 1)
+        self._edge_props[eid].update(props)
+        self._changed()
+
+    async def merge_entities_bulk(
+        self, groups: list[tuple[list[str], str]]
+    ) -> dict[str, Any]:
+        final: dict[str, str] = {}
+        missing: list[str] = []
+        plan = []
+        for sources, target in check_merge_groups(groups):
+            if self._entity(target) is None:
+                missing.append(target)
+                continue
+            present = [s for s in sources if self._entity(s) is not None]
+            missing += [s for s in sources if self._entity(s) is None]
+            final.update((s, target) for s in present)
+            plan.append((present, target))
+
+        edges = 0
+        for sources, target in plan:
+            for src in sources:
+                row = self._entity(src)
+                for eid in self._incident(row):
+                    a, b, rel_type = self._edges[eid]
+                    ends = []
+                    for end in (a, b):
+                        kind, node_id = self._keys[end]
+                        ends.append(final.get(node_id, node_id) if kind == _ENTITY else node_id)
+                    if ends[0] == ends[1]:
+                        continue
+                    await self.upsert_edge(
+                        *ends, {**self._edge_props[eid], "type": rel_type}
+                    )
+                    edges += 1
+            t = self._entity(target)
+            description, aliases = merged_text(
+                self._props[t], [self._props[self._entity(s)] for s in sources]
+            )
+            chunks = merged_sources(
+                self._props[t], [self._props[self._entity(s)] for s in sources]
+            )
+            self._props[t].update(description=description, aliases=aliases)
+            if chunks is not None:
+                self._props[t]["source_chunks"] = chunks
+            self._index_names(t)
+            self._index_chunks(t)
+            for src in sources:
+                await self.delete_node(src)
+        return {"merged": list(final), "missing": missing, "edges": edges}
+
+    async def remove_chunk_sources(self, chunk_ids: list[str]) -> dict[str, Any]:
+        drop = set(chunk_ids)
+        updated = 0
+        deleted: list[str] = []
+        rows: set[int] = set()
+        for chunk_id in drop:
+            rows |= self._chunk_rows.pop(chunk_id, set())
+        for row in sorted(rows):
+            props = self._props[row]
+            chunks = props.get("source_chunks")
+            if not chunks or drop.isdisjoint(chunks):
+                continue
+            props["source_chunks"] = [c for c in chunks if c not in drop]
+            if props["source_chunks"]:
+                updated += 1
+            else:
+                deleted.append(props["entity_id"])
+        for node_id in deleted:
+            await self.delete_node(node_id)
+        if updated or deleted:
+            self._changed()
+        return {"updated": updated, "deleted": deleted}
+
+    async def refresh_derived(self) -> None:
+        self._names = NameIndex()
+        self._chunk_rows = {}
+        for row in self._entity_rows():
+            self._index_names(row)
+            self._index_chunks(row)
+        self._recount()
+
+    # -- read API ------------------------------------------------------------
+
+    async def get_node_edges(self, node_id: str) -> list[dict[str, Any]]:
+        row = self._entity(node_id)
+        if row is None:
+            return []
+        return [
+            self._edge_row(eid)
+            for eid in self._incident(row)
+            if self._is_entity(self._edges[eid][0]) and self._is_entity(self._edges[eid][1])
+        ]
+
+    def _edges_among(self, rows: set[int]) -> list[dict[str, Any]]:
+        return [
+            self._edge_row(eid)
+            for row in rows
+            for eid in self._out[row]
+            if self._edges[eid][1] in rows
+        ]
+
+    async def edges_among(self, ids: list[str]) -> list[dict[str, Any]]:
+        return self._edges_among({r for r in map(self._entity, ids) if r is not None})
+
+    async def top_entities(
+        self, limit: int, entity_type: str | None = None
+    ) -> list[dict[str, Any]]:
+        order = self._by_degree.get(entity_type)
+        if order is None:
+            order = sorted(
+                self._entity_rows(entity_type), key=self._degree, reverse=True
+            )
+            self._by_degree[entity_type] = order
+        return [entity_row(self._props[row]) for row in order[:limit]]
+
+    async def search_entities(
+        self, q: str, entity_type: str | None = None, limit: int = 20
+    ) -> list[dict[str, Any]]:
+        def accept(row: int) -> bool:
+            return not entity_type or self._props[row].get("type") == entity_type
+
+        rows = self._names.search(q, limit, accept)
+        return [entity_row(self._props[row]) for row in rows]
+
+    async def neighborhood(
+        self, entity_id: str, depth: int = 1, limit: int = 50, fanout: int = 50
+    ) -> dict[str, Any] | None:
+        start = self._entity(entity_id)
+        if start is None:
+            return None
+        seen = {start}
+        frontier = [start]
+        found: list[int] = []
+        truncated = False
+        for _ in range(max(1, depth)):
+            cands: dict[int, None] = {}
+            for row in frontier:
+                for eid in self._incident(row):
+                    a, b, _ = self._edges[eid]
+                    other = b if a == row else a
+                    if other not in seen and self._is_entity(other):
+                        cands[other] = None
+            level = sorted(cands, key=self._degree, reverse=True)
+            if len(level) > fanout:
+                level = level[:fanout]
+                truncated = True
+            seen.update(level)
+            found += level
+            frontier = level
+            if not frontier:
+                break
+        if len(found) > limit:
+            found = found[:limit]
+            truncated = True
+        rows = [start, *found]
+        return {
+            "nodes": [entity_row(self._props[row]) for row in rows],
+            "edges": self._edges_among(set(rows)),
+            "truncated": truncated,
+        }
+
+    async def graph_stats(self) -> dict[str, dict[str, int]]:
+        return {
+            "entities_by_type": {t: c for t, c in self._entity_counts.items() if c > 0},
+            "relations_by_type": {t: c for t, c in self._relation_counts.items() if c > 0},
+        }
+
+    async def get_user_relations(self, user_id: str) -> list[dict[str, Any]]:
+        row = self._rows.get((_USER, user_id))
+        if row is None:
+            return []
+        out = []
+        for eid in self._out[row]:
+            _, b, rel_type = self._edges[eid]
+            props = self._edge_props[eid]
+            target = self._props[b]
+            out.append(
+                {
+                    "rel_type": rel_type,
+                    "entity": target.get("entity_id"),
+                    "name": target.get("name"),
+                    "confidence": props.get("confidence"),
+                    "evidence": props.get("evidence"),
+                    "last_updated": props.get("last_updated"),
+                }
+            )
+        # Cypher's ``ORDER BY rel_type, confidence DESC`` puts nulls first
+        out.sort(
+            key=lambda r: (
+                r["rel_type"],
+                r["confidence"] is not None,
+                -(r["confidence"] or 0),
+            )
+        )
+        return out
@@ -0,0 +1,147 @@
+"""Per-field row indexes for metadata-filtered vector search.
+
+A filter is a mapping ``{field: value}`` or ``{field: [value, …]}``: every
+field must match (AND), a list means "any of" (``IN``).  Each filtered field
+is resolved through a :class:`FieldIndex` — ``value -> sorted row array`` —
+so the matching rows are found by a few dictionary lookups and array unions
+instead of a scan over every record, and the similarity matmul then runs on
+just that sub-matrix.  Only hashable (scalar) metadata values are indexed.
+
+Indexes are immutable: writers derive the next one with
+:meth:`FieldIndex.updated` / :meth:`FieldIndex.remapped`, which share every
+untouched row array, so a published index never changes under a reader.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from typing import Any
+
+import numpy as np
+
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+#: Stands for "the record has no such field" in :meth:`FieldIndex.updated`.
+MISSING: Any = object()
+
+
+def _indexable(value: Any) -> bool:
+    if value is MISSING:
+        return False
+    try:
+        hash(value)
+    except TypeError:  # unhashable (list/dict) values are not indexed
+        return False
+    return True
+
+
+class FieldIndex:
+    """Sorted row positions for each value of one metadata field."""
+
+    def __init__(self, rows_by_value: dict[Any, np.ndarray]) -> None:
+        self._rows = rows_by_value
+
+    @classmethod
+    def build(cls, data: list[dict[str, Any]], field: str) -> FieldIndex:
+        buckets: dict[Any, list[int]] = defaultdict(list)
+        for i, rec in enumerate(data):
+            value = rec.get(field, MISSING)
+            if _indexable(value):
+                buckets[value].append(i)
+        return cls({v: np.asarray(r, dtype=np.int64) for v, r in buckets.items()})
+
+    def updated(self, changes: Iterable[tuple[int, Any, Any]]) -> FieldIndex:
+        """A new index with each ``(row, old, new)`` moved from *old* to *new*.
+
+        *old* / *new* is :data:`MISSING` when the record lacks the field;
+        each row appears at most once in *changes*.
+        """
+        drop: dict[Any, list[int]] = defaultdict(list)
+        add: dict[Any, list[int]] = defaultdict(list)
+        for row, old, new in changes:
+            if _indexable(old):
+                drop[old].append(row)
+            if _indexable(new):
+                add[new].append(row)
+        rows = dict(self._rows)
+        for v in drop.keys() | add.keys():
+            current = rows.get(v, _EMPTY)
+            if v in drop:
+                current = np.setdiff1d(current, drop[v], assume_unique=True)
+            if v in add:
+                current = np.union1d(current, np.asarray(add[v], dtype=np.int64))
+            if len(current):
+                rows[v] = current
+            else:
+                rows.pop(v, None)
+        return FieldIndex(rows)
+
+    def remapped(self, mapping: np.ndarray) -> FieldIndex:
+        """A new index renumbered by *mapping* (old row -> new row, ``-1`` = dropped).
+
+        *mapping* must be increasing over the kept rows, so every row array
+        stays sorted.
+        """
+        rows: dict[Any, np.ndarray] = {}
+        for v, r in self._rows.items():
+            moved = mapping[r]
+            moved = moved[moved >= 0]
+            if len(moved):
+                rows[v] = moved
+        return FieldIndex(rows)
+
+    def rows(self, wanted: Any) -> np.ndarray:
+        values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+        parts = []
+        for v in values:
+            try:
+                hit = self._rows.get(v)
+            except TypeError:
+                continue
+            if hit is not None:
+                parts.append(hit)
+        if not parts:
+            return _EMPTY
+        if len(parts) == 1:
+            return parts[0]
+        return np.unique(np.concatenate(parts))
+
+
+def build_field_indexes(
+    data: Iterable[dict[str, Any]], *, skip: frozenset[str] = frozenset()
+) -> dict[str, FieldIndex]:
+    """:class:`FieldIndex` for every field of *data* not in *skip*, in one pass."""
+    buckets: dict[str, dict[Any, list[int]]] = defaultdict(lambda: defaultdict(list))
+    for i, rec in enumerate(data):
+        for field, value in rec.items():
+            if field in skip or not _indexable(value):
+                continue
+            buckets[field][value].append(i)
+    return {
+        field: FieldIndex({v: np.asarray(r, dtype=np.int64) for v, r in values.items()})
+        for field, values in buckets.items()
+    }
+
+
+def filter_key(where: dict[str, Any] | None) -> str | None:
+    """Canonical string for *where*, used to group identical filters."""
+    if not where:
+        return None
+    return json.dumps(where, sort_keys=True, default=str)
+
+
+def select_rows(
+    where: dict[str, Any], field_index: Callable[[str], FieldIndex]
+) -> np.ndarray:
+    """Sorted rows matching every predicate in *where*."""
+    selected: np.ndarray | None = None
+    for field, wanted in where.items():
+        rows = field_index(field).rows(wanted)
+        selected = rows if selected is None else np.intersect1d(
+            selected, rows, assume_unique=True
+        )
+        if len(selected) == 0:
+            break
+    return _EMPTY if selected is None else selected
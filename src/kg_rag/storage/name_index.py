@@ -0,0 +1,134 @@
+"""In-process substring index over entity names and aliases.
+
+Every name is normalised (NFKC, collapsed whitespace, casefolded) and its
+1-, 2- and 3-character grams are posted to the rows that carry it.  A query
+intersects the postings of its own grams — all trigrams, or its single
+uni/bigram when shorter — and only the surviving candidates are checked with
+a real substring test, so lookups touch a handful of rows instead of the
+whole graph.  Matches are ranked exact name, exact alias, name prefix, alias
+prefix, then any substring; ties go to the shorter name.
+
+Leading grams are also posted under a ``^`` marker.  Exact and prefix
+matches are collected from those postings first, and the substring pass only
+runs when they do not fill the limit — which keeps one- and two-letter
+queries (typed first in a search box) from ranking half the graph.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+
+from kg_rag.storage.embedding_cache import normalize_text
+
+_GRAM = 3
+
+
+def normalize_name(text: str) -> str:
+    return normalize_text(text).casefold()
+
+
+def _grams(text: str, n: int) -> set[str]:
+    return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+
+class NameIndex:
+    """Map normalised names / aliases to integer row keys."""
+
+    def __init__(self) -> None:
+        self._names: dict[int, tuple[str, list[str]]] = {}
+        self._postings: dict[str, set[int]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _all_grams(self, row: int) -> set[str]:
+        name, aliases = self._names[row]
+        out: set[str] = set()
+        for text in (name, *aliases):
+            for n in range(1, _GRAM + 1):
+                out |= _grams(text, n)
+                if len(text) >= n:
+                    out.add("^" + text[:n])
+        return out
+
+    def add(self, row: int, name: str | None, aliases: Iterable[str] = ()) -> None:
+        """Index *row* under *name* and *aliases* (replacing earlier names)."""
+        self.remove(row)
+        self._names[row] = (
+            normalize_name(name or ""),
+            [normalize_name(str(a)) for a in aliases if a],
+        )
+        for gram in self._all_grams(row):
+            self._postings[gram].add(row)
+
+    def remove(self, row: int) -> None:
+        if row not in self._names:
+            return
+        for gram in self._all_grams(row):
+            rows = self._postings[gram]
+            rows.discard(row)
+            if not rows:
+                del self._postings[gram]
+        del self._names[row]
+
+    def _candidates(self, needle: str) -> set[int]:
+        n = min(_GRAM, len(needle))
+        postings = sorted(
+            (self._postings.get(g, set()) for g in _grams(needle, n)), key=len
+        )
+        if not postings:
+            return set()
+        out = set(postings[0])
+        for rows in postings[1:]:
+            out &= rows
+            if not out:
+                break
+        return out
+
+    def _rank(self, row: int, needle: str) -> tuple[int, int, str] | None:
+        name, aliases = self._names[row]
+        if name == needle:
+            return (0, len(name), name)
+        if needle in aliases:
+            return (1, len(name), name)
+        if name.startswith(needle):
+            return (2, len(name), name)
+        if any(a.startswith(needle) for a in aliases):
+            return (3, len(name), name)
+        if needle in name or any(needle in a for a in aliases):
+            return (4, len(name), name)
+        return None
+
+    def search(
+        self,
+        q: str,
+        limit: int,
+        accept: Callable[[int], bool] | None = None,
+    ) -> list[int]:
+        """Best *limit* rows whose name or an alias contains *q*."""
+        needle = normalize_name(q)
+        if not needle:
+            return []
+        prefixed = self._postings.get("^" + needle[:_GRAM], set())
+        ranked = self._ranked(prefixed, needle, accept)
+        if len(ranked) < limit:
+            rest = self._candidates(needle) - prefixed
+            ranked += self._ranked(rest, needle, accept)
+        return [row for _, row in heapq.nsmallest(limit, ranked)]
+
+    def _ranked(
+        self,
+        rows: set[int],
+        needle: str,
+        accept: Callable[[int], bool] | None,
+    ) -> list[tuple[tuple[int, int, str], int]]:
+        out = []
+        for row in rows:
+            if accept is not None and not accept(row):
+                continue
+            rank = self._rank(row, needle)
+            if rank is not None:
+                out.append((rank, row))
+        return out
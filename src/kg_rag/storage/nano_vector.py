@@ -1,21 +1,51 @@
-"""NanoVectorDB-backed vector store implementation."""
+"""Vector store implementation backed by a memory-mapped float32 matrix.
+
+The on-disk layout is described in :mod:`kg_rag.storage.vector_file`; legacy
+NanoVectorDB JSON files are migrated on first load.
+"""
 
 from __future__ import annotations
 
 import asyncio
+import copy
+import itertools
 import logging
 import re
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
 import numpy as np
 from langchain_openai import OpenAIEmbeddings
-from nano_vectordb import NanoVectorDB
 
 from kg_rag.config import settings
+from kg_rag.storage.ann import IVFIndex
 from kg_rag.storage.base import BaseVectorStore
+from kg_rag.storage.embedding_cache import EmbeddingCache
+from kg_rag.storage.keyword_index import KeywordIndex
+from kg_rag.storage.metadata_index import (
+    MISSING,
+    FieldIndex,
+    build_field_indexes,
+    filter_key,
+    select_rows,
+)
+from kg_rag.storage.quantize import QUANTIZATION_MODES, QuantizedMatrix
+from kg_rag.storage.vector_file import (
+    load_vector_file,
+    matrix_path,
+    normalize_rows,
+    save_vector_file,
+)
+from kg_rag.storage.vector_wal import VectorWAL
 
 logger = logging.getLogger(__name__)
 
+# Record keys that are not metadata: filtering on them scans the snapshot.
+_UNINDEXED_FIELDS = frozenset({"__id__", "content"})
+_NO_ROWS = FieldIndex({})
+
 _EN_TOKEN_RE = re.compile(r"[A-Za-z]{2,16}")
 _ZH_TOKEN_RE = re.compile(r"[\u4e00-\u9fff]{3,16}")
 
@@ -63,6 +93,7 @@ def _extract_keywords(query: str, *, max_each: int = 8) -> tuple[list[str], list
 
 
 def _keyword_score(content: str, en: list[str], zh: list[str]) -> int:
+    """Reference lexical score; ``KeywordIndex.score`` reproduces it exactly."""
     if not content or (not en and not zh):
         return 0
     c_lower = content.lower()
@@ -74,62 +105,95 @@ def _keyword_score(content: str, en: list[str], zh: list[str]) -> int:
     return score
 
 
+def _top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the *k* largest *scores*, best first (O(n + k log k))."""
+    if k >= len(scores):
+        return np.argsort(scores)[::-1]
+    part = np.argpartition(scores, -k)[-k:]
+    return part[np.argsort(scores[part])[::-1]]
+
+
 def _query_with_lexical_boost(
-    db: NanoVectorDB,
+    data: list[dict[str, Any]],
+    mat: np.ndarray,
     qvec: np.ndarray,
     *,
     top_k: int,
-    en_keywords: list[str],
-    zh_keywords: list[str],
+    keyword_scores: dict[int, int] | None,
+    candidate_rows: np.ndarray | None = None,
+    scores: np.ndarray | None = None,
 ) -> list[dict[str, Any]]:
-    """Query NanoVectorDB and re-rank with a deterministic lexical signal.
+    """Score *mat* against *qvec* and re-rank with a deterministic lexical signal.
 
     This keeps the system agentic (no forced routing), but makes vector_search
     more reliable for acronym-heavy queries where exact matches are expected.
+    *keyword_scores* maps row index to lexical score for rows with a hit, or
+    is ``None`` when the query carries no keywords.  *candidate_rows* (sorted
+    row positions, e.g. from an ANN probe) restricts the vector scan; keyword
+    hits are always scored exactly.  *scores* may carry the precomputed scan
+    (``mat[candidate_rows] @ normalized qvec``, or the full scan without
+    *candidate_rows*); it is recomputed if keyword hits widen the rows.
     """
-    storage = db._NanoVectorDB__storage  # noqa: SLF001
-    data = storage.get("data", [])
-    mat = storage.get("matrix")
     if not data or mat is None or len(data) == 0:
         return []
 
-    # Cosine similarity: stored vectors are normalized in nano-vectordb pre_process.
-    denom = float(np.linalg.norm(qvec)) or 1.0
-    q = (qvec / denom).astype(np.float32, copy=False)
-    scores = mat @ q
-
     n = len(data)
     k = max(0, min(int(top_k), n))
     if k == 0:
         return []
 
-    order_by_score = np.argsort(scores)[::-1]
+    # Cosine similarity: stored vectors are normalized on upsert.
+    denom = float(np.linalg.norm(qvec)) or 1.0
+    q = (qvec / denom).astype(np.float32, copy=False)
+
+    hit_idxs: list[int] = []
+    if keyword_scores:
+        hit_idxs = sorted(i for i, s in keyword_scores.items() if s > 0)
+
+    if candidate_rows is None:
+        rows = None
+        if scores is None:
+            scores = mat @ q
+    else:
+        rows = candidate_rows
+        if hit_idxs:
+            merged = np.union1d(rows, np.asarray(hit_idxs, dtype=np.int64))
+            if len(merged) != len(rows):
+                rows, scores = merged, None
+        if scores is None:
+            scores = np.asarray(mat[rows], dtype=np.float32) @ q
+
+    def _row(pos: int) -> int:
+        return pos if rows is None else int(rows[pos])
+
+    def _score(i: int) -> float:
+        if rows is None:
+            return float(scores[i])
+        return float(scores[np.searchsorted(rows, i)])
 
-    keyword_scores: list[int] | None = None
     selected: list[int] = []
     seen: set[int] = set()
+    row_scores: dict[int, float] = {}
 
-    if en_keywords or zh_keywords:
-        keyword_scores = [
-            _keyword_score(rec.get("content", ""), en_keywords, zh_keywords)
-            for rec in data
-        ]
-        hit_idxs = [i for i, s in enumerate(keyword_scores) if s > 0]
-        if hit_idxs:
-            hit_idxs.sort(
-                key=lambda i: (keyword_scores[i], float(scores[i])), reverse=True
-            )
-            for i in hit_idxs:
-                selected.append(i)
-                seen.add(i)
-                if len(selected) >= k:
-                    break
+    if hit_idxs:
+        for i in hit_idxs:
+            row_scores[i] = _score(i)
+        hit_idxs.sort(
+            key=lambda i: (keyword_scores[i], row_scores[i]), reverse=True
+        )
+        for i in hit_idxs:
+            selected.append(i)
+            seen.add(i)
+            if len(selected) >= k:
+                break
 
     if len(selected) < k:
-        for idx in order_by_score:
-            i = int(idx)
+        # At most k rows are already taken, so 2k candidates always suffice.
+        for pos in _top_indices(scores, min(len(scores), k + len(selected))):
+            i = _row(int(pos))
             if i in seen:
                 continue
+            row_scores[i] = float(scores[pos])
             selected.append(i)
             if len(selected) >= k:
                 break
@@ -141,11 +205,11 @@ def _query_with_lexical_boost(
         content = rec.get("content", "")
         meta = {k: v for k, v in rec.items() if k not in ("__id__", "content")}
         if keyword_scores is not None:
-            meta["keyword_score"] = int(keyword_scores[i])
+            meta["keyword_score"] = int(keyword_scores.get(i, 0))
         results.append(
             {
                 "id": rid,
-                "distance": float(scores[i]),
+                "distance": row_scores[i],
                 "content": content,
                 "metadata": meta,
             }
@@ -154,23 +218,272 @@ def _query_with_lexical_boost(
     return results
 
 
+def _check_filter(where: Any) -> None:
+    if where is not None and not isinstance(where, dict):
+        raise TypeError(f"filter must be a dict, got {type(where).__name__}")
+
+
+class _QueryBatcher:
+    """Coalesce concurrent single queries into one batched search.
+
+    The first query to arrive opens a *window*; every query submitted before
+    it closes (or until *max_batch* are pending) is handed to *run* together.
+    """
+
+    def __init__(self, run, *, window_s: float, max_batch: int) -> None:
+        self._run = run
+        self._window_s = window_s
+        self._max_batch = max(1, max_batch)
+        self._pending: list[tuple[tuple, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        # the loop only keeps weak references to tasks
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        query: str,
+        top_k: int,
+        embedding: list[float] | None,
+        where: dict[str, Any] | None,
+    ) -> list[dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append(((query, top_k, embedding, where), fut))
+        if len(self._pending) >= self._max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window_s, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        """Fail queries still waiting for their window and cancel the
+        batches in flight."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        _fail(batch, RuntimeError("vector store closed"))
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _dispatch(self, batch) -> None:
+        queries, top_ks, embeddings, wheres = (
+            list(col) for col in zip(*(args for args, _ in batch))
+        )
+        try:
+            results = await self._run(queries, top_ks, embeddings, wheres)
+        except asyncio.CancelledError:
+            _fail(batch, RuntimeError("vector store closed"))
+            raise
+        except Exception as exc:
+            _fail(batch, exc)
+            return
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+
+def _fail(batch, exc: BaseException) -> None:
+    for _, fut in batch:
+        if not fut.done():
+            fut.set_exception(exc)
+
+
+class _RowView(Sequence):
+    """The first *n* records of the writer's list.
+
+    The writer appends to its list in place and copies it before changing
+    any existing record, so the first *n* stay fixed.
+    """
+
+    __slots__ = ("_rows", "_n")
+
+    def __init__(self, rows: list[dict[str, Any]], n: int) -> None:
+        self._rows = rows
+        self._n = n
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._rows[: self._n][i]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        return self._rows[i]
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return itertools.islice(self._rows, self._n)
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """Consistent view of the store that queries read without locking.
+
+    Publishing is O(1): a snapshot shares row storage with the writer and
+    only fixes its length.  *data* is a :class:`_RowView` of the writer's
+    record list; *matrix*, *ann* and *codes* are views whose rows the writer
+    never changes (it appends past them and copies before overwriting).
+    *index* is shared with the writer, which only adds ids for rows past
+    ``len(data)`` (deletes publish a new dict), so lookups must ignore rows
+    outside the snapshot.  *fields* holds a :class:`FieldIndex` per metadata
+    field; writers replace the dict and its indexes rather than modify them.
+    """
+
+    data: Sequence[dict[str, Any]]
+    matrix: np.ndarray
+    index: dict[str, int]
+    ann: IVFIndex | None
+    codes: QuantizedMatrix | None
+    fields: dict[str, FieldIndex]
+
+
+@dataclass(frozen=True)
+class _PreparedUpsert:
+    """Embedded records from :meth:`NanoVectorStore.prepare_upsert`."""
+
+    records: list[dict[str, Any]]
+    vectors: np.ndarray
+    counts: dict[str, int]
+    embedded: int
+
+
 class NanoVectorStore(BaseVectorStore):
-    """Thin wrapper around NanoVectorDB with OpenAI-compatible embeddings."""
+    """Memory-mapped vector store with OpenAI-compatible embeddings.
+
+    *persist_path* is the base path of the store files (``<base>.npy`` and
+    ``<base>.meta.json``); a trailing ``.json`` is accepted for backward
+    compatibility and points at the legacy NanoVectorDB file to migrate.
+
+    Below ``settings.vector_ann_min_size`` records every query is an exact
+    scan; above it an IVF index (persisted as ``<base>.ivf.npz``) narrows
+    the scan to ``settings.vector_ann_nprobe`` lists.  With
+    ``settings.vector_quantization`` set, the scan runs over float16/int8
+    codes (``<base>.<mode>.npy``) and only a shortlist is re-scored against
+    the memory-mapped float32 matrix.
+
+    Writes are appended to ``<base>.wal`` (see :mod:`kg_rag.storage.vector_wal`)
+    and applied in memory; the base files are rewritten only when the log
+    grows past ``settings.vector_wal_compact_mb`` or on :meth:`finalize`.
+
+    Queries run on an immutable :class:`_Snapshot` and take no lock, so
+    concurrent searches proceed in parallel (BLAS releases the GIL).  Writers
+    serialize on ``_lock``, update their own copy-on-write state and publish
+    a new snapshot with a single attribute assignment.
+
+    :meth:`query_many` embeds all queries in one request and scores them with
+    a single ``(Q x D) @ (D x N)`` matmul; concurrent :meth:`query` calls
+    landing within ``settings.vector_query_batch_window_ms`` are coalesced
+    into such a batch automatically.
+
+    ``filter={"doc_id": "bfs"}`` / ``filter={"doc_id": ["bfs", "dfs"]}``
+    restricts a query to records whose metadata match (see
+    :mod:`kg_rag.storage.metadata_index`); the scan then covers only the
+    matching rows.
+
+    Embeddings (queries and documents alike) go through an
+    :class:`~kg_rag.storage.embedding_cache.EmbeddingCache`; its counters are
+    available as ``store.embedding_cache.stats()``.
+    """
 
     def __init__(self, persist_path: str | None = None) -> None:
-        self._persist_path = persist_path or str(
-            settings.data_dir / "nano_vector.json"
-        )
+        base = Path(persist_path or settings.data_dir / "nano_vector")
+        if base.suffix == ".json":
+            base = base.with_suffix("")
+        self._persist_path = str(base)
+        self._embedding_dim = settings.embedding_dim
         self._embedding = OpenAIEmbeddings(
             model=settings.embedding_model,
             openai_api_key=settings.embedding_api_key,
             openai_api_base=settings.embedding_base_url,
         )
-        self._db = NanoVectorDB(
-            embedding_dim=settings.embedding_dim,
-            storage_file=self._persist_path,
+        cache_path = None
+        if settings.embedding_cache_path:
+            cache_path = base.parent / settings.embedding_cache_path
+        self.embedding_cache = EmbeddingCache(
+            settings.embedding_model,
+            max_entries=settings.embedding_cache_size,
+            ttl_s=settings.embedding_cache_ttl,
+            db_path=cache_path,
         )
+        self._data, self._matrix, self._generation = load_vector_file(
+            self._persist_path, self._embedding_dim
+        )
+        self._index: dict[str, int] = {
+            rec["__id__"]: i for i, rec in enumerate(self._data)
+        }
+        self._keywords = KeywordIndex()
+        for rec in self._data:
+            self._keywords.add(rec["__id__"], rec.get("content", ""))
+        self._fields = build_field_indexes(self._data, skip=_UNINDEXED_FIELDS)
+        self._ann_min_size = settings.vector_ann_min_size
+        self._ann_nlist = settings.vector_ann_nlist
+        self._ann_nprobe = settings.vector_ann_nprobe
+        self._ann_path = Path(f"{self._persist_path}.ivf.npz")
+        self._ann = IVFIndex.load(self._ann_path, nprobe=self._ann_nprobe)
+        if self._ann is not None and len(self._ann) != len(self._data):
+            logger.info("IVF index is stale (%d rows vs %d), rebuilding",
+                        len(self._ann), len(self._data))
+            self._ann = None
+        if self._refresh_ann():
+            self._ann.save(self._ann_path)
+
+        self._quantization = settings.vector_quantization
+        if self._quantization not in QUANTIZATION_MODES:
+            raise ValueError(
+                f"VECTOR_QUANTIZATION must be one of {QUANTIZATION_MODES}, "
+                f"got {self._quantization!r}"
+            )
+        self._rerank_factor = max(1, settings.vector_rerank_factor)
+        self._codes: QuantizedMatrix | None = None
+        if self._quantization != "none":
+            self._codes = QuantizedMatrix.load(
+                self._persist_path, self._quantization, len(self._data),
+                generation=self._generation,
+            )
+            if self._codes is None:
+                self._codes = QuantizedMatrix.from_matrix(
+                    self._matrix, self._quantization
+                )
+                if len(self._data):
+                    self._codes.save(
+                        self._persist_path, generation=self._generation
+                    )
+
+        # Spare-capacity backing store for the in-memory matrix, so appends
+        # are amortised O(batch); ``None`` while the matrix is memory-mapped.
+        self._buffer: np.ndarray | None = None
+        self._wal = VectorWAL(self._persist_path, self._embedding_dim)
+        self._wal_compact_bytes = max(0, settings.vector_wal_compact_mb) * 2**20
+        self._dirty = False
+        self._publish()
+        self._replay_wal()
         self._lock = asyncio.Lock()
+        self._compaction: asyncio.Task | None = None
+        self._batcher: _QueryBatcher | None = None
+        if settings.vector_query_batch_window_ms > 0:
+            self._batcher = _QueryBatcher(
+                self._run_queries,
+                window_s=settings.vector_query_batch_window_ms / 1000,
+                max_batch=settings.vector_query_batch_max,
+            )
+
+    def __len__(self) -> int:
+        return len(self._snapshot.data)
 
     # -- BaseVectorStore interface -------------------------------------------
 
@@ -180,62 +493,459 @@ class NanoVectorStore(BaseVectorStore):
         top_k: int = 5,
         *,
         query_embedding: list[float] | None = None,
+        filter: dict[str, Any] | None = None,
     ) -> list[dict[str, Any]]:
-        if query_embedding is None:
-            query_embedding = await self._embed(query)
-
-        qvec = np.array(query_embedding, dtype=np.float32)
-        en_keywords, zh_keywords = _extract_keywords(query)
-        async with self._lock:
-            return await asyncio.to_thread(
-                _query_with_lexical_boost,
-                self._db,
-                qvec,
-                top_k=top_k,
-                en_keywords=en_keywords,
-                zh_keywords=zh_keywords,
-            )
-
-    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
-        if not data:
-            return
+        _check_filter(filter)
+        if self._batcher is not None:
+            return await self._batcher.submit(query, top_k, query_embedding, filter)
+        results = await self._run_queries(
+            [query], [top_k], [query_embedding], [filter]
+        )
+        return results[0]
 
-        ids = list(data.keys())
-        contents = [data[i].get("content", "") for i in ids]
-        embeddings = await self._embed_batch(contents)
+    async def query_many(
+        self,
+        queries: list[str],
+        top_k: int = 5,
+        *,
+        query_embeddings: list[list[float] | None] | None = None,
+        filter: dict[str, Any] | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        _check_filter(filter)
+        if not queries:
+            return []
+        embeddings = query_embeddings or [None] * len(queries)
+        return await self._run_queries(
+            queries, [top_k] * len(queries), embeddings, [filter] * len(queries)
+        )
 
-        records = []
-        for idx, doc_id in enumerate(ids):
-            record = {
-                "__id__": doc_id,
-                "__vector__": np.array(embeddings[idx], dtype=np.float32),
-                "content": contents[idx],
-            }
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> dict[str, int]:
+        """Insert or update records, embedding only new or changed content.
+
+        A record whose stored ``content`` is unchanged keeps its vector; if
+        its metadata is unchanged too it is skipped entirely.  Returns the
+        ``inserted`` / ``updated`` / ``skipped`` counts.
+        """
+        return await self.write_prepared(await self.prepare_upsert(data))
+
+    async def prepare_upsert(
+        self, data: dict[str, dict[str, Any]]
+    ) -> _PreparedUpsert:
+        """Diff *data* against the current snapshot and embed what changed.
+
+        Takes no lock; vectors that are reused are copied out of the
+        snapshot, so the batch stays valid while other writes land.
+        """
+        counts = {"inserted": 0, "updated": 0, "skipped": 0}
+        snap = self._snapshot
+        records: list[dict[str, Any]] = []
+        rows: list[int | None] = []  # snapshot row whose vector is reused
+        for doc_id, fields in data.items():
+            record = {"__id__": doc_id, "content": fields.get("content", "")}
             # attach extra metadata
-            for k, v in data[doc_id].items():
+            for k, v in fields.items():
                 if k != "content":
                     record[k] = v
+            row = snap.index.get(doc_id)
+            if row is None or row >= len(snap.data):
+                counts["inserted"] += 1
+                row = None
+            elif snap.data[row] == record:
+                counts["skipped"] += 1
+                continue
+            else:
+                counts["updated"] += 1
+                if snap.data[row].get("content", "") != record["content"]:
+                    row = None
             records.append(record)
+            rows.append(row)
 
-        async with self._lock:
-            await asyncio.to_thread(self._db.upsert, records)
-            await asyncio.to_thread(self._db.save)
-        logger.info("Upserted %d records into NanoVectorDB", len(records))
+        to_embed = [i for i, row in enumerate(rows) if row is None]
+        vectors = np.empty((len(records), self._embedding_dim), dtype=np.float32)
+        if to_embed:
+            embeddings = await self._embed_batch(
+                [records[i]["content"] for i in to_embed]
+            )
+            vectors[to_embed] = np.array(embeddings, dtype=np.float32).reshape(
+                len(to_embed), self._embedding_dim
+            )
+        reused = [i for i, row in enumerate(rows) if row is not None]
+        if reused:
+            vectors[reused] = snap.matrix[[rows[i] for i in reused]]
+        return _PreparedUpsert(records, vectors, counts, len(to_embed))
+
+    async def write_prepared(self, prepared: _PreparedUpsert) -> dict[str, int]:
+        if prepared.records:
+            async with self._lock:
+                await asyncio.to_thread(
+                    self._wal.append_upsert, prepared.records, prepared.vectors
+                )
+                await asyncio.to_thread(
+                    self._apply_upsert, prepared.records, prepared.vectors
+                )
+            self._maybe_compact()
+            logger.info(
+                "Upserted into vector store: %d inserted, %d updated, %d skipped "
+                "(%d embedded)",
+                prepared.counts["inserted"], prepared.counts["updated"],
+                prepared.counts["skipped"], prepared.embedded,
+            )
+        return dict(prepared.counts)
 
     async def delete(self, ids: list[str]) -> None:
+        if not ids:
+            return
         async with self._lock:
-            await asyncio.to_thread(self._db.delete, ids)
-            await asyncio.to_thread(self._db.save)
-        logger.info("Deleted %d records from NanoVectorDB", len(ids))
+            await asyncio.to_thread(self._wal.append_delete, ids)
+            await asyncio.to_thread(self._apply_delete, ids)
+        self._maybe_compact()
+        logger.info("Deleted %d records from vector store", len(ids))
 
     async def finalize(self) -> None:
+        if self._batcher is not None:
+            await self._batcher.close()
+        if self._compaction is not None:
+            await self._compaction
+        await self._compact()
+        logger.info("Embedding cache: %s", self.embedding_cache.stats())
+
+    # -- batched search ------------------------------------------------------
+
+    async def _run_queries(
+        self,
+        queries: list[str],
+        top_ks: list[int],
+        embeddings: list[list[float] | None],
+        wheres: list[dict[str, Any] | None],
+    ) -> list[list[dict[str, Any]]]:
+        """Embed the queries lacking an embedding in one request, then search."""
+        embeddings = list(embeddings)
+        missing = sorted(
+            {q for q, e in zip(queries, embeddings) if e is None}
+        )
+        if len(missing) == 1:
+            vectors = {missing[0]: await self._embed(missing[0])}
+        elif missing:
+            vectors = dict(zip(missing, await self._embed_batch(missing)))
+        for i, q in enumerate(queries):
+            if embeddings[i] is None:
+                embeddings[i] = vectors[q]
+
+        qvecs = np.array(embeddings, dtype=np.float32).reshape(
+            len(queries), -1
+        )
+        keywords = [_extract_keywords(q) for q in queries]
+        return await asyncio.to_thread(
+            self._search_many, self._snapshot, qvecs, keywords, top_ks, wheres
+        )
+
+    # -- write-ahead log -----------------------------------------------------
+
+    def _replay_wal(self) -> None:
+        entries = 0
+        for op, payload, vectors in self._wal.replay():
+            if op == "upsert":
+                self._apply_upsert(payload, vectors)
+            else:
+                self._apply_delete(payload)
+            entries += 1
+        if entries:
+            logger.info(
+                "Replayed %d vector WAL entries from %s", entries, self._wal.path
+            )
+
+    def _maybe_compact(self) -> None:
+        """Schedule a background compaction once the WAL is large enough."""
+        if self._compaction is not None and not self._compaction.done():
+            return
+        if self._wal.size < max(1, self._wal_compact_bytes):
+            return
+        self._compaction = asyncio.create_task(self._compact())
+
+    async def _compact(self) -> None:
         async with self._lock:
-            await asyncio.to_thread(self._db.save)
+            if self._dirty:
+                await asyncio.to_thread(self._save)
 
     # -- helpers -------------------------------------------------------------
 
+    def _search_many(
+        self,
+        snap: _Snapshot,
+        qvecs: np.ndarray,
+        keywords: list[tuple[list[str], list[str]]],
+        top_ks: list[int],
+        wheres: list[dict[str, Any] | None],
+    ) -> list[list[dict[str, Any]]]:
+        groups: dict[str | None, list[int]] = {}
+        for j, where in enumerate(wheres):
+            groups.setdefault(filter_key(where), []).append(j)
+
+        results: list[list[dict[str, Any]]] = [[] for _ in qvecs]
+        for key, members in groups.items():
+            allowed = None if key is None else self._filter_rows(snap, wheres[members[0]])
+            block = None
+            if (
+                len(members) > 1
+                and len(snap.data)
+                and snap.ann is None
+                and snap.codes is None
+                and (allowed is None or len(allowed))
+            ):
+                # Exact path: score the group against its rows in one matmul.
+                sub = snap.matrix if allowed is None else snap.matrix[allowed]
+                block = normalize_rows(qvecs[members]) @ sub.T
+            for b, j in enumerate(members):
+                en, zh = keywords[j]
+                results[j] = self._search(
+                    snap,
+                    qvecs[j],
+                    en,
+                    zh,
+                    top_ks[j],
+                    allowed=allowed,
+                    scores=None if block is None else block[b],
+                )
+        return results
+
+    def _filter_rows(self, snap: _Snapshot, where: dict[str, Any]) -> np.ndarray:
+        def field_index(name: str) -> FieldIndex:
+            index = snap.fields.get(name)
+            if index is not None:
+                return index
+            if name in _UNINDEXED_FIELDS:
+                # Rarely filtered on; scan for this query only.
+                return FieldIndex.build(snap.data, name)
+            return _NO_ROWS
+
+        return select_rows(where, field_index)
+
+    def _search(
+        self,
+        snap: _Snapshot,
+        qvec: np.ndarray,
+        en_keywords: list[str],
+        zh_keywords: list[str],
+        top_k: int,
+        *,
+        allowed: np.ndarray | None = None,
+        scores: np.ndarray | None = None,
+    ) -> list[dict[str, Any]]:
+        """Search *snap*; *allowed* (sorted rows) applies a metadata filter."""
+        if allowed is not None and len(allowed) == 0:
+            return []
+        n = len(snap.data)
+        keyword_scores = None
+        if en_keywords or zh_keywords:
+            # The keyword index is live: skip ids written after the snapshot.
+            keyword_scores = {}
+            for rid, score in self._keywords.score(en_keywords, zh_keywords).items():
+                row = snap.index.get(rid)
+                if row is None or row >= n:
+                    continue
+                if allowed is not None:
+                    pos = np.searchsorted(allowed, row)
+                    if pos >= len(allowed) or allowed[pos] != row:
+                        continue
+                keyword_scores[row] = score
+
+        if allowed is None:
+            candidate_rows = snap.ann.probe(qvec) if snap.ann is not None else None
+        else:
+            candidate_rows = allowed
+            if snap.ann is not None and len(allowed) >= self._ann_min_size:
+                candidate_rows = np.intersect1d(
+                    snap.ann.probe(qvec), allowed, assume_unique=True
+                )
+        if snap.codes is not None:
+            size = max(1, top_k) * self._rerank_factor
+            pool = n if candidate_rows is None else len(candidate_rows)
+            if pool > size:
+                candidate_rows = snap.codes.shortlist(qvec, size, candidate_rows)
+        return _query_with_lexical_boost(
+            snap.data,
+            snap.matrix,
+            qvec,
+            top_k=top_k,
+            keyword_scores=keyword_scores,
+            candidate_rows=candidate_rows,
+            scores=scores,
+        )
+
+    def _apply_upsert(
+        self, records: list[dict[str, Any]], vectors: np.ndarray
+    ) -> None:
+        vectors = normalize_rows(vectors)
+        published = len(self._data)
+        # Appends extend the list the published snapshot views; overwriting
+        # a published record needs a copy (as the matrix does below).
+        overwrite = any(rec["__id__"] in self._index for rec in records)
+        data = list(self._data) if overwrite else self._data
+        positions: list[int] = []
+        replaced: dict[int, dict[str, Any] | None] = {}  # row -> record before
+        for rec in records:
+            rid = rec["__id__"]
+            i = self._index.get(rid)
+            if i is None:
+                i = self._index[rid] = len(data)
+                data.append(rec)
+                replaced.setdefault(i, None)
+            else:
+                replaced.setdefault(i, data[i])
+                data[i] = rec
+            self._keywords.add(rid, rec.get("content", ""))
+            positions.append(i)
+        self._data = data
+        self._update_fields({i: (old, data[i]) for i, old in replaced.items()})
+        # Rows visible to published snapshots must not change underneath
+        # them: updating one forces a fresh buffer, appends reuse the tail.
+        matrix = self._writable_matrix(
+            len(data), fresh=min(positions) < published
+        )
+        matrix[positions] = vectors  # a repeated id keeps its last vector
+        self._matrix = matrix
+        if self._ann is not None:
+            self._ann = copy.copy(self._ann)
+            self._ann.assign(np.asarray(positions), matrix[positions])
+        if self._codes is not None:
+            self._codes = copy.copy(self._codes)
+            self._codes.assign(np.asarray(positions), matrix[positions])
+        self._refresh_ann()
+        self._dirty = True
+        self._publish()
+
+    def _apply_delete(self, ids: list[str]) -> None:
+        drop = {self._index[i] for i in ids if i in self._index}
+        if not drop:
+            return
+        for i in drop:
+            self._keywords.remove(self._data[i]["__id__"])
+        keep = [i for i in range(len(self._data)) if i not in drop]
+        mapping = np.full(len(self._data), -1, dtype=np.int64)
+        mapping[keep] = np.arange(len(keep), dtype=np.int64)
+        self._data = [self._data[i] for i in keep]
+        self._buffer = np.array(self._matrix[keep], dtype=np.float32)
+        self._matrix = self._buffer
+        self._index = {rec["__id__"]: i for i, rec in enumerate(self._data)}
+        self._fields = {
+            name: index.remapped(mapping) for name, index in self._fields.items()
+        }
+        if self._ann is not None:
+            self._ann = copy.copy(self._ann)
+            self._ann.remap(np.asarray(keep, dtype=np.int64))
+        if self._codes is not None:
+            self._codes = copy.copy(self._codes)
+            self._codes.take(np.asarray(keep, dtype=np.int64))
+        self._refresh_ann()
+        self._dirty = True
+        self._publish()
+
+    def _update_fields(
+        self,
+        changed: dict[int, tuple[dict[str, Any] | None, dict[str, Any]]],
+    ) -> None:
+        """Move each ``row -> (old record, new record)`` in the field indexes."""
+        changes: dict[str, list[tuple[int, Any, Any]]] = {}
+        for i, (old, new) in changed.items():
+            old = old or {}
+            for name in old.keys() | new.keys():
+                if name in _UNINDEXED_FIELDS:
+                    continue
+                before, after = old.get(name, MISSING), new.get(name, MISSING)
+                if before is not after and before != after:
+                    changes.setdefault(name, []).append((i, before, after))
+        if not changes:
+            return
+        fields = dict(self._fields)
+        for name, moves in changes.items():
+            fields[name] = fields.get(name, _NO_ROWS).updated(moves)
+        self._fields = fields
+
+    def _publish(self) -> None:
+        """Swap in a snapshot of the writer state (an atomic assignment)."""
+        self._snapshot = _Snapshot(
+            data=_RowView(self._data, len(self._data)),
+            matrix=self._matrix,
+            index=self._index,
+            ann=self._ann,
+            codes=self._codes,
+            fields=self._fields,
+        )
+
+    def _writable_matrix(self, rows: int, *, fresh: bool = False) -> np.ndarray:
+        """Return a writable ``(rows, dim)`` view over the growable buffer.
+
+        The buffer grows geometrically, so appending a batch copies the
+        existing rows only O(log n) times over the life of the store; the
+        first write after loading or compaction copies off the memmap once.
+        *fresh* forces a new buffer so existing rows can be overwritten.
+        """
+        current = self._matrix.shape[0]
+        buf = self._buffer
+        if fresh or buf is None or buf.shape[0] < rows:
+            capacity = max(rows, int(current * 1.5), 64)
+            grown = np.empty((capacity, self._embedding_dim), dtype=np.float32)
+            grown[:current] = self._matrix
+            self._buffer = buf = grown
+        return buf[:rows]
+
+    def _refresh_ann(self) -> bool:
+        """Drop, build or retrain the IVF index to match the current size.
+
+        Incremental assignment keeps the index usable between retrains; a
+        full retrain happens once the store has doubled since training, when
+        the original centroids no longer reflect the corpus.  Returns whether
+        a (re)train happened.
+        """
+        n = len(self._data)
+        if n < max(1, self._ann_min_size):
+            self._ann = None
+            return False
+        if self._ann is None or n > 2 * self._ann.trained_size:
+            self._ann = IVFIndex.train(
+                self._matrix,
+                nlist=self._ann_nlist,
+                nprobe=self._ann_nprobe,
+            )
+            return True
+        return False
+
+    def _save(self) -> None:
+        self._generation += 1
+        save_vector_file(
+            self._persist_path, self._data, self._matrix, self._embedding_dim,
+            generation=self._generation,
+        )
+        if self._ann is not None:
+            self._ann.save(self._ann_path)
+        else:
+            self._ann_path.unlink(missing_ok=True)
+        if self._codes is not None:
+            self._codes.save(self._persist_path, generation=self._generation)
+        # Drop the in-memory copy: float32 rows are paged in on demand.
+        if len(self._data):
+            self._matrix = np.load(matrix_path(self._persist_path), mmap_mode="r")
+            self._buffer = None
+        self._wal.reset()
+        self._dirty = False
+        self._publish()
+
     async def _embed(self, text: str) -> list[float]:
-        return await self._embedding.aembed_query(text)
+        (cached,) = await self.embedding_cache.get_many([text])
+        if cached is not None:
+            return cached
+        vector = await self._embedding.aembed_query(text)
+        await self.embedding_cache.put_many([text], [vector])
+        return vector
 
     async def _embed_batch(self, texts: list[str]) -> list[list[float]]:
-        return await self._embedding.aembed_documents(texts)
+        vectors = await self.embedding_cache.get_many(texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            fresh = await self._embedding.aembed_documents(missing)
+            await self.embedding_cache.put_many(missing, fresh)
+            by_text = dict(zip(missing, fresh))
+            vectors = [
+                by_text[t] if v is None else v for t, v in zip(texts, vectors)
+            ]
+        return vectors
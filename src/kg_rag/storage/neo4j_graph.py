@@ -3,38 +3,157 @@
 from __future__ import annotations
 
 import logging
+import re
+from collections import defaultdict
+from collections.abc import AsyncIterator
 from typing import Any
 
-from neo4j import AsyncGraphDatabase, AsyncDriver
-from neo4j.exceptions import TransientError, ServiceUnavailable
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type,
-)
+from neo4j import READ_ACCESS, WRITE_ACCESS, AsyncGraphDatabase, AsyncDriver
+from neo4j.exceptions import ClientError
 
 from kg_rag.config import settings
-from kg_rag.models import ENTITY_TYPE_LABELS, KNOWLEDGE_REL_TYPES, PROFILE_REL_TYPES
-from kg_rag.storage.base import BaseGraphStore
+from kg_rag.models import ENTITY_TYPE_LABELS, PROFILE_REL_TYPES
+from kg_rag.storage.base import (
+    CypherGraphStore,
+    check_merge_groups,
+    is_read_only,
+    merged_sources,
+    merged_text,
+    prepare_edge,
+    prepare_node,
+)
+from kg_rag.storage.name_index import normalize_name
 
 logger = logging.getLogger(__name__)
 
-_TRANSIENT = (TransientError, ServiceUnavailable)
 
-_retry = retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=1, max=10),
-    retry=retry_if_exception_type(_TRANSIENT),
-    reraise=True,
+async def _run(tx, cypher: str, params: dict[str, Any]):
+    """Transaction function: run *cypher*, return ``(rows, summary)``.
+
+    Passed to ``execute_read`` / ``execute_write``, which retry it on
+    transient errors and lost connections, so it must not have side
+    effects outside the transaction.
+    """
+    result = await tx.run(cypher, params)
+    rows = [record.data() async for record in result]
+    return rows, await result.consume()
+
+
+def _batches(rows: list, size: int):
+    size = max(1, size)
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+_FULLTEXT_INDEX = "entity_names"
+
+# Aliases are a list; the full-text index reads them through this derived
+# string property, kept in step by every entity MERGE (and graph-refresh).
+_ALIAS_TEXT = "reduce(s = '', a IN coalesce(n.aliases, []) | s + ' ' + a)"
+
+_WORD_RE = re.compile(r"\w+")
+
+# Materialised per-type counts for graph_stats(): one (:GraphStat) node per
+# "<kind>:<type>" key, adjusted by the statements that create, retype or
+# delete entities and knowledge relationships, and recounted by
+# refresh_derived().  Degrees live on the nodes themselves (``n.degree``).
+_STAT_ENTITIES = "entities_by_type"
+_STAT_RELATIONS = "relations_by_type"
+# Written by refresh_derived() once degrees, counters and the chunk index
+# cover the whole graph.  Graphs from before they were maintained have no
+# marker; reads then count live and the first writer builds them.
+_SUMMARY_MARKER = "_meta:summary"
+
+
+def _stat_add(kind: str, type_expr: str, delta_expr: str) -> str:
+    """MERGE the ``kind`` counter for *type_expr* and add *delta_expr*."""
+    return (
+        f"MERGE (s:GraphStat {{key: '{kind}:' + {type_expr}}}) "
+        f"ON CREATE SET s.kind = '{kind}', s.type = {type_expr}, s.count = 0 "
+        f"SET s.count = s.count + {delta_expr}"
+    )
+
+
+# Reverse index behind remove_chunk_sources(): one (:ChunkSource) node per
+# chunk id listing the entities that cite it, so dropping a chunk looks up
+# its entities instead of scanning every ``source_chunks`` list.  Entity
+# MERGEs and merges add to it and refresh_derived() rebuilds it; ids of
+# entities deleted or merged away linger until then, so readers re-check
+# ``source_chunks``.
+def _index_chunks(node: str, chunks: str) -> str:
+    """FOREACH adding *node*'s ``entity_id`` to the index entry of *chunks*."""
+    return (
+        f"FOREACH (c IN {chunks} | "
+        "MERGE (cs:ChunkSource {chunk_id: c}) "
+        f"SET cs.entity_ids = CASE WHEN {node}.entity_id IN coalesce(cs.entity_ids, []) "
+        f"THEN cs.entity_ids ELSE coalesce(cs.entity_ids, []) + {node}.entity_id END) "
+    )
+
+
+# Delete the entities $ids, taking their relationships out of the surviving
+# neighbours' degrees and the summary.  An edge between two deleted nodes is
+# seen from both ends; only the end with the larger element id counts it.
+_DELETE_ENTITIES = (
+    "UNWIND $ids AS eid MATCH (n:Entity {entity_id: eid}) "
+    "WITH collect(n) AS doomed "
+    "UNWIND doomed AS n "
+    "WITH doomed, n, coalesce(n.type, 'Unknown') AS t, "
+    "[(n)-[r]-(m:Entity) WHERE NOT m IN doomed "
+    "OR elementId(m) <= elementId(n) | type(r)] AS rel_types, "
+    "[(n)--(m) WHERE NOT m IN doomed | m] AS nbrs "
+    "FOREACH (m IN nbrs | SET m.degree = m.degree - 1) "
+    "WITH doomed, collect({t: t, rels: rel_types}) AS gone "
+    "FOREACH (n IN doomed | DETACH DELETE n) "
+    "WITH gone UNWIND gone AS g "
+    f"UNWIND [['{_STAT_ENTITIES}:' + g.t, -1]] + "
+    f"[x IN g.rels | ['{_STAT_RELATIONS}:' + x, -1]] AS delta "
+    "WITH delta[0] AS key, sum(delta[1]) AS d "
+    "MATCH (s:GraphStat {key: key}) SET s.count = s.count + d"
 )
 
 
-class Neo4jGraphStore(BaseGraphStore):
-    """Async Neo4j driver wrapper implementing BaseGraphStore."""
+def _dedupe(rows: list[dict[str, Any]], *key: str) -> list[dict[str, Any]]:
+    """Collapse rows with the same *key* fields, later props winning.
+
+    A batch reads "did this exist?" before it writes, so a repeated key
+    would be counted as created twice.
+    """
+    out: dict[tuple, dict[str, Any]] = {}
+    for row in rows:
+        k = tuple(row[f] for f in key)
+        if k in out:
+            out[k] = {**row, "props": {**out[k]["props"], **row["props"]}}
+        else:
+            out[k] = row
+    return list(out.values())
+
+
+def _fulltext_query(q: str) -> str:
+    """Lucene query matching every word of *q* as a prefix.
+
+    Words with non-ASCII characters (CJK names) become phrases instead: the
+    standard analyzer indexes CJK text one character per token, so a phrase
+    matches the characters in sequence, i.e. as a substring.
+    """
+    parts = []
+    for word in _WORD_RE.findall(normalize_name(q)):
+        parts.append(f'"{word}"' if not word.isascii() else f"{word}*")
+    return " AND ".join(parts)
+
+
+class Neo4jGraphStore(CypherGraphStore):
+    """Async Neo4j driver wrapper implementing CypherGraphStore.
+
+    Every statement runs in a managed transaction: reads through
+    ``execute_read`` in ``READ`` sessions, which a ``neo4j://`` (routing)
+    URI sends to cluster read replicas, writes through ``execute_write`` to
+    the leader.  The driver retries both on transient errors.
+    """
 
     def __init__(self) -> None:
         self._driver: AsyncDriver | None = None
+        self._fulltext = False
+        self._summary = False
 
     # -- lifecycle -----------------------------------------------------------
 
@@ -42,6 +161,8 @@ class Neo4jGraphStore(BaseGraphStore):
         self._driver = AsyncGraphDatabase.driver(
             settings.neo4j_uri,
             auth=(settings.neo4j_username, settings.neo4j_password),
+            max_connection_pool_size=settings.neo4j_max_pool_size,
+            connection_acquisition_timeout=settings.neo4j_acquisition_timeout,
         )
         # create constraints / indexes
         async with self._driver.session(database=settings.neo4j_database) as session:
@@ -52,6 +173,25 @@ class Neo4jGraphStore(BaseGraphStore):
                         f"FOR (e:{lbl}) REQUIRE e.entity_id IS UNIQUE"
                     )
                     await result.consume()
+                    # backs ORDER BY e.degree DESC LIMIT n in top_entities()
+                    result = await session.run(
+                        f"CREATE INDEX IF NOT EXISTS FOR (e:{lbl}) ON (e.degree)"
+                    )
+                    await result.consume()
+                except Exception as exc:
+                    logger.warning(
+                        "Failed to create constraint for %s: %s (may lack privileges)",
+                        lbl, exc,
+                    )
+            for lbl, key in (
+                ("User", "user_id"), ("GraphStat", "key"), ("ChunkSource", "chunk_id"),
+            ):
+                try:
+                    result = await session.run(
+                        f"CREATE CONSTRAINT IF NOT EXISTS "
+                        f"FOR (x:{lbl}) REQUIRE x.{key} IS UNIQUE"
+                    )
+                    await result.consume()
                 except Exception as exc:
                     logger.warning(
                         "Failed to create constraint for %s: %s (may lack privileges)",
@@ -59,15 +199,24 @@ class Neo4jGraphStore(BaseGraphStore):
                     )
             try:
                 result = await session.run(
-                    "CREATE CONSTRAINT IF NOT EXISTS "
-                    "FOR (u:User) REQUIRE u.user_id IS UNIQUE"
+                    f"CREATE FULLTEXT INDEX {_FULLTEXT_INDEX} IF NOT EXISTS "
+                    "FOR (e:Entity) ON EACH [e.name, e.alias_text]"
                 )
                 await result.consume()
+                self._fulltext = True
             except Exception as exc:
                 logger.warning(
-                    "Failed to create constraint for User: %s (may lack privileges)",
+                    "Failed to create full-text index: %s — entity search "
+                    "falls back to a scan",
                     exc,
                 )
+        if not await self._summary_built():
+            # rebuilding is a whole-graph write, left to the writer
+            # (ensure_derived) rather than every process that connects
+            logger.warning(
+                "Neo4j graph summary not built yet: overview and stats count "
+                "live until the next ingest or `python -m kg_rag graph-refresh`"
+            )
         logger.info("Neo4j initialized (uri=%s)", settings.neo4j_uri)
 
     async def finalize(self) -> None:
@@ -77,148 +226,663 @@ class Neo4jGraphStore(BaseGraphStore):
 
     # -- helpers -------------------------------------------------------------
 
-    def _session(self):
+    def _session(self, access_mode: str = WRITE_ACCESS, fetch_size: int | None = None):
         if self._driver is None:
             raise RuntimeError("Call initialize() first")
-        return self._driver.session(database=settings.neo4j_database)
+        return self._driver.session(
+            database=settings.neo4j_database,
+            default_access_mode=access_mode,
+            fetch_size=fetch_size or settings.neo4j_fetch_size,
+        )
+
+    async def _write(self, cypher: str, params: dict[str, Any] | None = None):
+        """Run *cypher* in a write transaction, return ``(rows, summary)``."""
+        async with self._session(WRITE_ACCESS) as session:
+            return await session.execute_write(_run, cypher, params or {})
+
+    async def read_cypher(
+        self, cypher: str, params: dict[str, Any] | None = None
+    ) -> list[dict[str, Any]]:
+        """Run a read-only statement in a read transaction (replica-routable)."""
+        async with self._session(READ_ACCESS) as session:
+            rows, _ = await session.execute_read(_run, cypher, params or {})
+            return rows
+
+    async def write_cypher(
+        self, cypher: str, params: dict[str, Any] | None = None
+    ) -> list[dict[str, Any]]:
+        """Run a statement in a write transaction on the leader."""
+        rows, _ = await self._write(cypher, params)
+        return rows
 
     # -- node operations -----------------------------------------------------
 
-    @_retry
     async def has_node(self, node_id: str) -> bool:
-        async with self._session() as session:
-            result = await session.run(
-                "MATCH (n:Entity {entity_id: $eid}) RETURN count(n) > 0 AS exists",
-                eid=node_id,
-            )
-            record = await result.single()
-            return bool(record and record["exists"])
+        rows = await self.read_cypher(
+            "MATCH (n:Entity {entity_id: $eid}) RETURN count(n) > 0 AS exists",
+            {"eid": node_id},
+        )
+        return bool(rows and rows[0]["exists"])
 
-    @_retry
     async def get_node(self, node_id: str) -> dict[str, Any] | None:
-        async with self._session() as session:
-            result = await session.run(
-                "MATCH (n:Entity {entity_id: $eid}) RETURN properties(n) AS props",
-                eid=node_id,
-            )
-            record = await result.single()
-            return dict(record["props"]) if record else None
+        rows = await self.read_cypher(
+            "MATCH (n:Entity {entity_id: $eid}) RETURN properties(n) AS props",
+            {"eid": node_id},
+        )
+        return dict(rows[0]["props"]) if rows else None
 
-    _BASE_LABELS = {"Entity", "User"}
+    @staticmethod
+    def _node_merge(label: str, eid: str, props: str) -> str:
+        """MERGE statement for *label* (see :func:`prepare_node`), with
+        *eid*/*props* as Cypher expressions.
 
-    _ALLOWED_REL_TYPES = KNOWLEDGE_REL_TYPES | PROFILE_REL_TYPES
+        Entity merges also keep the summary in step: a created node counts
+        once for its type, a retyped one moves between types.  Their
+        ``source_chunks`` are unioned with the stored list rather than
+        replacing it, and the new chunk ids are added to the chunk index.
+        """
+        # Base label: User uses user_id as primary key, Entity uses entity_id
+        if label == "User":
+            return f"MERGE (n:User {{user_id: {eid}}}) SET n += {props}"
+        base = "Entity" if label in ENTITY_TYPE_LABELS else label
+        type_label = f"SET n:{label} " if label in ENTITY_TYPE_LABELS else ""
+        return (
+            f"OPTIONAL MATCH (old:{base} {{entity_id: {eid}}}) "
+            "WITH *, old IS NULL AS created, "
+            "coalesce(old.type, 'Unknown') AS old_type, "
+            "coalesce(old.source_chunks, []) AS old_chunks "
+            f"MERGE (n:{base} {{entity_id: {eid}}}) ON CREATE SET n.degree = 0 "
+            f"SET n += {props} "
+            "SET n.source_chunks = CASE WHEN n.source_chunks IS NULL THEN NULL "
+            "ELSE old_chunks + [c IN n.source_chunks WHERE NOT c IN old_chunks] END "
+            + _index_chunks(
+                "n", "[c IN coalesce(n.source_chunks, []) WHERE NOT c IN old_chunks]"
+            )
+            + type_label
+            + f"SET n.alias_text = {_ALIAS_TEXT} "
+            "WITH created, old_type, coalesce(n.type, 'Unknown') AS new_type "
+            "WHERE created OR old_type <> new_type "
+            "UNWIND [[new_type, 1]] + "
+            "CASE WHEN created THEN [] ELSE [[old_type, -1]] END AS delta "
+            "WITH delta[0] AS t, sum(delta[1]) AS d "
+            + _stat_add(_STAT_ENTITIES, "t", "d")
+        )
 
-    @_retry
     async def upsert_node(self, node_id: str, node_data: dict[str, Any]) -> None:
-        data = dict(node_data)  # avoid mutating caller's dict
-        label = data.pop("label", "Entity")
-        props = {**data, "entity_id": node_id}
-
-        if label in ENTITY_TYPE_LABELS:
-            # Known entity type: MERGE on :Entity, then add type label
-            props.setdefault("type", label)
-            cypher = (
-                "MERGE (n:Entity {entity_id: $eid}) "
-                "SET n += $props "
-                f"SET n:{label}"
-            )
-        elif label not in self._BASE_LABELS:
-            # Unknown type: fall back to :Entity, store in type property
-            props["type"] = label
-            cypher = (
-                "MERGE (n:Entity {entity_id: $eid}) "
-                "SET n += $props"
-            )
-        else:
-            # Base label: User uses user_id as primary key, Entity uses entity_id
-            if label == "User":
-                cypher = (
-                    "MERGE (n:User {user_id: $eid}) "
-                    "SET n += $props"
-                )
-            else:
-                cypher = (
-                    f"MERGE (n:{label} {{entity_id: $eid}}) "
-                    "SET n += $props"
-                )
+        label, props = prepare_node(node_id, node_data)
+        cypher = self._node_merge(label, "$eid", "$props")
+        await self._write(cypher, {"eid": node_id, "props": props})
 
-        async with self._session() as session:
-            result = await session.run(cypher, eid=node_id, props=props)
-            await result.consume()
+    async def upsert_nodes_bulk(
+        self, nodes: list[tuple[str, dict[str, Any]]]
+    ) -> None:
+        groups: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for node_id, node_data in nodes:
+            label, props = prepare_node(node_id, node_data)
+            groups[label].append({"eid": node_id, "props": props})
+
+        async with self._session(WRITE_ACCESS) as session:
+            for label, rows in groups.items():
+                rows = _dedupe(rows, "eid")
+                cypher = "UNWIND $rows AS row " + self._node_merge(
+                    label, "row.eid", "row.props"
+                )
+                for batch in _batches(rows, settings.graph_bulk_batch_size):
+                    await session.execute_write(_run, cypher, {"rows": batch})
+        logger.info("Bulk-upserted %d nodes in %d label groups", len(nodes), len(groups))
 
-    @_retry
     async def delete_node(self, node_id: str) -> None:
-        async with self._session() as session:
-            result = await session.run(
-                "MATCH (n:Entity {entity_id: $eid}) DETACH DELETE n",
-                eid=node_id,
-            )
-            await result.consume()
+        await self._write(_DELETE_ENTITIES, {"ids": [node_id]})
+
+    async def delete_nodes_bulk(self, node_ids: list[str]) -> None:
+        ids = list(dict.fromkeys(node_ids))
+        async with self._session(WRITE_ACCESS) as session:
+            for batch in _batches(ids, settings.graph_bulk_batch_size):
+                await session.execute_write(_run, _DELETE_ENTITIES, {"ids": batch})
+        logger.info("Bulk-deleted %d entities", len(ids))
 
     # -- edge operations -----------------------------------------------------
 
-    @_retry
     async def has_edge(self, source: str, target: str) -> bool:
-        async with self._session() as session:
-            result = await session.run(
-                "MATCH (:Entity {entity_id: $src})-[r]->(:Entity {entity_id: $tgt}) "
-                "RETURN count(r) > 0 AS exists",
-                src=source,
-                tgt=target,
-            )
-            record = await result.single()
-            return bool(record and record["exists"])
+        rows = await self.read_cypher(
+            "MATCH (:Entity {entity_id: $src})-[r]->(:Entity {entity_id: $tgt}) "
+            "RETURN count(r) > 0 AS exists",
+            {"src": source, "tgt": target},
+        )
+        return bool(rows and rows[0]["exists"])
 
-    @_retry
     async def get_edge(self, source: str, target: str) -> dict[str, Any] | None:
-        async with self._session() as session:
-            result = await session.run(
-                "MATCH (:Entity {entity_id: $src})-[r]->(:Entity {entity_id: $tgt}) "
-                "RETURN properties(r) AS props, type(r) AS rel_type LIMIT 1",
-                src=source,
-                tgt=target,
+        rows = await self.read_cypher(
+            "MATCH (:Entity {entity_id: $src})-[r]->(:Entity {entity_id: $tgt}) "
+            "RETURN properties(r) AS props, type(r) AS rel_type LIMIT 1",
+            {"src": source, "tgt": target},
+        )
+        if not rows:
+            return None
+        props = dict(rows[0]["props"])
+        props["type"] = rows[0]["rel_type"]
+        return props
+
+    @staticmethod
+    def _edge_match(rel_type: str, src: str, tgt: str) -> str:
+        """MATCH clause binding ``a``/``b`` through the uniqueness constraints.
+
+        Profile edges run from ``:User {user_id}`` to an entity; every other
+        type links two ``:Entity`` nodes.  Naming the label lets Neo4j use the
+        constraint's index instead of scanning all nodes per endpoint.
+        """
+        if rel_type in PROFILE_REL_TYPES:
+            return f"MATCH (a:User {{user_id: {src}}}), (b:Entity {{entity_id: {tgt}}}) "
+        return f"MATCH (a:Entity {{entity_id: {src}}}), (b:Entity {{entity_id: {tgt}}}) "
+
+    @classmethod
+    def _edge_merge(cls, rel_type: str, src: str, tgt: str, props: str) -> str:
+        """MERGE statement for one *rel_type* edge, returning ``written``.
+
+        A created edge bumps both endpoints' ``degree`` and, for knowledge
+        edges, the relation count of its type.  Parallel edges already
+        between the endpoints (older data, concurrent writers) are collapsed
+        to one row per pair on both sides of the MERGE, so a pair counts as
+        written once and as created only if it had no edge at all.
+        """
+        cypher = (
+            cls._edge_match(rel_type, src, tgt)
+            + f"OPTIONAL MATCH (a)-[old:{rel_type}]->(b) "
+            f"WITH a, b, {props} AS props, count(old) AS existing "
+            f"MERGE (a)-[r:{rel_type}]->(b) "
+            "ON CREATE SET a.degree = coalesce(a.degree, 0) + 1, "
+            "b.degree = coalesce(b.degree, 0) + 1 "
+            "SET r += props "
+            "WITH a, b, existing, count(r) AS merged "
+            "WITH count(*) AS written, "
+            "sum(CASE WHEN existing = 0 THEN 1 ELSE 0 END) AS created "
+        )
+        if rel_type not in PROFILE_REL_TYPES:
+            cypher += (
+                "FOREACH (_ IN CASE WHEN created > 0 THEN [1] ELSE [] END | "
+                + _stat_add(_STAT_RELATIONS, f"'{rel_type}'", "created")
+                + ") "
             )
-            record = await result.single()
-            if not record:
-                return None
-            props = dict(record["props"])
-            props["type"] = record["rel_type"]
-            return props
-
-    @_retry
+        return cypher + "RETURN written"
+
     async def upsert_edge(
         self, source: str, target: str, edge_data: dict[str, Any]
     ) -> None:
-        data = dict(edge_data)  # avoid mutating caller's dict
-        rel_type = data.pop("type", "RELATED_TO")
-        if rel_type not in self._ALLOWED_REL_TYPES:
+        rel_type, data = prepare_edge(edge_data)
+        cypher = self._edge_merge(rel_type, "$src", "$tgt", "$props")
+        rows, _ = await self._write(cypher, {"src": source, "tgt": target, "props": data})
+        if not rows or not rows[0]["written"]:
             logger.warning(
-                "Unknown rel type %r mapped to RELATED_TO", rel_type
+                "upsert_edge(%s, %s): no relationship created/updated — "
+                "endpoint(s) may not exist",
+                source, target,
             )
-            data["original_type"] = rel_type
-            rel_type = "RELATED_TO"
-        cypher = (
-            "MATCH (a {entity_id: $src}), (b {entity_id: $tgt}) "
-            f"MERGE (a)-[r:{rel_type}]->(b) "
-            "SET r += $props"
-        )
-        async with self._session() as session:
-            result = await session.run(cypher, src=source, tgt=target, props=data)
-            summary = await result.consume()
-            if summary.counters.relationships_created == 0 and summary.counters.properties_set == 0:
-                logger.warning(
-                    "upsert_edge(%s, %s): no relationship created/updated — "
-                    "endpoint(s) may not exist",
-                    source, target,
+
+    async def upsert_edges_bulk(
+        self, edges: list[tuple[str, str, dict[str, Any]]]
+    ) -> None:
+        groups: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for source, target, edge_data in edges:
+            rel_type, props = prepare_edge(edge_data)
+            groups[rel_type].append({"src": source, "tgt": target, "props": props})
+
+        written = 0
+        async with self._session(WRITE_ACCESS) as session:
+            for rel_type, rows in groups.items():
+                rows = _dedupe(rows, "src", "tgt")
+                cypher = "UNWIND $rows AS row " + self._edge_merge(
+                    rel_type, "row.src", "row.tgt", "row.props"
                 )
+                for batch in _batches(rows, settings.graph_bulk_batch_size):
+                    result, _ = await session.execute_write(
+                        _run, cypher, {"rows": batch}
+                    )
+                    written += result[0]["written"] if result else 0
+        if written < len(edges):
+            logger.warning(
+                "upsert_edges_bulk: %d/%d edges written — endpoint(s) may not exist",
+                written, len(edges),
+            )
+
+    # -- merges --------------------------------------------------------------
+
+    async def merge_entities_bulk(
+        self, groups: list[tuple[list[str], str]]
+    ) -> dict[str, Any]:
+        """Merge entity groups, one write transaction per batch of groups.
+
+        A batch holds whole groups of up to ``graph_bulk_batch_size``
+        sources, so each merge is atomic and its edges move with a handful
+        of UNWIND statements per relationship type.
+        """
+        totals: dict[str, Any] = {"merged": [], "missing": [], "edges": 0}
+        batch: list[tuple[list[str], str]] = []
+        size = 0
+        pending = check_merge_groups(groups)
+        async with self._session(WRITE_ACCESS) as session:
+            for i, group in enumerate(pending):
+                batch.append(group)
+                size += len(group[0])
+                if size < settings.graph_bulk_batch_size and i < len(pending) - 1:
+                    continue
+                done = await session.execute_write(self._merge_tx, batch)
+                for key in ("merged", "missing"):
+                    totals[key] += done[key]
+                totals["edges"] += done["edges"]
+                batch, size = [], 0
+        logger.info(
+            "Merged %d entities (%d edges moved, %d missing)",
+            len(totals["merged"]), totals["edges"], len(totals["missing"]),
+        )
+        return totals
+
+    @classmethod
+    async def _merge_tx(
+        cls, tx, groups: list[tuple[list[str], str]]
+    ) -> dict[str, Any]:
+        """Transaction function behind :meth:`merge_entities_bulk`."""
+        ids = [i for sources, target in groups for i in (*sources, target)]
+        rows, _ = await _run(
+            tx,
+            "UNWIND $ids AS id MATCH (n:Entity {entity_id: id}) "
+            "RETURN id, n.name AS name, n.description AS description, "
+            "n.aliases AS aliases, n.source_chunks AS source_chunks, "
+            "coalesce(n.type, 'Unknown') AS type",
+            {"ids": ids},
+        )
+        nodes = {row["id"]: row for row in rows}
+
+        final: dict[str, str] = {}
+        missing: list[str] = []
+        for sources, target in groups:
+            if target not in nodes:
+                missing.append(target)
+                continue
+            for src in sources:
+                if src in nodes:
+                    final[src] = target
+                else:
+                    missing.append(src)
+        if not final:
+            return {"merged": [], "missing": missing, "edges": 0}
+
+        edge_rows, _ = await _run(
+            tx,
+            "UNWIND $ids AS id "
+            "MATCH (s:Entity {entity_id: id})-[r]-(n) WHERE n:Entity OR n:User "
+            "RETURN id, elementId(r) AS rid, type(r) AS type, "
+            "startNode(r) = s AS outgoing, n:User AS from_user, "
+            "CASE WHEN n:User THEN n.user_id ELSE n.entity_id END AS nbr, "
+            "properties(r) AS props",
+            {"ids": list(final)},
+        )
+        # every relationship of a source goes away; re-create it between
+        # the merged endpoints, and account for the removed one by hand
+        moved: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        degree: dict[tuple[bool, str], int] = defaultdict(int)
+        stats: dict[str, int] = defaultdict(int)
+        seen: set[str] = set()
+        for e in edge_rows:
+            if e["rid"] in seen:
+                continue  # an edge between two sources is listed twice
+            seen.add(e["rid"])
+            nbr = e["nbr"] if e["from_user"] else final.get(e["nbr"], e["nbr"])
+            if not e["from_user"]:
+                stats[f"{_STAT_RELATIONS}:{e['type']}"] -= 1
+                if e["nbr"] not in final:
+                    degree[(False, e["nbr"])] += 1
+            else:
+                degree[(True, e["nbr"])] += 1
+            target = final[e["id"]]
+            if nbr == target:
+                continue
+            src, tgt = (target, nbr) if e["outgoing"] else (nbr, target)
+            moved[e["type"]].append({"src": src, "tgt": tgt, "props": e["props"]})
+
+        edges = 0
+        for rel_type, rows in moved.items():
+            rows = _dedupe(rows, "src", "tgt")
+            edges += len(rows)
+            await _run(
+                tx,
+                "UNWIND $rows AS row "
+                + cls._edge_merge(rel_type, "row.src", "row.tgt", "row.props"),
+                {"rows": rows},
+            )
+
+        texts = []
+        for sources, target in groups:
+            absorbed = [nodes[s] for s in sources if s in final]
+            if absorbed:
+                description, aliases = merged_text(nodes[target], absorbed)
+                texts.append({
+                    "id": target,
+                    "description": description,
+                    "aliases": aliases,
+                    "chunks": merged_sources(nodes[target], absorbed),
+                })
+        await _run(
+            tx,
+            "UNWIND $rows AS row MATCH (n:Entity {entity_id: row.id}) "
+            "SET n.description = row.description, n.aliases = row.aliases, "
+            "n.source_chunks = row.chunks "
+            + _index_chunks("n", "coalesce(row.chunks, [])")
+            + f"SET n.alias_text = {_ALIAS_TEXT}",
+            {"rows": texts},
+        )
+
+        for src in final:
+            stats[f"{_STAT_ENTITIES}:{nodes[src]['type']}"] -= 1
+        for user, match in ((False, "Entity {entity_id"), (True, "User {user_id")):
+            await _run(
+                tx,
+                f"UNWIND $rows AS row MATCH (m:{match}: row.id}}) "
+                "SET m.degree = m.degree - row.d",
+                {"rows": [
+                    {"id": nid, "d": d}
+                    for (is_user, nid), d in degree.items()
+                    if is_user == user
+                ]},
+            )
+        await _run(
+            tx,
+            "UNWIND $rows AS row MATCH (s:GraphStat {key: row.key}) "
+            "SET s.count = s.count + row.d",
+            {"rows": [{"key": k, "d": d} for k, d in stats.items()]},
+        )
+        await _run(
+            tx,
+            "UNWIND $ids AS id MATCH (n:Entity {entity_id: id}) DETACH DELETE n",
+            {"ids": list(final)},
+        )
+        return {"merged": list(final), "missing": missing, "edges": edges}
+
+    async def remove_chunk_sources(self, chunk_ids: list[str]) -> dict[str, Any]:
+        if not chunk_ids:
+            return {"updated": 0, "deleted": []}
+        async with self._session(WRITE_ACCESS) as session:
+            result = await session.execute_write(self._unsource_tx, chunk_ids)
+        logger.info(
+            "Removed %d chunks from %d entities (%d orphans deleted)",
+            len(chunk_ids), result["updated"], len(result["deleted"]),
+        )
+        return result
+
+    @staticmethod
+    async def _unsource_tx(tx, chunk_ids: list[str]) -> dict[str, Any]:
+        """Transaction function behind :meth:`remove_chunk_sources`.
+
+        Only the entities the chunk index lists for *chunk_ids* are read.
+        """
+        rows, _ = await _run(
+            tx,
+            "MATCH (cs:ChunkSource) WHERE cs.chunk_id IN $ids "
+            "UNWIND cs.entity_ids AS eid WITH DISTINCT eid "
+            "MATCH (n:Entity {entity_id: eid}) "
+            "WHERE any(c IN n.source_chunks WHERE c IN $ids) "
+            "SET n.source_chunks = [c IN n.source_chunks WHERE NOT c IN $ids] "
+            "RETURN n.entity_id AS id, size(n.source_chunks) = 0 AS orphan",
+            {"ids": chunk_ids},
+        )
+        deleted = [row["id"] for row in rows if row["orphan"]]
+        if deleted:
+            await _run(tx, _DELETE_ENTITIES, {"ids": deleted})
+        await _run(
+            tx,
+            "MATCH (cs:ChunkSource) WHERE cs.chunk_id IN $ids DELETE cs",
+            {"ids": chunk_ids},
+        )
+        return {"updated": len(rows) - len(deleted), "deleted": deleted}
 
     # -- cypher query --------------------------------------------------------
 
-    @_retry
     async def query_cypher(
         self, cypher: str, params: dict[str, Any] | None = None
     ) -> list[dict[str, Any]]:
-        async with self._session() as session:
-            result = await session.run(cypher, **(params or {}))
-            records = [record.data() async for record in result]
-            return records
+        """Route *cypher* to :meth:`read_cypher` or :meth:`write_cypher`.
+
+        Statements without any write clause or write procedure (see
+        :func:`is_read_only`) go to a read transaction; anything else is
+        treated as a write.
+        """
+        if is_read_only(cypher):
+            return await self.read_cypher(cypher, params)
+        return await self.write_cypher(cypher, params)
+
+    async def stream_cypher(
+        self,
+        cypher: str,
+        params: dict[str, Any] | None = None,
+        *,
+        batch_size: int | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yield the rows of a read-only *cypher* in *batch_size* lists.
+
+        The statement runs in one explicit read transaction whose fetch size
+        equals the batch size, so the driver pulls the next batch from the
+        server only once the caller asks for it — a slow consumer holds at
+        most one batch, however large the result.  Unlike
+        :meth:`read_cypher` a failure mid-stream is not retried (rows were
+        already handed out); callers should iterate to the end or close the
+        generator.
+        """
+        if not is_read_only(cypher):
+            raise ValueError("stream_cypher only runs read-only statements")
+        size = max(1, batch_size or settings.neo4j_fetch_size)
+        async with self._session(READ_ACCESS, fetch_size=size) as session:
+            async with await session.begin_transaction() as tx:
+                result = await tx.run(cypher, params or {})
+                batch: list[dict[str, Any]] = []
+                async for record in result:
+                    batch.append(record.data())
+                    if len(batch) >= size:
+                        yield batch
+                        batch = []
+                if batch:
+                    yield batch
+
+    # -- read API ------------------------------------------------------------
+
+    _ENTITY_ROW = (
+        "RETURN e.entity_id AS id, e.name AS label, "
+        "coalesce(e.type, 'Unknown') AS type, "
+        "coalesce(e.description, '') AS description, "
+        "coalesce(e.aliases, []) AS aliases"
+    )
+
+    async def get_node_edges(self, node_id: str) -> list[dict[str, Any]]:
+        return await self.read_cypher(
+            "MATCH (:Entity {entity_id: $eid})-[r]-(:Entity) "
+            "RETURN startNode(r).entity_id AS source, "
+            "endNode(r).entity_id AS target, type(r) AS type, "
+            "coalesce(r.description, '') AS description, "
+            "coalesce(r.weight, 1.0) AS weight",
+            {"eid": node_id},
+        )
+
+    async def edges_among(self, ids: list[str]) -> list[dict[str, Any]]:
+        if not ids:
+            return []
+        return await self.read_cypher(
+            "MATCH (a:Entity)-[r]->(b:Entity) "
+            "WHERE a.entity_id IN $ids AND b.entity_id IN $ids "
+            "RETURN a.entity_id AS source, b.entity_id AS target, "
+            "type(r) AS type, coalesce(r.description, '') AS description, "
+            "coalesce(r.weight, 1.0) AS weight",
+            {"ids": list(ids)},
+        )
+
+    async def _summary_built(self) -> bool:
+        """Whether the summary marker exists (cached once it does)."""
+        if not self._summary:
+            rows = await self.read_cypher(
+                "MATCH (s:GraphStat {key: $key}) RETURN count(s) > 0 AS built",
+                {"key": _SUMMARY_MARKER},
+            )
+            self._summary = bool(rows and rows[0]["built"])
+        return self._summary
+
+    async def top_entities(
+        self, limit: int, entity_type: str | None = None
+    ) -> list[dict[str, Any]]:
+        label = entity_type if entity_type in ENTITY_TYPE_LABELS else "Entity"
+        if not await self._summary_built():
+            # nodes may lack ``degree``: count relationships instead
+            return await self.read_cypher(
+                f"MATCH (e:{label}) "
+                "WITH e ORDER BY COUNT { (e)--() } DESC LIMIT $limit "
+                + self._ENTITY_ROW,
+                {"limit": limit},
+            )
+        # the range predicate lets the planner walk the degree index in
+        # order and stop after $limit rows
+        return await self.read_cypher(
+            f"MATCH (e:{label}) WHERE e.degree >= 0 "
+            "WITH e ORDER BY e.degree DESC LIMIT $limit " + self._ENTITY_ROW,
+            {"limit": limit},
+        )
+
+    async def search_entities(
+        self, q: str, entity_type: str | None = None, limit: int = 20
+    ) -> list[dict[str, Any]]:
+        label = entity_type if entity_type in ENTITY_TYPE_LABELS else "Entity"
+        lucene = _fulltext_query(q)
+        if self._fulltext and lucene:
+            try:
+                return await self.read_cypher(
+                    f"CALL db.index.fulltext.queryNodes('{_FULLTEXT_INDEX}', $lucene) "
+                    f"YIELD node AS e, score WHERE e:{label} "
+                    + self._ENTITY_ROW + " ORDER BY score DESC LIMIT $limit",
+                    {"lucene": lucene, "limit": limit},
+                )
+            except ClientError as exc:
+                logger.warning("Full-text entity search failed (%s), scanning", exc)
+                self._fulltext = False
+        return await self.read_cypher(
+            f"MATCH (e:{label}) "
+            "WHERE toLower(e.name) CONTAINS toLower($q) "
+            "   OR ANY(a IN coalesce(e.aliases, []) WHERE toLower(a) CONTAINS toLower($q)) "
+            + self._ENTITY_ROW + " LIMIT $limit",
+            {"q": q, "limit": limit},
+        )
+
+    _ENTITY_MAP = (
+        "n {id: n.entity_id, label: n.name, type: coalesce(n.type, 'Unknown'), "
+        "description: coalesce(n.description, ''), "
+        "aliases: coalesce(n.aliases, [])}"
+    )
+
+    # One BFS level: the unseen entity neighbours of the frontier, highest
+    # degree first, cut to $fanout.  Each hop is a plain expand from the
+    # frontier nodes, so no paths are enumerated.
+    _BFS_LEVEL = (
+        "CALL { WITH seen, frontier "
+        "UNWIND frontier AS f "
+        "MATCH (f)--(n:Entity) WHERE NOT n IN seen "
+        "WITH DISTINCT n ORDER BY coalesce(n.degree, 0) DESC "
+        "WITH collect(n) AS cands "
+        "RETURN cands[..$fanout] AS level, size(cands) > $fanout AS cut } "
+        "WITH c, seen + level AS seen, level AS frontier, "
+        "found + level AS found, truncated OR cut AS truncated "
+    )
+
+    async def neighborhood(
+        self, entity_id: str, depth: int = 1, limit: int = 50, fanout: int = 50
+    ) -> dict[str, Any] | None:
+        depth = max(1, int(depth))
+        rows = await self.read_cypher(
+            "MATCH (c:Entity {entity_id: $eid}) "
+            "WITH c, [c] AS seen, [c] AS frontier, [] AS found, false AS truncated "
+            + self._BFS_LEVEL * depth
+            + "WITH c, found[..$limit] AS found, "
+            "truncated OR size(found) > $limit AS truncated "
+            "WITH [c] + found AS nodes, truncated "
+            "CALL { WITH nodes "
+            "UNWIND nodes AS a "
+            "MATCH (a)-[r]->(b:Entity) WHERE b IN nodes "
+            "RETURN collect({source: a.entity_id, target: b.entity_id, "
+            "type: type(r), description: coalesce(r.description, ''), "
+            "weight: coalesce(r.weight, 1.0)}) AS edges } "
+            f"RETURN [n IN nodes | {self._ENTITY_MAP}] AS nodes, edges, truncated",
+            {"eid": entity_id, "limit": limit, "fanout": fanout},
+        )
+        return rows[0] if rows else None
+
+    async def graph_stats(self) -> dict[str, dict[str, int]]:
+        if await self._summary_built():
+            rows = await self.read_cypher(
+                "MATCH (s:GraphStat) WHERE s.count > 0 "
+                "RETURN s.kind AS kind, s.type AS type, s.count AS count"
+            )
+        else:
+            rows = await self.read_cypher(
+                f"MATCH (e:Entity) RETURN '{_STAT_ENTITIES}' AS kind, "
+                "coalesce(e.type, 'Unknown') AS type, count(e) AS count "
+                "UNION ALL "
+                f"MATCH (:Entity)-[r]->(:Entity) RETURN '{_STAT_RELATIONS}' AS kind, "
+                "type(r) AS type, count(r) AS count"
+            )
+        stats: dict[str, dict[str, int]] = {_STAT_ENTITIES: {}, _STAT_RELATIONS: {}}
+        for row in rows:
+            stats.setdefault(row["kind"], {})[row["type"]] = row["count"]
+        return stats
+
+    async def get_user_relations(self, user_id: str) -> list[dict[str, Any]]:
+        return await self.read_cypher(
+            "MATCH (u:User {user_id: $uid})-[r]->(t:Entity) "
+            "RETURN type(r) AS rel_type, t.entity_id AS entity, t.name AS name, "
+            "r.confidence AS confidence, r.evidence AS evidence, "
+            "r.last_updated AS last_updated "
+            "ORDER BY rel_type, r.confidence DESC",
+            {"uid": user_id},
+        )
+
+    # -- maintenance ---------------------------------------------------------
+
+    async def refresh_derived(self) -> None:
+        result = await self.write_cypher(
+            f"MATCH (n:Entity) SET n.alias_text = {_ALIAS_TEXT} "
+            "RETURN count(n) AS refreshed"
+        )
+        logger.info("Refreshed search text on %d entities", result[0]["refreshed"])
+        await self.write_cypher("MATCH (cs:ChunkSource) DELETE cs")
+        result = await self.write_cypher(
+            "MATCH (n:Entity) UNWIND coalesce(n.source_chunks, []) AS c "
+            "WITH c, collect(DISTINCT n.entity_id) AS ids "
+            "MERGE (cs:ChunkSource {chunk_id: c}) SET cs.entity_ids = ids "
+            "RETURN count(cs) AS chunks"
+        )
+        logger.info("Rebuilt the chunk index for %d chunks", result[0]["chunks"])
+        await self.refresh_summary()
+        await self.write_cypher(
+            "MERGE (s:GraphStat {key: $key}) SET s.kind = '_meta'",
+            {"key": _SUMMARY_MARKER},
+        )
+        self._summary = True
+
+    async def ensure_derived(self) -> None:
+        """Build the derived data once, on a graph from before it was kept."""
+        if not await self._summary_built():
+            logger.info("Building the graph summary for the first time")
+            await self.refresh_derived()
+
+    async def refresh_summary(self) -> None:
+        """Recount every node degree and the per-type summary from scratch."""
+        result = await self.write_cypher(
+            "MATCH (n) WHERE n:Entity OR n:User "
+            "SET n.degree = COUNT { (n)--() } RETURN count(n) AS refreshed"
+        )
+        # zero the counters first so types that disappeared read as empty
+        await self.write_cypher("MATCH (s:GraphStat) SET s.count = 0")
+        await self.write_cypher(
+            "MATCH (e:Entity) "
+            "WITH coalesce(e.type, 'Unknown') AS t, count(e) AS c "
+            + _stat_add(_STAT_ENTITIES, "t", "c")
+        )
+        await self.write_cypher(
+            "MATCH (:Entity)-[r]->(:Entity) "
+            "WITH type(r) AS t, count(r) AS c "
+            + _stat_add(_STAT_RELATIONS, "t", "c")
+        )
+        logger.info("Recounted degrees on %d nodes and the graph summary",
+                    result[0]["refreshed"])
@@ -0,0 +1,224 @@
+"""Compressed vector codes for the first-pass scan of vector search.
+
+Two modes are supported:
+
+- ``float16`` — half-precision copy of each vector (2 bytes/dim);
+- ``int8`` — symmetric per-vector scalar quantisation, ``x ≈ code * scale``
+  with ``scale = max|x| / 127`` (1 byte/dim + one float32 per row).
+
+The codes are only used to shortlist candidates; callers re-rank the
+shortlist against the exact float32 vectors, which stay memory-mapped on
+disk and are paged in only for the shortlisted rows.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+QUANTIZATION_MODES = ("none", "float16", "int8")
+
+# Rows per block when decoding codes for a scan; small enough that the
+# decoded float32 block stays cache-resident.
+_SCAN_BLOCK = 1024
+
+
+def _encode(vectors: np.ndarray, mode: str) -> tuple[np.ndarray, np.ndarray | None]:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if mode == "float16":
+        return vectors.astype(np.float16), None
+    peak = np.abs(vectors).max(axis=1) if len(vectors) else np.zeros(0, np.float32)
+    scales = (peak / 127.0).astype(np.float32)
+    safe = np.where(scales == 0, 1.0, scales)[:, None]
+    codes = np.clip(np.rint(vectors / safe), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+class QuantizedMatrix:
+    """Row-aligned compressed copy of the store's float32 matrix.
+
+    Codes live in a buffer with spare capacity, like the store's float32
+    matrix: :meth:`assign` writes appended rows into the tail past
+    ``len(self)``, which no shallow ``copy.copy`` taken earlier can see, and
+    moves to a fresh buffer before overwriting existing rows.  :meth:`take`
+    always builds new arrays.  A copy is therefore an independent snapshot.
+    """
+
+    def __init__(self, mode: str, codes: np.ndarray, scales: np.ndarray | None) -> None:
+        if mode not in ("float16", "int8"):
+            raise ValueError(f"Unsupported quantization mode: {mode!r}")
+        self.mode = mode
+        self._codes = codes
+        self._scales = scales
+        # Spare-capacity backing arrays of ``_codes`` / ``_scales``; ``None``
+        # while those are memory-mapped or exactly sized.
+        self._code_buf: np.ndarray | None = None
+        self._scale_buf: np.ndarray | None = None
+
+    @classmethod
+    def from_matrix(cls, mat: np.ndarray, mode: str) -> QuantizedMatrix:
+        parts = [
+            _encode(mat[start : start + _SCAN_BLOCK], mode)
+            for start in range(0, mat.shape[0], _SCAN_BLOCK)
+        ]
+        dim = mat.shape[1]
+        dtype = np.float16 if mode == "float16" else np.int8
+        codes = (
+            np.concatenate([c for c, _ in parts])
+            if parts
+            else np.zeros((0, dim), dtype=dtype)
+        )
+        scales = None
+        if mode == "int8":
+            scales = (
+                np.concatenate([s for _, s in parts])
+                if parts
+                else np.zeros(0, dtype=np.float32)
+            )
+        return cls(mode, codes, scales)
+
+    def __len__(self) -> int:
+        return self._codes.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        extra = self._scales.nbytes if self._scales is not None else 0
+        return int(self._codes.nbytes + extra)
+
+    # -- scoring -------------------------------------------------------------
+
+    def scores(self, q: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        """Approximate ``mat[rows] @ q`` (all rows when *rows* is ``None``)."""
+        q = np.asarray(q, dtype=np.float32)
+        n = len(self) if rows is None else len(rows)
+        out = np.empty(n, dtype=np.float32)
+        for start in range(0, n, _SCAN_BLOCK):
+            stop = min(start + _SCAN_BLOCK, n)
+            sel = slice(start, stop) if rows is None else rows[start:stop]
+            out[start:stop] = self._codes[sel].astype(np.float32) @ q
+            if self._scales is not None:
+                out[start:stop] *= self._scales[sel]
+        return out
+
+    def shortlist(
+        self, q: np.ndarray, size: int, rows: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Sorted row positions of the *size* best approximate matches."""
+        scores = self.scores(q, rows)
+        if size < len(scores):
+            best = np.argpartition(scores, -size)[-size:]
+        else:
+            best = np.arange(len(scores))
+        picked = best if rows is None else rows[best]
+        return np.sort(picked)
+
+    # -- maintenance ---------------------------------------------------------
+
+    def assign(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Set codes for *rows* (positions past the end are appended).
+
+        Appending is amortised O(batch); overwriting existing rows copies
+        the codes once so earlier snapshots keep theirs.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return
+        codes, scales = _encode(vectors, self.mode)
+        n = len(self)
+        size = max(n, int(rows.max()) + 1)
+        self._reserve(size, fresh=int(rows.min()) < n)
+        self._code_buf[n:size] = 0
+        self._codes = self._code_buf[:size]
+        self._codes[rows] = codes
+        if self._scales is not None:
+            self._scale_buf[n:size] = 0
+            self._scales = self._scale_buf[:size]
+            self._scales[rows] = scales
+
+    def _reserve(self, size: int, *, fresh: bool) -> None:
+        """Make the backing buffers hold *size* rows, growing geometrically;
+        the first write after loading copies off the memmap once."""
+        n = len(self)
+        if not fresh and self._code_buf is not None and self._code_buf.shape[0] >= size:
+            return
+        capacity = max(size, int(n * 1.5), 64)
+        grown = np.empty((capacity, self._codes.shape[1]), dtype=self._codes.dtype)
+        grown[:n] = self._codes
+        self._code_buf = grown
+        if self._scales is not None:
+            grown_scales = np.empty(capacity, dtype=np.float32)
+            grown_scales[:n] = self._scales
+            self._scale_buf = grown_scales
+
+    def take(self, keep: np.ndarray) -> None:
+        """Keep only rows *keep* (sorted old positions), renumbered."""
+        keep = np.asarray(keep, dtype=np.int64)
+        self._codes = np.array(self._codes[keep])
+        self._code_buf = None
+        if self._scales is not None:
+            self._scales = np.array(self._scales[keep])
+            self._scale_buf = None
+
+    # -- persistence ---------------------------------------------------------
+
+    @staticmethod
+    def _paths(base: str | Path, mode: str) -> tuple[Path, Path]:
+        return Path(f"{base}.{mode}.npy"), Path(f"{base}.{mode}.scale.npy")
+
+    @staticmethod
+    def _meta_path(base: str | Path, mode: str) -> Path:
+        return Path(f"{base}.{mode}.meta.json")
+
+    def save(self, base: str | Path, *, generation: int) -> None:
+        """Write the codes, then ``<base>.<mode>.meta.json`` recording the
+        *generation* of the vector file they were computed from."""
+        codes_path, scales_path = self._paths(base, self.mode)
+        arrays = [(codes_path, self._codes)]
+        if self._scales is not None:
+            arrays.append((scales_path, self._scales))
+        for path, arr in arrays:
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, np.asarray(arr))
+            tmp.replace(path)
+        meta = self._meta_path(base, self.mode)
+        tmp = meta.with_name(meta.name + ".tmp")
+        tmp.write_text(
+            json.dumps({"generation": generation, "rows": len(self)}),
+            encoding="utf-8",
+        )
+        tmp.replace(meta)
+
+    @classmethod
+    def load(
+        cls, base: str | Path, mode: str, rows: int, *, generation: int
+    ) -> QuantizedMatrix | None:
+        """Memory-map saved codes, or ``None`` if missing or out of date.
+
+        Codes saved from another *generation* of the vector file — e.g. a
+        crash between saving the matrix and the codes — are out of date even
+        when the row count matches.
+        """
+        codes_path, scales_path = cls._paths(base, mode)
+        meta_path = cls._meta_path(base, mode)
+        if not codes_path.exists() or not meta_path.exists() or rows == 0:
+            return None
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            return None
+        if meta.get("generation") != generation or meta.get("rows") != rows:
+            return None
+        codes = np.load(codes_path, mmap_mode="r")
+        scales = None
+        if mode == "int8":
+            if not scales_path.exists():
+                return None
+            scales = np.load(scales_path, mmap_mode="r")
+            if scales.shape[0] != rows:
+                return None
+        if codes.shape[0] != rows:
+            return None
+        return cls(mode, codes, scales)
@@ -0,0 +1,151 @@
+"""Binary on-disk format for the vector store.
+
+A store lives under a common *base* path and consists of two files:
+
+- ``<base>.npy`` — float32 ``(n, dim)`` matrix of L2-normalised vectors,
+  written with ``np.save`` and opened read-only via ``np.load(mmap_mode="r")``
+  so the OS page cache holds a single copy shared by every worker process;
+- ``<base>.meta.json`` — ``{"embedding_dim", "generation", "data"}`` where
+  ``data`` holds the per-row records (``__id__``, ``content``, metadata) in
+  matrix order and ``generation`` counts saves, so files derived from the
+  matrix (quantised codes) can tell whether they are current.
+
+``<base>.json`` is the legacy NanoVectorDB file; :func:`load_vector_file`
+migrates it once on first load.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from nano_vectordb.dbs import load_storage
+
+logger = logging.getLogger(__name__)
+
+
+def matrix_path(base: str | Path) -> Path:
+    return Path(f"{base}.npy")
+
+
+def meta_path(base: str | Path) -> Path:
+    return Path(f"{base}.meta.json")
+
+
+def legacy_path(base: str | Path) -> Path:
+    return Path(f"{base}.json")
+
+
+def normalize_rows(mat: np.ndarray) -> np.ndarray:
+    """Return *mat* with every row scaled to unit L2 norm (zero rows kept)."""
+    mat = np.asarray(mat, dtype=np.float32)
+    if mat.size == 0:
+        return mat
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (mat / norms).astype(np.float32, copy=False)
+
+
+def _atomic_write_bytes(path: Path, writer) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        writer(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def save_vector_file(
+    base: str | Path,
+    data: list[dict[str, Any]],
+    matrix: np.ndarray,
+    embedding_dim: int,
+    *,
+    generation: int = 0,
+) -> None:
+    """Atomically write *data* and *matrix* under *base*.
+
+    The matrix is replaced first and the side file second, so a reader that
+    sees the new side file always finds a matrix with matching row count.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32).reshape(-1, embedding_dim)
+    if len(data) != matrix.shape[0]:
+        raise ValueError(
+            f"record/matrix size mismatch: {len(data)} records, "
+            f"{matrix.shape[0]} rows"
+        )
+    _atomic_write_bytes(matrix_path(base), lambda f: np.save(f, matrix))
+    payload = json.dumps(
+        {"embedding_dim": embedding_dim, "generation": generation, "data": data},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    _atomic_write_bytes(meta_path(base), lambda f: f.write(payload))
+
+
+def load_meta(base: str | Path) -> dict[str, Any] | None:
+    """Load the side file under *base*, or ``None`` when it does not exist."""
+    path = meta_path(base)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def migrate_legacy_json(base: str | Path, embedding_dim: int) -> bool:
+    """Convert ``<base>.json`` (NanoVectorDB) into the binary format.
+
+    Returns ``True`` when a migration happened.  The legacy file is left in
+    place so the conversion can be re-run or rolled back by hand.
+    """
+    src = legacy_path(base)
+    if not src.exists():
+        return False
+    storage = load_storage(str(src))
+    if storage["embedding_dim"] != embedding_dim:
+        raise ValueError(
+            f"Embedding dim mismatch in {src}: expected {embedding_dim}, "
+            f"found {storage['embedding_dim']}"
+        )
+    data = list(storage.get("data") or [])
+    matrix = normalize_rows(storage["matrix"]).reshape(-1, embedding_dim)
+    save_vector_file(base, data, matrix, embedding_dim)
+    logger.info("Migrated %d vectors from %s to binary format", len(data), src)
+    return True
+
+
+def load_vector_file(
+    base: str | Path, embedding_dim: int
+) -> tuple[list[dict[str, Any]], np.ndarray, int]:
+    """Load ``(data, matrix, generation)`` from *base*, migrating legacy JSON
+    if needed.
+
+    The returned matrix is a read-only ``np.memmap`` when non-empty; callers
+    must copy before mutating it.
+    """
+    if not meta_path(base).exists() and not migrate_legacy_json(base, embedding_dim):
+        return [], np.zeros((0, embedding_dim), dtype=np.float32), 0
+
+    meta = load_meta(base) or {}
+    dim = int(meta.get("embedding_dim", embedding_dim))
+    if dim != embedding_dim:
+        raise ValueError(
+            f"Embedding dim mismatch in {meta_path(base)}: expected "
+            f"{embedding_dim}, found {dim}"
+        )
+    generation = int(meta.get("generation", 0))
+    data = list(meta.get("data") or [])
+    if not data:
+        return [], np.zeros((0, embedding_dim), dtype=np.float32), generation
+
+    matrix = np.load(matrix_path(base), mmap_mode="r")
+    if matrix.shape != (len(data), embedding_dim):
+        raise ValueError(
+            f"Vector file {matrix_path(base)} has shape {matrix.shape}, "
+            f"expected ({len(data)}, {embedding_dim})"
+        )
+    logger.info("Loaded %d vectors from %s (memory-mapped)", len(data), matrix_path(base))
+    return data, matrix, generation
@@ -0,0 +1,133 @@
+"""Append-only write-ahead log for the vector store.
+
+Every ``upsert`` / ``delete`` is appended to ``<base>.wal`` as one framed
+entry, so a write costs O(batch) instead of rewriting the whole store.  On
+load the log is replayed on top of the base files; compaction rewrites the
+base files and truncates the log.
+
+Entry layout (little-endian)::
+
+    u32 header_len | u32 vector_len | u32 crc32(header + vectors)
+    header  — UTF-8 JSON: {"op": "upsert", "records": [...]} or
+                          {"op": "delete", "ids": [...]}
+    vectors — float32 (len(records), dim) matrix for upserts, empty otherwise
+
+Replay is idempotent (upserts overwrite by id, deletes ignore missing ids),
+so a crash between rewriting the base files and truncating the log is safe.
+A torn or corrupt tail — e.g. from a crash mid-append — ends the replay and
+is cut off so later appends start on a clean frame boundary.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import struct
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_FRAME = struct.Struct("<III")
+
+
+def wal_path(base: str | Path) -> Path:
+    return Path(f"{base}.wal")
+
+
+class VectorWAL:
+    """Append-only log of vector store mutations under ``<base>.wal``."""
+
+    def __init__(self, base: str | Path, embedding_dim: int) -> None:
+        self.path = wal_path(base)
+        self._embedding_dim = embedding_dim
+
+    @property
+    def size(self) -> int:
+        """Current log size in bytes (0 when the file does not exist)."""
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    # -- writing -------------------------------------------------------------
+
+    def append_upsert(
+        self, records: list[dict[str, Any]], vectors: np.ndarray
+    ) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(records), self._embedding_dim):
+            raise ValueError(
+                f"WAL upsert expects ({len(records)}, {self._embedding_dim}) "
+                f"vectors, got {vectors.shape}"
+            )
+        self._append({"op": "upsert", "records": records}, vectors.tobytes())
+
+    def append_delete(self, ids: list[str]) -> None:
+        self._append({"op": "delete", "ids": list(ids)}, b"")
+
+    def _append(self, header: dict[str, Any], payload: bytes) -> None:
+        head = json.dumps(
+            header, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        crc = zlib.crc32(payload, zlib.crc32(head))
+        with open(self.path, "ab") as f:
+            f.write(_FRAME.pack(len(head), len(payload), crc) + head + payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def reset(self) -> None:
+        """Discard all entries (called once they are compacted into the base)."""
+        self.path.unlink(missing_ok=True)
+
+    # -- replay --------------------------------------------------------------
+
+    def replay(self) -> Iterator[tuple[str, Any, np.ndarray | None]]:
+        """Yield ``("upsert", records, vectors)`` / ``("delete", ids, None)``."""
+        if not self.path.exists():
+            return
+        good = 0
+        with open(self.path, "rb") as f:
+            while True:
+                frame = f.read(_FRAME.size)
+                if not frame:
+                    break
+                entry = self._read_entry(f, frame)
+                if entry is None:
+                    logger.warning(
+                        "Truncating corrupt vector WAL tail at byte %d of %s",
+                        good,
+                        self.path,
+                    )
+                    break
+                good = f.tell()
+                yield entry
+        if good < self.size:
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+
+    def _read_entry(
+        self, f, frame: bytes
+    ) -> tuple[str, Any, np.ndarray | None] | None:
+        if len(frame) < _FRAME.size:
+            return None
+        head_len, payload_len, crc = _FRAME.unpack(frame)
+        head = f.read(head_len)
+        payload = f.read(payload_len)
+        if len(head) < head_len or len(payload) < payload_len:
+            return None
+        if zlib.crc32(payload, zlib.crc32(head)) != crc:
+            return None
+        header = json.loads(head.decode("utf-8"))
+        if header.get("op") == "delete":
+            return "delete", header.get("ids") or [], None
+        records = header.get("records") or []
+        vectors = np.frombuffer(payload, dtype=np.float32).reshape(
+            len(records), self._embedding_dim
+        )
+        return "upsert", records, vectors
@@ -11,6 +11,7 @@ from langchain_openai import ChatOpenAI
 
 from kg_rag.config import settings
 from kg_rag.agent.prompts import CYPHER_GENERATION_PROMPT
+from kg_rag.llm_limiter import ainvoke_limited
 from kg_rag.models import ENTITY_TYPE_LABELS
 from kg_rag.storage.base import BaseGraphStore
 from kg_rag.utils import strip_code_fences
@@ -184,6 +185,7 @@ def create_graph_query(store: BaseGraphStore) -> BaseTool:
         base_url=settings.llm_base_url,
         temperature=0,
         request_timeout=settings.llm_request_timeout,
+        max_retries=0,
     )
 
     @tool
@@ -202,7 +204,7 @@ def create_graph_query(store: BaseGraphStore) -> BaseTool:
         prompt = CYPHER_GENERATION_PROMPT.format(
             schema=_GRAPH_SCHEMA, question=question
         )
-        response = await llm.ainvoke(prompt)
+        response = await ainvoke_limited(llm, prompt)
         candidate = response.content.strip()
 
         def _postprocess(raw: str) -> tuple[str, str | None]:
@@ -221,7 +223,7 @@ def create_graph_query(store: BaseGraphStore) -> BaseTool:
                 cypher=cypher,
                 issue=issue,
             )
-            repair = await llm.ainvoke(repair_prompt)
+            repair = await ainvoke_limited(llm, repair_prompt)
             cypher, issue = _postprocess(repair.content.strip())
             if issue is not None:
                 if issue == "unsafe keyword detected":
@@ -246,7 +248,7 @@ def create_graph_query(store: BaseGraphStore) -> BaseTool:
                 cypher=cypher,
                 issue=f"{type(e).__name__}: {e}",
             )
-            repair = await llm.ainvoke(repair_prompt)
+            repair = await ainvoke_limited(llm, repair_prompt)
             cypher2, issue2 = _postprocess(repair.content.strip())
             if issue2 is not None:
                 if issue2 == "unsafe keyword detected":
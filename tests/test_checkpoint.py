@@ -0,0 +1,52 @@
+"""Unit tests for the ingest-dir stage checkpoints."""
+
+from __future__ import annotations
+
+
+def _open(tmp_path, *, resume, chunking=(512, 64)):
+    from kg_rag.ingest.checkpoint import IngestCheckpoint, checkpoint_path
+
+    return IngestCheckpoint.open(
+        checkpoint_path(tmp_path), list(chunking), resume=resume
+    )
+
+
+class TestIngestCheckpoint:
+    def test_resume_continues_the_last_attempt(self, tmp_path):
+        cp = _open(tmp_path, resume=False)
+        cp.mark("a.md", "h1", "chunked", fresh=["c0", "c1"])
+        cp.mark("a.md", "h1", "extracted", entities=[], relations=[], failed=["c1"])
+        cp.mark("b.md", "h2", "chunked", fresh=["c9"])
+
+        resumed = _open(tmp_path, resume=True)
+        attempt = resumed.attempt("a.md", "h1")
+        assert attempt["stage"] == "extracted"
+        assert attempt["fresh"] == ["c0", "c1"] and attempt["failed"] == ["c1"]
+        assert resumed.attempt("b.md", "h2")["stage"] == "chunked"
+
+    def test_chunked_starts_a_new_attempt(self, tmp_path):
+        cp = _open(tmp_path, resume=False)
+        cp.mark("a.md", "h1", "chunked", fresh=["c0", "c1"])
+        cp.mark("a.md", "h1", "graph", failed=["c1"])
+        cp.mark("a.md", "h1", "chunked", fresh=["c1"])
+
+        attempt = _open(tmp_path, resume=True).attempt("a.md", "h1")
+        assert attempt["stage"] == "chunked"
+        assert attempt["fresh"] == ["c1"] and "failed" not in attempt
+
+    def test_edited_or_rechunked_files_start_over(self, tmp_path):
+        _open(tmp_path, resume=False).mark("a.md", "h1", "chunked", fresh=[])
+        assert _open(tmp_path, resume=True).attempt("a.md", "h2") is None
+        assert _open(tmp_path, resume=True, chunking=(256, 0)).attempt("a.md", "h1") is None
+
+    def test_torn_line_and_fresh_runs(self, tmp_path):
+        from kg_rag.ingest.checkpoint import checkpoint_path
+
+        _open(tmp_path, resume=False).mark("a.md", "h1", "chunked", fresh=[])
+        with open(checkpoint_path(tmp_path), "a", encoding="utf-8") as f:
+            f.write('{"file": "a.md", "stage": "extr')
+        assert _open(tmp_path, resume=True).attempt("a.md", "h1")["stage"] == "chunked"
+
+        # without --resume the journal starts empty
+        assert _open(tmp_path, resume=False).attempts == {}
+        assert not checkpoint_path(tmp_path).exists()
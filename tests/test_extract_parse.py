@@ -2,18 +2,21 @@
 
 import json
 from types import SimpleNamespace
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, patch
 
 import pytest
 
 from kg_rag.ingest.extract import (
+    _extract_one_chunk,
     _parse_extraction,
     dedup_by_alias_cross_ref,
     dedup_by_llm,
     merge_entities,
     remap_relations,
 )
-from kg_rag.models import Entity, Relation, make_entity_id
+from kg_rag.ingest.extraction_cache import ExtractionCache
+from kg_rag.llm_limiter import AdaptiveLimiter
+from kg_rag.models import Entity, Relation, TextChunk, make_entity_id
 
 
 class TestParseExtraction:
@@ -479,3 +482,103 @@ class TestEndpointValidation:
         assert len(relations) == 1
         assert relations[0].source == "BFS"
         assert relations[0].target == "Queue"
+
+
+class TestExtractionCache:
+    """Replaying extraction responses from the on-disk cache."""
+
+    _RAW = json.dumps({
+        "entities": [{"name": "BFS", "type": "Algorithm"}],
+        "relations": [],
+    })
+
+    def _mock_llm(self, content: str, model: str = "m1") -> AsyncMock:
+        llm = AsyncMock()
+        llm.model_name = model
+        llm.ainvoke.return_value = SimpleNamespace(content=content)
+        return llm
+
+    @pytest.mark.asyncio
+    async def test_second_extraction_replays_without_llm(self, tmp_path):
+        cache = ExtractionCache(tmp_path / "x.sqlite3")
+        limiter = AdaptiveLimiter("t", initial=1, maximum=1, latency_target_s=60)
+        chunk = TextChunk(id="c1", content="BFS uses a queue.")
+
+        llm = self._mock_llm(self._RAW)
+        first = await _extract_one_chunk(chunk, llm, limiter, cache)
+        replay_llm = self._mock_llm("")
+        again = await _extract_one_chunk(
+            chunk.model_copy(update={"id": "c2"}), replay_llm, limiter, cache
+        )
+
+        assert [e.name for e in first[0]] == [e.name for e in again[0]] == ["BFS"]
+        # provenance comes from the chunk being parsed, not the cached one
+        assert again[0][0].source_chunks == ["c2"]
+        replay_llm.ainvoke.assert_not_awaited()
+        assert cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_sqlite_connections_are_closed(self, tmp_path):
+        import sqlite3
+
+        opened: list[sqlite3.Connection] = []
+        connect = sqlite3.connect
+
+        def tracking_connect(*args, **kwargs):
+            opened.append(connect(*args, **kwargs))
+            return opened[-1]
+
+        cache = ExtractionCache(tmp_path / "x.sqlite3")
+        with patch("kg_rag.ingest.extraction_cache.sqlite3.connect", tracking_connect):
+            await cache.put("k", "m1", self._RAW)
+            assert await cache.get("k") == self._RAW
+        assert len(opened) == 2
+        for conn in opened:
+            with pytest.raises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+
+    @pytest.mark.asyncio
+    async def test_model_is_part_of_the_key(self, tmp_path):
+        cache = ExtractionCache(tmp_path / "x.sqlite3")
+        limiter = AdaptiveLimiter("t", initial=1, maximum=1, latency_target_s=60)
+        chunk = TextChunk(id="c1", content="BFS uses a queue.")
+        await _extract_one_chunk(chunk, self._mock_llm(self._RAW), limiter, cache)
+
+        other = self._mock_llm(self._RAW, model="m2")
+        await _extract_one_chunk(chunk, other, limiter, cache)
+        other.ainvoke.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_unparseable_responses_replay_without_llm(self, tmp_path):
+        cache = ExtractionCache(tmp_path / "x.sqlite3")
+        limiter = AdaptiveLimiter("t", initial=1, maximum=1, latency_target_s=60)
+        chunk = TextChunk(id="c1", content="BFS uses a queue.")
+        llm = self._mock_llm("not json")
+        assert await _extract_one_chunk(chunk, llm, limiter, cache) == ([], [])
+        assert llm.ainvoke.await_count == 2  # first try + format retry
+        # each call is its own admission, not one slot spanning both
+        assert limiter.calls == 2 and limiter.in_flight == 0
+
+        replay_llm = self._mock_llm(self._RAW)
+        assert await _extract_one_chunk(chunk, replay_llm, limiter, cache) == ([], [])
+        replay_llm.ainvoke.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_retry_response_is_cached_under_its_own_key(self, tmp_path):
+        cache = ExtractionCache(tmp_path / "x.sqlite3")
+        limiter = AdaptiveLimiter("t", initial=1, maximum=1, latency_target_s=60)
+        chunk = TextChunk(id="c1", content="BFS uses a queue.")
+        llm = self._mock_llm("")
+        llm.ainvoke.side_effect = [
+            SimpleNamespace(content="not json"),
+            SimpleNamespace(content=self._RAW),
+        ]
+        first = await _extract_one_chunk(chunk, llm, limiter, cache)
+        assert [e.name for e in first[0]] == ["BFS"]
+
+        # both responses replay: the unparseable first try, then the retry
+        replay_llm = self._mock_llm("")
+        again = await _extract_one_chunk(chunk, replay_llm, limiter, cache)
+        assert [e.name for e in again[0]] == ["BFS"]
+        replay_llm.ainvoke.assert_not_awaited()
+        assert cache.stats()["hits"] == 2
@@ -0,0 +1,145 @@
+"""Unit tests for the read-through graph cache."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+
+def _make_cache(**kwargs):
+    from kg_rag.storage.graph_cache import CachedGraphStore
+
+    inner = AsyncMock()
+    inner.get_node.return_value = {"entity_id": "n1", "name": "BFS"}
+    inner.get_node_edges.return_value = [{"source": "n1", "target": "n2", "type": "USES"}]
+    inner.query_cypher.return_value = [{"id": "n1"}]
+    kwargs.setdefault("max_entries", 16)
+    return CachedGraphStore(inner, **kwargs), inner
+
+
+class TestReadThrough:
+    @pytest.mark.asyncio
+    async def test_repeated_reads_hit_memory(self):
+        cache, inner = _make_cache()
+        for _ in range(3):
+            assert (await cache.get_node("n1"))["name"] == "BFS"
+            assert len(await cache.get_node_edges("n1")) == 1
+            assert await cache.query_cypher("MATCH (e) RETURN e", {"q": 1}) == [{"id": "n1"}]
+
+        assert inner.get_node.await_count == 1
+        assert inner.get_node_edges.await_count == 1
+        assert inner.query_cypher.await_count == 1
+        assert cache.stats()["hits"] == 6
+
+    @pytest.mark.asyncio
+    async def test_params_are_part_of_the_key(self):
+        cache, inner = _make_cache()
+        await cache.query_cypher("MATCH (e) RETURN e", {"q": 1})
+        await cache.query_cypher("MATCH (e) RETURN e", {"q": 2})
+        assert inner.query_cypher.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_returned_rows_are_copies(self):
+        cache, _ = _make_cache()
+        (row,) = await cache.query_cypher("MATCH (e) RETURN e")
+        row["id"] = "mutated"
+        assert await cache.query_cypher("MATCH (e) RETURN e") == [{"id": "n1"}]
+
+    @pytest.mark.asyncio
+    async def test_lru_bound(self):
+        cache, inner = _make_cache(max_entries=2)
+        for nid in ("a", "b", "c", "a"):
+            await cache.get_node(nid)
+        assert inner.get_node.await_count == 4  # "a" was evicted by "c"
+        assert cache.stats()["entries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        from kg_rag.storage import graph_cache
+
+        cache, inner = _make_cache(ttl_s=10)
+        with patch.object(graph_cache.time, "monotonic", return_value=100.0):
+            await cache.get_node("n1")
+        with patch.object(graph_cache.time, "monotonic", return_value=105.0):
+            await cache.get_node("n1")
+        assert inner.get_node.await_count == 1
+        with patch.object(graph_cache.time, "monotonic", return_value=111.0):
+            await cache.get_node("n1")
+        assert inner.get_node.await_count == 2
+
+
+class TestInvalidation:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "write",
+        [
+            lambda c: c.upsert_node("n1", {"name": "x"}),
+            lambda c: c.upsert_nodes_bulk([("n1", {"name": "x"})]),
+            lambda c: c.delete_node("n1"),
+            lambda c: c.upsert_edge("n1", "n2", {"type": "USES"}),
+            lambda c: c.upsert_edges_bulk([("n1", "n2", {"type": "USES"})]),
+            lambda c: c.query_cypher("MATCH (n {entity_id: $eid}) SET n.x = 1"),
+            lambda c: c.remove_chunk_sources(["c1"]),
+        ],
+    )
+    async def test_writes_bump_version(self, write):
+        cache, inner = _make_cache()
+        await cache.get_node("n1")
+        await write(cache)
+        assert cache.version == 1
+        await cache.get_node("n1")
+        assert inner.get_node.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_write_still_invalidates(self):
+        cache, inner = _make_cache()
+        inner.upsert_node.side_effect = RuntimeError("Neo4j down")
+        with pytest.raises(RuntimeError):
+            await cache.upsert_node("n1", {})
+        assert cache.version == 1
+
+    @pytest.mark.asyncio
+    async def test_write_queries_are_not_cached(self):
+        cache, inner = _make_cache()
+        for _ in range(2):
+            await cache.query_cypher("MATCH (n) DETACH DELETE n")
+        assert inner.query_cypher.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_read_overlapping_a_write_is_not_stored(self):
+        cache, inner = _make_cache()
+        release = asyncio.Event()
+
+        async def slow_get(node_id):
+            await release.wait()
+            return {"entity_id": node_id, "name": "stale"}
+
+        inner.get_node.side_effect = slow_get
+        reader = asyncio.create_task(cache.get_node("n1"))
+        await asyncio.sleep(0)
+        await cache.upsert_node("n1", {"name": "fresh"})
+        release.set()
+        assert (await reader)["name"] == "stale"
+
+        inner.get_node.side_effect = None
+        assert (await cache.get_node("n1"))["name"] == "BFS"
+
+
+class TestReadApi:
+    @pytest.mark.asyncio
+    async def test_read_api_is_cached_per_arguments(self):
+        cache, inner = _make_cache()
+        inner.top_entities.return_value = [{"id": "n1"}]
+        inner.graph_stats.return_value = {"entities_by_type": {"Algorithm": 1}}
+
+        for _ in range(2):
+            await cache.top_entities(10, "Algorithm")
+            stats = await cache.graph_stats()
+        await cache.top_entities(10)
+        stats["entities_by_type"]["Algorithm"] = 99
+
+        assert inner.top_entities.await_count == 2
+        assert inner.graph_stats.await_count == 1
+        assert (await cache.graph_stats())["entities_by_type"] == {"Algorithm": 1}
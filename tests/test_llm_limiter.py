@@ -0,0 +1,191 @@
+"""Unit tests for the adaptive LLM concurrency limiter."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from kg_rag.llm_limiter import (
+    AdaptiveLimiter,
+    ainvoke_limited,
+    call_limited,
+    retry_after_s,
+    shared_limiter,
+    stream_limited,
+)
+
+
+def _rate_limited(**headers) -> openai.RateLimitError:
+    request = httpx.Request("POST", "http://llm.test/v1/chat/completions")
+    response = httpx.Response(429, headers=headers, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def _limiter(**kwargs) -> AdaptiveLimiter:
+    kwargs.setdefault("initial", 2)
+    kwargs.setdefault("maximum", 8)
+    kwargs.setdefault("latency_target_s", 60)
+    return AdaptiveLimiter("test", **kwargs)
+
+
+class TestAdaptiveLimiter:
+    @pytest.mark.asyncio
+    async def test_grows_additively_within_the_window(self):
+        limiter = _limiter(initial=2, maximum=4)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                assert limiter.in_flight <= limiter.limit
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*(call() for _ in range(6)))
+        assert peak == 2
+        # six healthy calls at window 2: +1/2 each until the next slot
+        assert 3 <= limiter.window <= 4 and limiter.limit >= 3
+
+        await asyncio.gather(*(call() for _ in range(40)))
+        assert limiter.window == 4 and peak == 4
+        assert limiter.stats()["calls"] == 46
+
+    @pytest.mark.asyncio
+    async def test_slow_calls_hold_the_window(self):
+        limiter = _limiter(initial=2, latency_target_s=0)
+        for _ in range(5):
+            async with limiter.slot():
+                await asyncio.sleep(0.001)
+        assert limiter.window == 2
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_burst_cuts_once(self):
+        limiter = _limiter(initial=8)
+
+        async def call():
+            async with limiter.slot():
+                await asyncio.sleep(0)
+                raise _rate_limited()
+
+        results = await asyncio.gather(
+            *(call() for _ in range(4)), return_exceptions=True
+        )
+        assert all(isinstance(r, openai.RateLimitError) for r in results)
+        assert limiter.cuts == 1 and limiter.window == 4
+
+        # a call started after the cut is a new round
+        with pytest.raises(openai.RateLimitError):
+            await call()
+        assert limiter.cuts == 2 and limiter.window == 2
+
+    @pytest.mark.asyncio
+    async def test_timeouts_cut_other_errors_do_not(self):
+        limiter = _limiter(initial=4)
+        with pytest.raises(ValueError):
+            async with limiter.slot():
+                raise ValueError("bad json")
+        assert limiter.window == 4 and limiter.error_rate > 0
+
+        with pytest.raises(TimeoutError):
+            async with limiter.slot():
+                raise TimeoutError
+        assert limiter.window == 2 and limiter.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_retry_after_pauses_new_calls(self):
+        limiter = _limiter(initial=4)
+        with pytest.raises(openai.RateLimitError):
+            async with limiter.slot():
+                raise _rate_limited(**{"retry-after-ms": "50"})
+
+        start = time.monotonic()
+        async with limiter.slot():
+            pass
+        assert time.monotonic() - start >= 0.04
+        assert limiter.stats()["paused_s"] == 0
+
+    @pytest.mark.asyncio
+    async def test_each_slot_times_its_own_call(self):
+        limiter = _limiter(initial=4)
+        async with limiter.slot():
+            # a nested call on the same task must not overwrite the outer start
+            async with limiter.slot():
+                pass
+            assert limiter.latency_s < 0.02
+            await asyncio.sleep(0.05)
+        assert limiter.calls == 2 and limiter.latency_s >= 0.008
+
+        # sequential slots on one task are independent admissions
+        for _ in range(3):
+            async with limiter.slot():
+                pass
+        assert limiter.calls == 5 and limiter.in_flight == 0
+
+    def test_retry_after_parsing(self):
+        assert retry_after_s(_rate_limited(**{"retry-after": "3"})) == 3.0
+        assert retry_after_s(_rate_limited(**{"retry-after-ms": "250"})) == 0.25
+        assert retry_after_s(_rate_limited(**{"retry-after": "soon"})) is None
+        assert retry_after_s(_rate_limited()) is None
+        assert retry_after_s(TimeoutError()) is None
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay, *args, **kwargs):
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+
+
+class TestLimitedCalls:
+    @pytest.mark.asyncio
+    async def test_retries_take_a_new_slot(self, no_backoff):
+        limiter = shared_limiter("http://retry.test")
+        seen = []
+
+        async def call():
+            seen.append(limiter.in_flight)
+            if len(seen) == 1:
+                raise _rate_limited()
+            return "ok"
+
+        assert await call_limited(call, base_url="http://retry.test") == "ok"
+        assert seen == [1, 1] and limiter.in_flight == 0
+        assert limiter.cuts == 1 and limiter.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_ainvoke_uses_the_llm_endpoint(self):
+        async def ainvoke(messages):
+            return messages
+
+        llm = SimpleNamespace(openai_api_base="http://chat.test", ainvoke=ainvoke)
+        assert await ainvoke_limited(llm, ["hi"]) == ["hi"]
+        assert shared_limiter("http://chat.test").calls == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_retries_only_before_output(self, no_backoff):
+        opened = 0
+
+        async def flaky():
+            nonlocal opened
+            opened += 1
+            if opened == 1:
+                raise TimeoutError
+            yield "a"
+            if opened == 2:
+                raise TimeoutError
+            yield "b"
+
+        got = []
+        with pytest.raises(TimeoutError):
+            async for item in stream_limited(flaky, base_url="http://stream.test"):
+                got.append(item)
+        assert got == ["a"] and opened == 2
+        assert shared_limiter("http://stream.test").in_flight == 0
@@ -0,0 +1,70 @@
+"""Unit tests for the incremental ingest manifest."""
+
+from __future__ import annotations
+
+from kg_rag.models import TextChunk
+
+
+def _chunks(*contents):
+    return [
+        TextChunk(id=f"c{i}", content=text, doc_id="doc")
+        for i, text in enumerate(contents)
+    ]
+
+
+def _manifest(tmp_path, chunking=(512, 64)):
+    from kg_rag.ingest.manifest import IngestManifest, manifest_path
+
+    return IngestManifest.load(manifest_path(tmp_path), list(chunking))
+
+
+class TestIngestManifest:
+    def test_round_trip_and_unchanged_file(self, tmp_path):
+        doc = tmp_path / "doc.md"
+        manifest = _manifest(tmp_path)
+        assert not manifest.is_current(doc, "a b")
+        manifest.record(doc, "a b", _chunks("a", "b"))
+        manifest.save()
+
+        reloaded = _manifest(tmp_path)
+        assert reloaded.is_current(doc, "a b")
+        assert not reloaded.is_current(doc, "a c")
+        # other chunker settings re-ingest everything
+        assert not _manifest(tmp_path, (256, 32)).is_current(doc, "a b")
+
+    def test_plan_keeps_only_changed_chunks(self, tmp_path):
+        doc = tmp_path / "doc.md"
+        manifest = _manifest(tmp_path)
+        manifest.record(doc, "a b c", _chunks("a", "b", "c"))
+
+        fresh, stale = manifest.plan(doc, _chunks("a", "B"))
+        assert [c.id for c in fresh] == ["c1"]
+        assert stale == ["c1", "c2"]
+
+    def test_failed_chunks_are_retried(self, tmp_path):
+        doc = tmp_path / "doc.md"
+        manifest = _manifest(tmp_path)
+        manifest.record(doc, "a b", _chunks("a", "b"), failed={"c1"})
+
+        assert not manifest.is_current(doc, "a b")
+        fresh, stale = manifest.plan(doc, _chunks("a", "b"))
+        assert [c.id for c in fresh] == ["c1"]
+        assert stale == []
+
+    def test_removed_files(self, tmp_path):
+        kept, gone = tmp_path / "kept.md", tmp_path / "gone.md"
+        manifest = _manifest(tmp_path)
+        manifest.record(kept, "a", _chunks("a"))
+        manifest.record(gone, "b", _chunks("b", "c"))
+        manifest.record(tmp_path / "sub" / "other.md", "d", _chunks("d"))
+
+        (key,) = manifest.missing_under(tmp_path, [kept])
+        assert key == manifest.key(gone)
+        assert manifest.forget(key) == ["c0", "c1"]
+        assert manifest.forget(key) == []
+
+    def test_unreadable_manifest_starts_empty(self, tmp_path):
+        from kg_rag.ingest.manifest import manifest_path
+
+        manifest_path(tmp_path).write_text("{not json", encoding="utf-8")
+        assert _manifest(tmp_path).files == {}
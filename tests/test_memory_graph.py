@@ -0,0 +1,364 @@
+"""Unit tests for the embedded in-memory graph backend."""
+
+from __future__ import annotations
+
+import dataclasses
+from unittest.mock import patch
+
+import pytest
+
+
+async def _seed(base):
+    from kg_rag.storage.memory_graph import MemoryGraphStore
+
+    store = MemoryGraphStore(base)
+    await store.initialize()
+    await store.upsert_nodes_bulk(
+        [
+            ("bfs", {"label": "Algorithm", "name": "BFS", "aliases": ["广度优先搜索"]}),
+            ("dfs", {"label": "Algorithm", "name": "DFS"}),
+            ("graph", {"label": "DataStructure", "name": "Graph"}),
+            ("queue", {"label": "DataStructure", "name": "Queue"}),
+            ("odd", {"label": "Weird", "name": "Oddity"}),
+            ("u1", {"label": "User"}),
+        ]
+    )
+    await store.upsert_edges_bulk(
+        [
+            ("bfs", "queue", {"type": "USES", "weight": 0.9}),
+            ("bfs", "graph", {"type": "APPLIES_TO"}),
+            ("dfs", "graph", {"type": "APPLIES_TO"}),
+            ("graph", "odd", {"type": "FOOBAR"}),
+            ("u1", "bfs", {"type": "MASTERED", "confidence": 0.9}),
+            ("u1", "dfs", {"type": "WEAK_AT", "confidence": 0.4}),
+        ]
+    )
+    return store
+
+
+class TestCrud:
+    @pytest.mark.asyncio
+    async def test_node_labels_follow_neo4j_rules(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        assert (await store.get_node("bfs"))["type"] == "Algorithm"
+        assert (await store.get_node("odd"))["type"] == "Weird"
+        # users are not entities
+        assert await store.get_node("u1") is None
+
+    @pytest.mark.asyncio
+    async def test_upsert_merges_properties(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        await store.upsert_node("bfs", {"label": "Entity", "description": "d"})
+        node = await store.get_node("bfs")
+        assert node["name"] == "BFS" and node["description"] == "d"
+        assert node["type"] == "Algorithm"
+
+        await store.upsert_edge("bfs", "queue", {"type": "USES", "description": "x"})
+        edge = await store.get_edge("bfs", "queue")
+        assert edge == {"weight": 0.9, "description": "x", "type": "USES"}
+
+    @pytest.mark.asyncio
+    async def test_unknown_rel_type_remapped(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        edge = await store.get_edge("graph", "odd")
+        assert edge["type"] == "RELATED_TO"
+        assert edge["original_type"] == "FOOBAR"
+
+    @pytest.mark.asyncio
+    async def test_edge_to_missing_endpoint_is_skipped(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        await store.upsert_edge("bfs", "missing", {"type": "USES"})
+        # profile edges need a User source, not an entity with that id
+        await store.upsert_edge("bfs", "dfs", {"type": "MASTERED"})
+        assert not await store.has_edge("bfs", "missing")
+        assert not await store.has_edge("bfs", "dfs")
+
+    @pytest.mark.asyncio
+    async def test_delete_detaches_edges(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        await store.delete_node("graph")
+        assert not await store.has_node("graph")
+        assert await store.get_node_edges("dfs") == []
+        stats = await store.graph_stats()
+        assert stats["relations_by_type"] == {"USES": 1}
+
+    @pytest.mark.asyncio
+    async def test_query_cypher_not_supported(self, tmp_path):
+        from kg_rag.storage.memory_graph import MemoryGraphStore
+
+        store = MemoryGraphStore(tmp_path / "g")
+        assert store.supports_cypher is False
+        # Cypher is a capability of CypherGraphStore, not a stub here
+        assert not hasattr(store, "query_cypher")
+        assert not hasattr(store, "stream_cypher")
+
+
+class TestReadApi:
+    @pytest.mark.asyncio
+    async def test_top_entities_by_degree(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        rows = await store.top_entities(2)
+        # graph: 3 edges; bfs: 2 edges + 1 profile edge
+        assert [r["id"] for r in rows] == ["bfs", "graph"]
+        algos = await store.top_entities(10, "Algorithm")
+        assert {r["id"] for r in algos} == {"bfs", "dfs"}
+        assert algos[0] == {
+            "id": "bfs",
+            "label": "BFS",
+            "type": "Algorithm",
+            "description": "",
+            "aliases": ["广度优先搜索"],
+        }
+
+    @pytest.mark.asyncio
+    async def test_edges_among(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        rows = await store.edges_among(["bfs", "graph", "queue", "u1"])
+        assert {(r["source"], r["target"], r["type"]) for r in rows} == {
+            ("bfs", "queue", "USES"),
+            ("bfs", "graph", "APPLIES_TO"),
+        }
+        (uses,) = [r for r in rows if r["type"] == "USES"]
+        assert uses["weight"] == 0.9 and uses["description"] == ""
+
+    @pytest.mark.asyncio
+    async def test_search_matches_names_and_aliases(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        assert [r["id"] for r in await store.search_entities("bf")] == ["bfs"]
+        assert [r["id"] for r in await store.search_entities("广度")] == ["bfs"]
+        assert await store.search_entities("bf", "DataStructure") == []
+
+    @pytest.mark.asyncio
+    async def test_neighborhood_by_depth(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+
+        async def ids(depth, **kw):
+            hood = await store.neighborhood("bfs", depth, **kw)
+            return [r["id"] for r in hood["nodes"]], hood
+
+        one, hood = await ids(1)
+        assert one[0] == "bfs" and set(one[1:]) == {"queue", "graph"}
+        assert not hood["truncated"]
+        # edges among the returned nodes only, user edges excluded
+        assert {(e["source"], e["target"]) for e in hood["edges"]} == {
+            ("bfs", "queue"), ("bfs", "graph"),
+        }
+        two, _ = await ids(2)
+        assert set(two[1:]) == {"queue", "graph", "dfs", "odd"}
+        three, hood = await ids(3, limit=2)
+        assert len(three) == 3 and hood["truncated"]
+        assert await store.neighborhood("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_neighborhood_fanout_keeps_hubs(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        hood = await store.neighborhood("bfs", 2, fanout=1)
+        # level 1 keeps graph (degree 3) over queue (degree 1)
+        assert [r["id"] for r in hood["nodes"]][:2] == ["bfs", "graph"]
+        assert hood["truncated"]
+
+    @pytest.mark.asyncio
+    async def test_graph_stats_excludes_profile_edges(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        stats = await store.graph_stats()
+        assert stats["entities_by_type"] == {
+            "Algorithm": 2, "DataStructure": 2, "Weird": 1,
+        }
+        assert stats["relations_by_type"] == {
+            "USES": 1, "APPLIES_TO": 2, "RELATED_TO": 1,
+        }
+
+    @pytest.mark.asyncio
+    async def test_summary_tracks_writes(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        assert [r["id"] for r in await store.top_entities(1)] == ["bfs"]
+
+        # retype, new edges, a delete: counters and degree order follow
+        await store.upsert_node("odd", {"label": "Algorithm"})
+        await store.upsert_edge("odd", "queue", {"type": "USES"})
+        await store.upsert_edge("odd", "dfs", {"type": "USES"})
+        await store.upsert_edge("odd", "bfs", {"type": "USES"})
+        await store.upsert_edge("u1", "odd", {"type": "MASTERED"})
+        await store.delete_node("graph")
+        assert [r["id"] for r in await store.top_entities(1)] == ["odd"]
+
+        stats = await store.graph_stats()
+        await store.refresh_derived()
+        assert stats == await store.graph_stats()
+        assert stats == {
+            "entities_by_type": {"Algorithm": 3, "DataStructure": 1},
+            "relations_by_type": {"USES": 4},
+        }
+
+    @pytest.mark.asyncio
+    async def test_user_relations_feed_read_profile(self, tmp_path):
+        from kg_rag.memory.profile import read_profile
+
+        store = await _seed(tmp_path / "g")
+        rows = await store.get_user_relations("u1")
+        assert [(r["rel_type"], r["name"]) for r in rows] == [
+            ("MASTERED", "BFS"), ("WEAK_AT", "DFS"),
+        ]
+        out = await read_profile("u1", store)
+        assert "- BFS (confidence=0.9)" in out
+
+
+class TestMerge:
+    @pytest.mark.asyncio
+    async def test_edges_text_and_profile_move_to_target(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        await store.upsert_node("dfs", {"label": "Algorithm", "description": "deep"})
+        result = await store.merge_entities(["dfs", "missing"], "bfs")
+
+        assert result == {"merged": ["dfs"], "missing": ["missing"], "edges": 2}
+        assert not await store.has_node("dfs")
+        node = await store.get_node("bfs")
+        assert node["description"] == "deep"
+        assert node["aliases"] == ["广度优先搜索", "DFS"]
+        # dfs -APPLIES_TO-> graph already existed on bfs; the profile edge moved
+        assert await store.get_edge("bfs", "graph") == {"type": "APPLIES_TO"}
+        rels = await store.get_user_relations("u1")
+        assert [(r["rel_type"], r["entity"]) for r in rels] == [
+            ("MASTERED", "bfs"), ("WEAK_AT", "bfs"),
+        ]
+        assert [r["id"] for r in await store.search_entities("dfs")] == ["bfs"]
+        stats = await store.graph_stats()
+        assert stats["entities_by_type"] == {"Algorithm": 1, "DataStructure": 2, "Weird": 1}
+        assert stats["relations_by_type"] == {"USES": 1, "APPLIES_TO": 1, "RELATED_TO": 1}
+
+    @pytest.mark.asyncio
+    async def test_bulk_follows_merged_neighbours(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        # queue -> dfs and bfs -> graph: the bfs-queue edge lands on dfs-graph
+        result = await store.merge_entities_bulk([(["queue"], "dfs"), (["bfs"], "graph")])
+        assert sorted(result["merged"]) == ["bfs", "queue"]
+        assert await store.get_edge("graph", "dfs") == {"weight": 0.9, "type": "USES"}
+        # bfs -APPLIES_TO-> graph became a self-loop and was dropped
+        assert not await store.has_edge("graph", "graph")
+
+    @pytest.mark.asyncio
+    async def test_missing_target_skips_group(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        result = await store.merge_entities(["dfs"], "nope")
+        assert result == {"merged": [], "missing": ["nope"], "edges": 0}
+        assert await store.has_node("dfs")
+
+    def test_check_merge_groups(self):
+        from kg_rag.storage.base import check_merge_groups
+
+        assert check_merge_groups([(["a", "a", "t"], "t"), (["a"], "t")]) == [
+            (["a"], "t"),
+        ]
+        with pytest.raises(ValueError, match="two targets"):
+            check_merge_groups([(["a"], "t"), (["a"], "u")])
+        with pytest.raises(ValueError, match="merged away and kept"):
+            check_merge_groups([(["a"], "t"), (["t"], "u")])
+
+
+class TestChunkSources:
+    @pytest.mark.asyncio
+    async def test_upserts_union_and_merges_absorb_source_chunks(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        await store.upsert_node("bfs", {"label": "Algorithm", "source_chunks": ["c1"]})
+        await store.upsert_node("bfs", {"label": "Algorithm", "source_chunks": ["c2", "c1"]})
+        await store.upsert_node("bfs", {"label": "Algorithm", "description": "x"})
+        assert (await store.get_node("bfs"))["source_chunks"] == ["c1", "c2"]
+
+        await store.upsert_node("dfs", {"label": "Algorithm", "source_chunks": ["c3"]})
+        await store.merge_entities(["dfs"], "bfs")
+        assert (await store.get_node("bfs"))["source_chunks"] == ["c1", "c2", "c3"]
+        # a target without provenance does not acquire any
+        await store.upsert_node("queue", {"label": "DataStructure", "source_chunks": ["c4"]})
+        await store.merge_entities(["queue"], "graph")
+        assert "source_chunks" not in await store.get_node("graph")
+
+    @pytest.mark.asyncio
+    async def test_remove_chunk_sources_deletes_orphans(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        await store.upsert_node("bfs", {"label": "Algorithm", "source_chunks": ["c1", "c2"]})
+        await store.upsert_node("queue", {"label": "DataStructure", "source_chunks": ["c1"]})
+
+        result = await store.remove_chunk_sources(["c1", "c9"])
+        assert result == {"updated": 1, "deleted": ["queue"]}
+        assert (await store.get_node("bfs"))["source_chunks"] == ["c2"]
+        assert not await store.has_node("queue")
+        # entities without provenance are never orphans
+        assert await store.has_node("graph")
+        assert (await store.graph_stats())["relations_by_type"] == {
+            "APPLIES_TO": 2, "RELATED_TO": 1,
+        }
+
+    @pytest.mark.asyncio
+    async def test_chunk_index_follows_merges_deletes_and_reloads(self, tmp_path):
+        store = await _seed(tmp_path / "g")
+        await store.upsert_node("bfs", {"label": "Algorithm", "source_chunks": ["c1"]})
+        await store.upsert_node("dfs", {"label": "Algorithm", "source_chunks": ["c2"]})
+        await store.merge_entities(["dfs"], "bfs")
+        await store.upsert_node("queue", {"label": "DataStructure", "source_chunks": ["c3"]})
+        await store.delete_node("queue")
+        bfs = store._entity("bfs")
+        assert store._chunk_rows == {"c1": {bfs}, "c2": {bfs}}
+
+        store.save()
+        store.load()
+        assert store._chunk_rows == {
+            "c1": {store._entity("bfs")}, "c2": {store._entity("bfs")},
+        }
+        result = await store.remove_chunk_sources(["c2", "c3"])
+        assert result == {"updated": 1, "deleted": []}
+        assert set(store._chunk_rows) == {"c1"}
+
+
+class TestSnapshot:
+    @pytest.mark.asyncio
+    async def test_round_trip_after_delete(self, tmp_path):
+        from kg_rag.storage.memory_graph import MemoryGraphStore
+
+        store = await _seed(tmp_path / "g")
+        await store.delete_node("dfs")
+        await store.finalize()
+        assert (tmp_path / "g.npz").exists()
+
+        reloaded = MemoryGraphStore(tmp_path / "g")
+        await reloaded.initialize()
+        assert await reloaded.graph_stats() == await store.graph_stats()
+        assert await reloaded.get_edge("bfs", "queue") == await store.get_edge("bfs", "queue")
+        assert await reloaded.get_user_relations("u1") == await store.get_user_relations("u1")
+        # adjacency was rebuilt: new writes land on the right rows
+        await reloaded.upsert_edge("queue", "graph", {"type": "USES"})
+        hood = await reloaded.neighborhood("queue")
+        assert {r["id"] for r in hood["nodes"]} == {"queue", "bfs", "graph"}
+
+
+class TestFactory:
+    def test_backend_selected_by_settings(self):
+        from kg_rag import config, storage
+        from kg_rag.storage.graph_cache import CachedGraphStore
+        from kg_rag.storage.memory_graph import MemoryGraphStore
+
+        memory = dataclasses.replace(config.settings, graph_backend="memory")
+        with patch.object(config, "settings", memory):
+            assert isinstance(storage.create_graph_store(), MemoryGraphStore)
+            cached = storage.create_graph_store(cached=True)
+        assert isinstance(cached, CachedGraphStore)
+        assert cached.supports_cypher is False
+
+    def test_unknown_backend_rejected(self):
+        from kg_rag import config, storage
+
+        bogus = dataclasses.replace(config.settings, graph_backend="bogus")
+        with patch.object(config, "settings", bogus):
+            with pytest.raises(ValueError, match="GRAPH_BACKEND"):
+                storage.create_graph_store()
+
+    def test_backends_implement_the_whole_read_api(self):
+        from kg_rag.storage.base import BaseGraphStore
+        from kg_rag.storage.graph_cache import CachedGraphStore
+        from kg_rag.storage.memory_graph import MemoryGraphStore
+        from kg_rag.storage.neo4j_graph import Neo4jGraphStore
+
+        required = BaseGraphStore.__abstractmethods__
+        assert {"merge_entities_bulk", "remove_chunk_sources", "neighborhood",
+                "graph_stats", "get_user_relations"} <= required
+        for cls in (MemoryGraphStore, Neo4jGraphStore, CachedGraphStore):
+            assert not cls.__abstractmethods__, cls.__name__
@@ -0,0 +1,49 @@
+"""Unit tests for the in-process entity name index."""
+
+from __future__ import annotations
+
+
+def _index():
+    from kg_rag.storage.name_index import NameIndex
+
+    idx = NameIndex()
+    idx.add(0, "Breadth-First Search", ["BFS", "广度优先搜索"])
+    idx.add(1, "BFS Tree")
+    idx.add(2, "Depth-First Search", ["DFS"])
+    idx.add(3, "Bellman-Ford")
+    idx.add(4, "bfs")
+    return idx
+
+
+class TestNameIndex:
+    def test_ranking_tiers(self):
+        idx = _index()
+        # exact name, exact alias, name prefix
+        assert idx.search("bfs", 10) == [4, 0, 1]
+        # plain substrings: shorter name first
+        assert idx.search("first search", 10) == [2, 0]
+
+    def test_short_and_cjk_queries(self):
+        idx = _index()
+        assert idx.search("广度", 10) == [0]
+        assert idx.search("B", 2) == [4, 1]
+        assert set(idx.search("b", 10)) == {0, 1, 3, 4}
+
+    def test_normalisation(self):
+        idx = _index()
+        assert idx.search("  ＢＦＳ  ", 10) == [4, 0, 1]  # full-width, padded
+        assert idx.search("", 10) == []
+
+    def test_accept_filter_and_limit(self):
+        idx = _index()
+        assert idx.search("search", 1) == [2]
+        assert idx.search("search", 10, accept=lambda row: row != 2) == [0]
+
+    def test_readd_and_remove(self):
+        idx = _index()
+        idx.add(3, "Bellman–Ford", ["SPFA"])
+        assert idx.search("spfa", 10) == [3]
+        idx.remove(3)
+        assert idx.search("spfa", 10) == []
+        assert idx.search("bellman", 10) == []
+        assert len(idx) == 4
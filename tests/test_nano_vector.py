@@ -0,0 +1,840 @@
+"""Tests for kg_rag.storage.nano_vector — binary format, query, upsert/delete."""
+
+import base64
+import dataclasses
+import json
+import zlib
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+DIM = 8
+
+
+class _FakeEmbeddings:
+    """Deterministic pseudo-random embeddings keyed by a text checksum."""
+
+    def __init__(self, *args, **kwargs):
+        self.calls: list[list[str]] = []
+
+    @staticmethod
+    def vec(text: str) -> list[float]:
+        rng = np.random.default_rng(zlib.crc32(text.encode()))
+        return rng.normal(size=DIM).astype(np.float32).tolist()
+
+    async def aembed_query(self, text: str) -> list[float]:
+        self.calls.append([text])
+        return self.vec(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [self.vec(t) for t in texts]
+
+
+def _make_store(base, **overrides):
+    from kg_rag.storage import nano_vector
+
+    test_settings = dataclasses.replace(
+        nano_vector.settings, embedding_dim=DIM, **overrides
+    )
+    with (
+        patch.object(nano_vector, "OpenAIEmbeddings", _FakeEmbeddings),
+        patch.object(nano_vector, "settings", test_settings),
+    ):
+        return nano_vector.NanoVectorStore(persist_path=str(base))
+
+
+def _write_legacy_json(path, records, matrix):
+    path.write_text(
+        json.dumps(
+            {
+                "embedding_dim": DIM,
+                "data": records,
+                "matrix": base64.b64encode(
+                    np.asarray(matrix, dtype=np.float32).tobytes()
+                ).decode(),
+            }
+        ),
+        encoding="utf-8",
+    )
+
+
+class TestVectorFile:
+    def test_roundtrip_is_memory_mapped(self, tmp_path):
+        from kg_rag.storage.vector_file import load_vector_file, save_vector_file
+
+        base = tmp_path / "vec"
+        data = [{"__id__": "a", "content": "x"}, {"__id__": "b", "content": "y"}]
+        mat = np.eye(2, DIM, dtype=np.float32)
+        save_vector_file(base, data, mat, DIM, generation=3)
+
+        loaded_data, loaded_mat, generation = load_vector_file(base, DIM)
+        assert loaded_data == data
+        assert generation == 3
+        assert isinstance(loaded_mat, np.memmap)
+        np.testing.assert_array_equal(loaded_mat, mat)
+
+    def test_missing_files_yield_empty_store(self, tmp_path):
+        from kg_rag.storage.vector_file import load_vector_file
+
+        data, mat, _ = load_vector_file(tmp_path / "nothing", DIM)
+        assert data == []
+        assert mat.shape == (0, DIM)
+
+    def test_migrates_legacy_json(self, tmp_path):
+        from kg_rag.storage.vector_file import load_vector_file, matrix_path
+
+        base = tmp_path / "vec"
+        records = [{"__id__": "a", "content": "hello", "doc_id": "d"}]
+        _write_legacy_json(tmp_path / "vec.json", records, [[3.0] + [0.0] * (DIM - 1)])
+
+        data, mat, _ = load_vector_file(base, DIM)
+        assert data == records
+        assert matrix_path(base).exists()
+        assert mat[0, 0] == pytest.approx(1.0)  # normalised during migration
+
+    def test_dim_mismatch_raises(self, tmp_path):
+        from kg_rag.storage.vector_file import load_vector_file, save_vector_file
+
+        base = tmp_path / "vec"
+        save_vector_file(base, [], np.zeros((0, DIM), dtype=np.float32), DIM)
+        with pytest.raises(ValueError):
+            load_vector_file(base, DIM * 2)
+
+
+class TestNanoVectorStore:
+    @pytest.mark.asyncio
+    async def test_upsert_query_and_reload(self, tmp_path):
+        base = tmp_path / "vec"
+        store = _make_store(base)
+        await store.upsert(
+            {
+                "c1": {"content": "breadth first search", "doc_id": "bfs"},
+                "c2": {"content": "segment tree", "doc_id": "seg"},
+            }
+        )
+
+        qvec = _FakeEmbeddings.vec("segment tree")
+        results = await store.query("tree", top_k=1, query_embedding=qvec)
+        assert [r["id"] for r in results] == ["c2"]
+        assert results[0]["metadata"]["doc_id"] == "seg"
+
+        reloaded = _make_store(base)
+        assert len(reloaded) == 2
+        results = await reloaded.query("tree", top_k=1, query_embedding=qvec)
+        assert [r["id"] for r in results] == ["c2"]
+
+    @pytest.mark.asyncio
+    async def test_update_existing_and_delete(self, tmp_path):
+        base = tmp_path / "vec"
+        store = _make_store(base)
+        await store.upsert({"c1": {"content": "old"}, "c2": {"content": "keep"}})
+        await store.upsert({"c1": {"content": "new"}})
+        assert len(store) == 2
+
+        await store.delete(["c1", "missing"])
+        reloaded = _make_store(base)
+        assert len(reloaded) == 1
+        results = await reloaded.query(
+            "keep", top_k=5, query_embedding=_FakeEmbeddings.vec("keep")
+        )
+        assert [r["content"] for r in results] == ["keep"]
+
+    @pytest.mark.asyncio
+    async def test_accepts_legacy_json_path(self, tmp_path):
+        _write_legacy_json(
+            tmp_path / "vec.json",
+            [{"__id__": "a", "content": "hello"}],
+            [[1.0] + [0.0] * (DIM - 1)],
+        )
+        store = _make_store(tmp_path / "vec.json")
+        assert len(store) == 1
+
+
+class TestKeywordIndex:
+    _CORPUS = [
+        "BFS explores level by level; bfs uses a queue. Subtrees of a tree.",
+        "广度优先搜索（BFS）是一种图遍历算法，广度优先搜索使用队列。",
+        "Dijkstra's algorithm, dijkstra with a binary heap. heapheap",
+        "线段树 segment tree 线段树合并 与 树状数组",
+        "",
+        "aaaa aaa treetree",
+    ]
+    _QUERIES = [
+        "BFS 和 广度优先搜索 的区别",
+        "tree subtrees",
+        "heap dijkstra",
+        "线段树合并",
+        "aa",
+        "no hits here zzz",
+    ]
+
+    def _assert_matches_reference(self, index, docs: dict[str, str]):
+        from kg_rag.storage.nano_vector import _extract_keywords, _keyword_score
+
+        for q in self._QUERIES:
+            en, zh = _extract_keywords(q)
+            expected = {
+                rid: s
+                for rid, content in docs.items()
+                if (s := _keyword_score(content, en, zh)) > 0
+            }
+            assert index.score(en, zh) == expected, q
+
+    def test_scores_match_substring_counts(self):
+        from kg_rag.storage.keyword_index import KeywordIndex
+
+        index = KeywordIndex()
+        docs = {f"r{i}": text for i, text in enumerate(self._CORPUS)}
+        for rid, text in docs.items():
+            index.add(rid, text)
+        self._assert_matches_reference(index, docs)
+
+    def test_tracks_updates_and_removals(self):
+        from kg_rag.storage.keyword_index import KeywordIndex
+
+        index = KeywordIndex()
+        docs = {f"r{i}": text for i, text in enumerate(self._CORPUS)}
+        for rid, text in docs.items():
+            index.add(rid, text)
+
+        docs["r0"] = "nothing relevant"
+        index.add("r0", docs["r0"])
+        del docs["r2"]
+        index.remove("r2")
+        self._assert_matches_reference(index, docs)
+
+    @pytest.mark.asyncio
+    async def test_store_ranks_keyword_hits_first(self, tmp_path):
+        store = _make_store(tmp_path / "vec")
+        await store.upsert(
+            {
+                "c1": {"content": "segment tree basics"},
+                "c2": {"content": "BFS and bfs variants"},
+            }
+        )
+        results = await store.query(
+            "what is BFS", top_k=2, query_embedding=_FakeEmbeddings.vec("tree")
+        )
+        assert results[0]["id"] == "c2"
+        assert results[0]["metadata"]["keyword_score"] == 2
+        assert results[1]["metadata"]["keyword_score"] == 0
+
+
+class TestIVFIndex:
+    @staticmethod
+    def _clustered(n: int, dim: int = 16, centers: int = 8, seed: int = 0):
+        from kg_rag.storage.vector_file import normalize_rows
+
+        rng = np.random.default_rng(seed)
+        means = rng.normal(size=(centers, dim))
+        mat = means[rng.integers(centers, size=n)] + 0.1 * rng.normal(size=(n, dim))
+        return normalize_rows(mat)
+
+    def test_full_probe_is_exact(self):
+        from kg_rag.storage.ann import IVFIndex
+
+        mat = self._clustered(500)
+        index = IVFIndex.train(mat, nlist=10, nprobe=10)
+        q = mat[7]
+        rows = index.probe(q)
+        np.testing.assert_array_equal(rows, np.arange(500))
+
+    def test_probe_finds_own_row(self):
+        from kg_rag.storage.ann import IVFIndex
+
+        mat = self._clustered(500)
+        index = IVFIndex.train(mat, nlist=10, nprobe=2)
+        for i in (0, 123, 499):
+            assert i in index.probe(mat[i])
+
+    def test_assign_and_remap(self, tmp_path):
+        from kg_rag.storage.ann import IVFIndex
+
+        mat = self._clustered(300)
+        index = IVFIndex.train(mat[:200], nlist=8, nprobe=8)
+        index.assign(np.arange(200, 300), mat[200:])
+        assert len(index) == 300
+        assert sorted(index.probe(mat[0]).tolist()) == list(range(300))
+
+        keep = np.arange(0, 300, 2)
+        index.remap(keep)
+        assert len(index) == 150
+        assert index.probe(mat[0]).tolist() == list(range(150))
+
+        index.save(tmp_path / "ivf.npz")
+        loaded = IVFIndex.load(tmp_path / "ivf.npz", nprobe=8)
+        assert loaded.trained_size == 200
+        np.testing.assert_array_equal(loaded.probe(mat[0]), index.probe(mat[0]))
+
+    @pytest.mark.asyncio
+    async def test_store_switches_to_ann_above_threshold(self, tmp_path):
+        base = tmp_path / "vec"
+        store = _make_store(base, vector_ann_min_size=20, vector_ann_nprobe=64)
+        docs = {f"c{i}": {"content": f"doc {i}"} for i in range(10)}
+        await store.upsert(docs)
+        assert store._ann is None
+
+        await store.upsert({f"c{i}": {"content": f"doc {i}"} for i in range(10, 30)})
+        assert store._ann is not None
+        qvec = _FakeEmbeddings.vec("doc 17")
+        results = await store.query("doc", top_k=1, query_embedding=qvec)
+        assert results[0]["id"] == "c17"
+
+        reloaded = _make_store(base, vector_ann_min_size=20, vector_ann_nprobe=64)
+        assert reloaded._ann is not None and len(reloaded._ann) == 30
+        await reloaded.delete([f"c{i}" for i in range(15)])
+        assert reloaded._ann is None
+
+
+class TestQuantizedMatrix:
+    @pytest.mark.parametrize("mode", ["float16", "int8"])
+    def test_scores_approximate_exact(self, mode):
+        from kg_rag.storage.quantize import QuantizedMatrix
+
+        mat = TestIVFIndex._clustered(400, dim=32)
+        codes = QuantizedMatrix.from_matrix(mat, mode)
+        q = mat[3]
+        np.testing.assert_allclose(codes.scores(q), mat @ q, atol=0.05)
+        assert codes.nbytes < mat.nbytes
+        assert 3 in codes.shortlist(q, 5)
+
+    def test_int8_assign_take_and_persist(self, tmp_path):
+        from kg_rag.storage.quantize import QuantizedMatrix
+
+        mat = TestIVFIndex._clustered(50, dim=16)
+        codes = QuantizedMatrix.from_matrix(mat[:40], "int8")
+        codes.assign(np.arange(40, 50), mat[40:])
+        codes.take(np.arange(0, 50, 5))
+        assert len(codes) == 10
+
+        codes.save(tmp_path / "vec", generation=2)
+        assert QuantizedMatrix.load(tmp_path / "vec", "int8", 11, generation=2) is None
+        # codes from another save of the vector file are stale
+        assert QuantizedMatrix.load(tmp_path / "vec", "int8", 10, generation=3) is None
+        loaded = QuantizedMatrix.load(tmp_path / "vec", "int8", 10, generation=2)
+        np.testing.assert_allclose(
+            loaded.scores(mat[0]), codes.scores(mat[0]), rtol=1e-6
+        )
+
+    def test_append_reuses_buffer_and_keeps_snapshots(self):
+        import copy
+
+        from kg_rag.storage.quantize import QuantizedMatrix
+
+        mat = TestIVFIndex._clustered(30, dim=16)
+        codes = QuantizedMatrix.from_matrix(mat[:10], "int8")
+        codes.assign(np.arange(10, 20), mat[10:20])
+        buf = codes._code_buf
+        before = copy.copy(codes)
+        expected = before.scores(mat[0])
+
+        codes.assign(np.arange(20, 30), mat[20:30])
+        assert codes._code_buf is buf  # appended in place
+        assert len(before) == 20 and len(codes) == 30
+        codes.assign(np.array([0]), mat[29:30])  # overwrite: fresh buffer
+        assert codes._code_buf is not buf
+        np.testing.assert_array_equal(before.scores(mat[0]), expected)
+        np.testing.assert_allclose(
+            codes.scores(mat[0]),
+            QuantizedMatrix.from_matrix(np.vstack([mat[29:30], mat[1:]]), "int8").scores(mat[0]),
+            rtol=1e-6,
+        )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode", ["float16", "int8"])
+    async def test_store_reranks_with_exact_scores(self, tmp_path, mode):
+        store = _make_store(
+            tmp_path / "vec", vector_quantization=mode, vector_rerank_factor=2
+        )
+        await store.upsert({f"c{i}": {"content": f"doc {i}"} for i in range(40)})
+        qvec = _FakeEmbeddings.vec("doc 21")
+        results = await store.query("doc", top_k=3, query_embedding=qvec)
+        assert results[0]["id"] == "c21"
+        assert results[0]["distance"] == pytest.approx(1.0, abs=1e-5)
+        await store.finalize()
+
+        reloaded = _make_store(tmp_path / "vec", vector_quantization=mode)
+        assert isinstance(reloaded._matrix, np.memmap)
+        assert isinstance(reloaded._codes._codes, np.memmap)
+        results = await reloaded.query("doc", top_k=1, query_embedding=qvec)
+        assert results[0]["id"] == "c21"
+
+    @pytest.mark.asyncio
+    async def test_codes_from_an_older_save_are_rebuilt(self, tmp_path):
+        import shutil
+
+        from kg_rag.storage.quantize import QuantizedMatrix
+
+        store = _make_store(tmp_path / "vec", vector_quantization="int8")
+        await store.upsert({f"c{i}": {"content": f"doc {i}"} for i in range(10)})
+        await store.finalize()
+        old = [tmp_path / f"vec.int8{ext}" for ext in (".npy", ".scale.npy", ".meta.json")]
+        for path in old:
+            shutil.copy(path, path.with_name(path.name + ".old"))
+
+        # same row count, different vectors; then "crash" before the codes save
+        await store.upsert({f"c{i}": {"content": f"other {i}"} for i in range(10)})
+        await store.finalize()
+        for path in old:
+            shutil.copy(path.with_name(path.name + ".old"), path)
+
+        reloaded = _make_store(tmp_path / "vec", vector_quantization="int8")
+        expected = QuantizedMatrix.from_matrix(reloaded._matrix, "int8")
+        qvec = _FakeEmbeddings.vec("other 3")
+        np.testing.assert_allclose(
+            reloaded._codes.scores(qvec), expected.scores(qvec), rtol=1e-6
+        )
+
+    def test_rejects_unknown_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            _make_store(tmp_path / "vec", vector_quantization="int4")
+
+
+class TestVectorWAL:
+    def test_replay_roundtrip_and_torn_tail(self, tmp_path):
+        from kg_rag.storage.vector_wal import VectorWAL
+
+        wal = VectorWAL(tmp_path / "vec", DIM)
+        vectors = np.arange(2 * DIM, dtype=np.float32).reshape(2, DIM)
+        wal.append_upsert([{"__id__": "a"}, {"__id__": "b"}], vectors)
+        wal.append_delete(["a"])
+        good_size = wal.size
+        with open(wal.path, "ab") as f:
+            f.write(b"\x10\x00\x00\x00garbage")
+
+        entries = list(wal.replay())
+        assert [op for op, _, _ in entries] == ["upsert", "delete"]
+        np.testing.assert_array_equal(entries[0][2], vectors)
+        assert entries[1][1] == ["a"]
+        assert wal.size == good_size
+
+        wal.reset()
+        assert wal.size == 0 and list(wal.replay()) == []
+
+    @pytest.mark.asyncio
+    async def test_writes_are_logged_and_replayed(self, tmp_path):
+        from kg_rag.storage.vector_file import meta_path
+
+        base = tmp_path / "vec"
+        store = _make_store(base)
+        await store.upsert({"c1": {"content": "alpha"}, "c2": {"content": "beta"}})
+        await store.upsert({"c1": {"content": "gamma"}})
+        await store.delete(["c2"])
+        assert not meta_path(base).exists()
+        assert store._wal.size > 0
+
+        reloaded = _make_store(base)
+        assert len(reloaded) == 1
+        results = await reloaded.query(
+            "gamma", top_k=1, query_embedding=_FakeEmbeddings.vec("gamma")
+        )
+        assert results[0]["content"] == "gamma"
+        assert results[0]["distance"] == pytest.approx(1.0, abs=1e-5)
+
+        await reloaded.finalize()
+        assert meta_path(base).exists() and reloaded._wal.size == 0
+        assert len(_make_store(base)) == 1
+
+    @pytest.mark.asyncio
+    async def test_compacts_past_threshold(self, tmp_path):
+        from kg_rag.storage.vector_file import meta_path
+
+        base = tmp_path / "vec"
+        store = _make_store(base, vector_wal_compact_mb=0)
+        await store.upsert({f"c{i}": {"content": f"doc {i}"} for i in range(100)})
+        await store._compaction
+        assert meta_path(base).exists() and store._wal.size == 0
+        assert isinstance(store._matrix, np.memmap)
+
+        await store.upsert({"c100": {"content": "doc 100"}})
+        await store.finalize()
+        reloaded = _make_store(base)
+        assert len(reloaded) == 101
+        np.testing.assert_allclose(
+            np.linalg.norm(reloaded._matrix, axis=1), 1.0, rtol=1e-5
+        )
+
+
+class TestSnapshots:
+    @pytest.mark.asyncio
+    async def test_query_does_not_wait_for_writer_lock(self, tmp_path):
+        import asyncio
+
+        store = _make_store(tmp_path / "vec")
+        await store.upsert({"c1": {"content": "alpha"}})
+        async with store._lock:
+            results = await asyncio.wait_for(
+                store.query(
+                    "alpha", top_k=1, query_embedding=_FakeEmbeddings.vec("alpha")
+                ),
+                timeout=5,
+            )
+        assert results[0]["id"] == "c1"
+
+    @pytest.mark.asyncio
+    async def test_published_snapshot_is_immutable(self, tmp_path):
+        store = _make_store(tmp_path / "vec")
+        await store.upsert({f"c{i}": {"content": f"doc {i}"} for i in range(5)})
+        snap = store._snapshot
+        before = np.array(snap.matrix)
+
+        await store.upsert({"c0": {"content": "changed"}, "c9": {"content": "new"}})
+        await store.delete(["c1"])
+        assert len(snap.data) == 5 and snap.data[0]["content"] == "doc 0"
+        np.testing.assert_array_equal(snap.matrix, before)
+        assert len(store) == 5
+
+        qvec = np.array(_FakeEmbeddings.vec("new"), dtype=np.float32)
+        old = store._search(snap, qvec, ["new"], [], 5)
+        assert "c9" not in [r["id"] for r in old]
+        current = store._search(store._snapshot, qvec, ["new"], [], 1)
+        assert current[0]["id"] == "c9"
+
+
+    @pytest.mark.asyncio
+    async def test_appends_share_storage_with_snapshots(self, tmp_path):
+        store = _make_store(
+            tmp_path / "vec", vector_ann_min_size=4, vector_quantization="int8"
+        )
+        await store.upsert({f"c{i}": {"content": f"doc {i}"} for i in range(7)})
+        await store.upsert({"c7": {"content": "doc 7"}})  # sizes the buffers
+        snap = store._snapshot
+        data, labels = store._data, store._ann._label_buf
+        qvec = np.array(_FakeEmbeddings.vec("doc 3"), dtype=np.float32)
+        before = store._search(snap, qvec, [], [], 8)
+
+        await store.upsert({"c8": {"content": "doc 8"}, "c9": {"content": "doc 9"}})
+        assert store._data is data  # appended in place, not copied
+        assert store._ann._label_buf is labels
+        assert len(snap.data) == 8 and list(snap.data)[-1]["__id__"] == "c7"
+        assert len(snap.ann) == 8 and len(snap.codes) == 8
+        assert store._search(snap, qvec, [], [], 8) == before
+        assert len(store._snapshot.data) == 10
+
+        await store.upsert({"c0": {"content": "changed"}})
+        assert store._data is not data
+        assert snap.data[0]["content"] == "doc 0"
+        assert store._search(snap, qvec, [], [], 8) == before
+
+
+class TestBatchedQueries:
+    _DOCS = {f"c{i}": {"content": f"topic {i} text"} for i in range(20)}
+    _NO_CACHE = {"embedding_cache_size": 0, "embedding_cache_path": ""}
+
+    @pytest.mark.asyncio
+    async def test_query_many_matches_single_queries(self, tmp_path):
+        store = _make_store(
+            tmp_path / "vec", vector_query_batch_window_ms=0, **self._NO_CACHE
+        )
+        await store.upsert(self._DOCS)
+        queries = ["topic 3 text", "topic 11 text", "unrelated words", "topic 3 text"]
+
+        store._embedding.calls.clear()
+        batched = await store.query_many(queries, top_k=3)
+        assert store._embedding.calls == [sorted(set(queries))]
+
+        singles = [await store.query(q, top_k=3) for q in queries]
+        assert [[r["id"] for r in rs] for rs in batched] == [
+            [r["id"] for r in rs] for rs in singles
+        ]
+        for b, s in zip(batched, singles):
+            assert [r["distance"] for r in b] == pytest.approx(
+                [r["distance"] for r in s], abs=1e-5
+            )
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_are_coalesced(self, tmp_path):
+        import asyncio
+
+        store = _make_store(
+            tmp_path / "vec", vector_query_batch_window_ms=20, **self._NO_CACHE
+        )
+        await store.upsert(self._DOCS)
+        store._embedding.calls.clear()
+
+        results = await asyncio.gather(
+            *(store.query(f"topic {i} text", top_k=1) for i in (1, 5, 9))
+        )
+        assert [rs[0]["id"] for rs in results] == ["c1", "c5", "c9"]
+        assert len(store._embedding.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_failure_reaches_every_caller(self, tmp_path):
+        import asyncio
+
+        store = _make_store(tmp_path / "vec", vector_query_batch_window_ms=20)
+
+        async def boom(texts):
+            raise RuntimeError("embedding endpoint down")
+
+        store._embed_batch = boom
+        results = await asyncio.gather(
+            store.query("a b"), store.query("c d"), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+
+    @pytest.mark.asyncio
+    async def test_finalize_fails_waiting_queries(self, tmp_path):
+        import asyncio
+
+        store = _make_store(tmp_path / "vec", vector_query_batch_window_ms=10_000)
+        embedding_started = asyncio.Event()
+
+        async def hang(texts):
+            embedding_started.set()
+            await asyncio.sleep(3600)
+
+        store._embed_batch = hang
+        queued = asyncio.ensure_future(store.query("a b"))
+        await asyncio.sleep(0)
+        await store.finalize()
+        with pytest.raises(RuntimeError, match="closed"):
+            await queued
+
+        store._batcher._window_s = 0
+        in_flight = asyncio.gather(store.query("c d"), store.query("e f"))
+        await embedding_started.wait()
+        assert len(store._batcher._tasks) == 1
+        await store.finalize()
+        with pytest.raises(RuntimeError, match="closed"):
+            await in_flight
+        assert not store._batcher._tasks
+
+
+class TestEmbeddingCache:
+    @pytest.mark.asyncio
+    async def test_lru_ttl_and_normalization(self):
+        from kg_rag.storage.embedding_cache import EmbeddingCache
+
+        cache = EmbeddingCache("m", max_entries=2)
+        await cache.put_many(["a  query", "b"], [[1.0, 0.0], [0.0, 1.0]])
+        assert await cache.get_many([" a query\n", "missing"]) == [[1.0, 0.0], None]
+
+        await cache.put_many(["c"], [[0.5, 0.5]])  # evicts "b", the LRU entry
+        assert await cache.get_many(["b"]) == [None]
+        assert cache.stats()["memory_hits"] == 1
+        assert cache.hit_rate == pytest.approx(1 / 3)
+
+        expired = EmbeddingCache("m", max_entries=10, ttl_s=1)
+        await expired.put_many(["x"], [[1.0]])
+        with patch("kg_rag.storage.embedding_cache.time.time", return_value=1e12):
+            assert await expired.get_many(["x"]) == [None]
+
+    @pytest.mark.asyncio
+    async def test_sqlite_tier_survives_restart_per_model(self, tmp_path):
+        from kg_rag.storage.embedding_cache import EmbeddingCache
+
+        db = tmp_path / "emb.sqlite3"
+        first = EmbeddingCache("m1", max_entries=10, db_path=db)
+        await first.put_many(["hello"], [[0.25, 0.5]])
+
+        second = EmbeddingCache("m1", max_entries=10, db_path=db)
+        assert await second.get_many(["hello"]) == [[0.25, 0.5]]
+        assert second.disk_hits == 1
+        assert await second.get_many(["hello"]) == [[0.25, 0.5]]
+        assert second.memory_hits == 1
+
+        other_model = EmbeddingCache("m2", max_entries=10, db_path=db)
+        assert await other_model.get_many(["hello"]) == [None]
+
+    @pytest.mark.asyncio
+    async def test_sqlite_tier_creates_missing_parent_dirs(self, tmp_path):
+        from kg_rag.storage.embedding_cache import EmbeddingCache
+
+        db = tmp_path / "fresh" / "nested" / "emb.sqlite3"
+        cache = EmbeddingCache("m", max_entries=10, db_path=db)
+        await cache.put_many(["hello"], [[0.25, 0.5]])
+        assert db.exists()
+
+    @pytest.mark.asyncio
+    async def test_sqlite_connections_are_closed(self, tmp_path):
+        import sqlite3
+
+        from kg_rag.storage.embedding_cache import EmbeddingCache
+
+        opened: list[sqlite3.Connection] = []
+        connect = sqlite3.connect
+
+        def tracking_connect(*args, **kwargs):
+            opened.append(connect(*args, **kwargs))
+            return opened[-1]
+
+        cache = EmbeddingCache("m", max_entries=0, db_path=tmp_path / "e.sqlite3")
+        with patch("kg_rag.storage.embedding_cache.sqlite3.connect", tracking_connect):
+            await cache.put_many(["hello"], [[0.25, 0.5]])
+            assert await cache.get_many(["hello"]) == [[0.25, 0.5]]
+        assert len(opened) == 2
+        for conn in opened:
+            with pytest.raises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+
+    @pytest.mark.asyncio
+    async def test_store_embeds_only_uncached_texts(self, tmp_path):
+        store = _make_store(tmp_path / "vec")
+        await store.upsert({"c1": {"content": "alpha"}, "c2": {"content": "beta"}})
+        store._embedding.calls.clear()
+
+        await store.query("alpha", top_k=1)
+        assert store._embedding.calls == []
+        assert await store._embed_batch(["beta", "gamma", "gamma"]) == [
+            _FakeEmbeddings.vec("beta"),
+            _FakeEmbeddings.vec("gamma"),
+            _FakeEmbeddings.vec("gamma"),
+        ]
+        assert store._embedding.calls == [["gamma"]]
+        assert (tmp_path / "embedding_cache.sqlite3").exists()
+
+
+class TestUpsertDedup:
+    @pytest.mark.asyncio
+    async def test_only_changed_content_is_embedded(self, tmp_path):
+        store = _make_store(
+            tmp_path / "vec", embedding_cache_size=0, embedding_cache_path=""
+        )
+        docs = {
+            "c1": {"content": "alpha", "doc_id": "d"},
+            "c2": {"content": "beta", "doc_id": "d"},
+        }
+        assert await store.upsert(docs) == {"inserted": 2, "updated": 0, "skipped": 0}
+
+        store._embedding.calls.clear()
+        wal_size = store._wal.size
+        assert await store.upsert(docs) == {"inserted": 0, "updated": 0, "skipped": 2}
+        assert store._embedding.calls == [] and store._wal.size == wal_size
+
+        counts = await store.upsert(
+            {
+                "c1": {"content": "alpha", "doc_id": "renamed"},
+                "c2": {"content": "beta v2", "doc_id": "d"},
+                "c3": {"content": "gamma", "doc_id": "d"},
+            }
+        )
+        assert counts == {"inserted": 1, "updated": 2, "skipped": 0}
+        assert store._embedding.calls == [["beta v2", "gamma"]]
+
+        results = await store.query(
+            "alpha", top_k=1, query_embedding=_FakeEmbeddings.vec("alpha")
+        )
+        assert results[0]["id"] == "c1"
+        assert results[0]["metadata"]["doc_id"] == "renamed"
+        assert results[0]["distance"] == pytest.approx(1.0, abs=1e-5)
+
+
+class TestMetadataFilter:
+    _DOCS = {
+        f"c{i}": {"content": f"topic {i} text", "doc_id": f"d{i % 3}", "tags": ["x"]}
+        for i in range(30)
+    }
+
+    def test_field_index_selects_rows(self):
+        from kg_rag.storage.metadata_index import FieldIndex, select_rows
+
+        data = [
+            {"doc_id": "a", "lang": "en"},
+            {"doc_id": "b", "lang": "zh"},
+            {"doc_id": "a", "lang": "zh", "tags": ["t"]},
+            {"lang": "en"},
+        ]
+
+        def index(name):
+            return FieldIndex.build(data, name)
+
+        assert select_rows({"doc_id": "a"}, index).tolist() == [0, 2]
+        assert select_rows({"doc_id": ["a", "b"], "lang": "zh"}, index).tolist() == [1, 2]
+        assert select_rows({"doc_id": "zz"}, index).tolist() == []
+        assert select_rows({"tags": "t"}, index).tolist() == []
+
+    def test_field_index_updates_match_a_rebuild(self):
+        from kg_rag.storage.metadata_index import MISSING, FieldIndex
+
+        data = [{"doc_id": "a"}, {"doc_id": "b"}, {"doc_id": "a"}, {}]
+        index = FieldIndex.build(data, "doc_id")
+        moved = index.updated([(1, "b", "a"), (2, "a", MISSING), (3, MISSING, "c")])
+        assert moved.rows("a").tolist() == [0, 1]
+        assert moved.rows("b").tolist() == [] and moved.rows("c").tolist() == [3]
+        # the original is untouched
+        assert index.rows("a").tolist() == [0, 2] and index.rows("b").tolist() == [1]
+
+        mapping = np.array([-1, 0, 1, 2])  # row 0 deleted
+        assert moved.remapped(mapping).rows("a").tolist() == [0]
+        assert moved.remapped(mapping).rows("c").tolist() == [2]
+
+    @pytest.mark.asyncio
+    async def test_writes_maintain_field_indexes_without_touching_snapshots(
+        self, tmp_path
+    ):
+        from kg_rag.storage.metadata_index import FieldIndex
+
+        def as_lists(fields):
+            return {
+                name: {v: r.tolist() for v, r in index._rows.items()}
+                for name, index in fields.items()
+            }
+
+        store = _make_store(tmp_path / "vec")
+        await store.upsert(self._DOCS)
+        before = store._snapshot
+        assert await store.query("topic", top_k=30, filter={"doc_id": "d1"})
+        assert store._snapshot is before
+        frozen = as_lists(before.fields)
+
+        await store.upsert({
+            "c1": {"content": "topic 1 text", "doc_id": "d2", "lang": "en"},
+            "c30": {"content": "topic 30 text", "doc_id": "d9"},
+        })
+        await store.delete(["c0", "c4"])
+
+        snap = store._snapshot
+        assert as_lists(before.fields) == frozen
+        for name in ("doc_id", "lang"):
+            assert as_lists({name: snap.fields[name]}) == as_lists(
+                {name: FieldIndex.build(snap.data, name)}
+            )
+        results = await store.query("topic", top_k=30, filter={"doc_id": "d9"})
+        assert [r["id"] for r in results] == ["c30"]
+
+        reopened = _make_store(tmp_path / "vec")
+        assert as_lists(reopened._snapshot.fields) == as_lists(snap.fields)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("window_ms", [0, 20])
+    async def test_filtered_queries_only_return_matches(self, tmp_path, window_ms):
+        import asyncio
+
+        store = _make_store(tmp_path / "vec", vector_query_batch_window_ms=window_ms)
+        await store.upsert(self._DOCS)
+
+        results = await store.query("topic 4 text", top_k=5, filter={"doc_id": "d1"})
+        assert results[0]["id"] == "c4"
+        assert {r["metadata"]["doc_id"] for r in results} == {"d1"}
+
+        both, other = await asyncio.gather(
+            store.query("topic 4 text", top_k=30, filter={"doc_id": ["d1", "d2"]}),
+            store.query("topic 4 text", top_k=3),
+        )
+        assert len(both) == 20
+        assert {r["metadata"]["doc_id"] for r in both} == {"d1", "d2"}
+        assert other[0]["id"] == "c4"
+
+        assert await store.query("topic 4 text", filter={"doc_id": "nope"}) == []
+        many = await store.query_many(
+            ["topic 2 text", "topic 5 text"], top_k=2, filter={"doc_id": "d2"}
+        )
+        assert [rs[0]["id"] for rs in many] == ["c2", "c5"]
+
+    @pytest.mark.asyncio
+    async def test_filter_with_keyword_hits_and_ann(self, tmp_path):
+        store = _make_store(tmp_path / "vec", vector_ann_min_size=10)
+        await store.upsert(self._DOCS)
+        assert store._snapshot.ann is not None
+
+        results = await store.query("topic", top_k=10, filter={"doc_id": "d0"})
+        assert len(results) == 10
+        assert all(r["metadata"]["doc_id"] == "d0" for r in results)
+        assert all(r["metadata"]["keyword_score"] == 1 for r in results)
+
+        with pytest.raises(TypeError):
+            await store.query("topic", filter="doc_id=d0")
@@ -1,6 +1,7 @@
 """Tests for Neo4jGraphStore.upsert_node dual-label logic."""
 
 import copy
+import dataclasses
 
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -17,6 +18,13 @@ def _make_store():
 
     mock_session = AsyncMock()
     mock_session.run = AsyncMock(return_value=mock_result)
+
+    # managed transactions: the session doubles as the transaction handle
+    async def _execute(work, *args):
+        return await work(mock_session, *args)
+
+    mock_session.execute_read = AsyncMock(side_effect=_execute)
+    mock_session.execute_write = AsyncMock(side_effect=_execute)
     mock_session.__aenter__ = AsyncMock(return_value=mock_session)
     mock_session.__aexit__ = AsyncMock(return_value=False)
 
@@ -36,7 +44,7 @@ class TestUpsertNode:
         await store.upsert_node("id1", {"label": "Algorithm", "name": "BFS"})
 
         cypher = session.run.call_args.args[0]
-        kwargs = session.run.call_args.kwargs
+        kwargs = session.run.call_args.args[1]
         assert "MERGE (n:Entity {entity_id: $eid})" in cypher
         assert "SET n:Algorithm" in cypher
         assert kwargs["props"]["type"] == "Algorithm"
@@ -49,7 +57,7 @@ class TestUpsertNode:
             "id2", {"label": "Algorithm", "name": "BFS", "type": "Algo"}
         )
 
-        kwargs = session.run.call_args.kwargs
+        kwargs = session.run.call_args.args[1]
         # setdefault should preserve the caller-provided "type"
         assert kwargs["props"]["type"] == "Algo"
 
@@ -59,7 +67,7 @@ class TestUpsertNode:
         await store.upsert_node("id3", {"label": "SomeNewType", "name": "X"})
 
         cypher = session.run.call_args.args[0]
-        kwargs = session.run.call_args.kwargs
+        kwargs = session.run.call_args.args[1]
         assert "MERGE (n:Entity {entity_id: $eid})" in cypher
         assert "SET n:SomeNewType" not in cypher
         assert kwargs["props"]["type"] == "SomeNewType"
@@ -118,9 +126,29 @@ class TestUpsertEdge:
 
         cypher = session.run.call_args.args[0]
         assert "MERGE (a)-[r:RELATED_TO]->(b)" in cypher
-        kwargs = session.run.call_args.kwargs
+        kwargs = session.run.call_args.args[1]
         assert kwargs["props"]["original_type"] == "FOOBAR"
 
+    @pytest.mark.asyncio
+    async def test_knowledge_edge_endpoints_use_entity_label(self):
+        store, session = _make_store()
+        await store.upsert_edge("src", "tgt", {"type": "USES"})
+
+        cypher = session.run.call_args.args[0]
+        assert cypher.startswith(
+            "MATCH (a:Entity {entity_id: $src}), (b:Entity {entity_id: $tgt}) "
+        )
+
+    @pytest.mark.asyncio
+    async def test_profile_edge_source_is_user(self):
+        store, session = _make_store()
+        await store.upsert_edge("u1", "tgt", {"type": "MASTERED"})
+
+        cypher = session.run.call_args.args[0]
+        assert cypher.startswith(
+            "MATCH (a:User {user_id: $src}), (b:Entity {entity_id: $tgt}) "
+        )
+
 
 class TestReadQueries:
     """Verify read queries include :Entity label constraint."""
@@ -144,7 +172,8 @@ class TestReadQueries:
         store, session = _make_store()
         await store.delete_node("n1")
         cypher = session.run.call_args.args[0]
-        assert "MATCH (n:Entity {entity_id: $eid})" in cypher
+        assert "UNWIND $ids AS eid MATCH (n:Entity {entity_id: eid})" in cypher
+        assert session.run.call_args.args[1] == {"ids": ["n1"]}
 
     @pytest.mark.asyncio
     async def test_has_edge_uses_entity_label(self):
@@ -161,3 +190,511 @@ class TestReadQueries:
         cypher = session.run.call_args.args[0]
         assert ":Entity {entity_id: $src})" in cypher
         assert ":Entity {entity_id: $tgt})" in cypher
+
+
+class TestBulkUpserts:
+    """Verify UNWIND batching and grouping in the bulk write paths."""
+
+    @pytest.mark.asyncio
+    async def test_nodes_grouped_by_label_and_batched(self):
+        from kg_rag.storage import neo4j_graph
+
+        store, session = _make_store()
+        nodes = [(f"a{i}", {"label": "Algorithm", "name": f"A{i}"}) for i in range(5)]
+        nodes += [("u1", {"label": "User"}), ("x1", {"label": "Weird", "name": "X"})]
+        test_settings = dataclasses.replace(
+            neo4j_graph.settings, graph_bulk_batch_size=2
+        )
+        with patch.object(neo4j_graph, "settings", test_settings):
+            await store.upsert_nodes_bulk(nodes)
+
+        calls = [(c.args[0], c.args[1]["rows"]) for c in session.run.call_args_list]
+        algo = [rows for cypher, rows in calls if "SET n:Algorithm" in cypher]
+        assert [len(rows) for rows in algo] == [2, 2, 1]
+        assert all(c.startswith("UNWIND $rows AS row ") for c, _ in calls)
+        assert algo[0][0] == {
+            "eid": "a0",
+            "props": {"name": "A0", "entity_id": "a0", "type": "Algorithm"},
+        }
+        user = [c for c, _ in calls if "MERGE (n:User {user_id: row.eid})" in c]
+        assert len(user) == 1
+        (weird,) = [rows for c, rows in calls if rows[0]["eid"] == "x1"]
+        assert weird[0]["props"]["type"] == "Weird"
+        # one session for all batches
+        assert session.__aenter__.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_edges_grouped_by_remapped_type(self):
+        store, session = _make_store()
+        record = MagicMock(**{"data.return_value": {"written": 1}})
+        session.run.return_value.__aiter__.return_value = [record]
+        await store.upsert_edges_bulk(
+            [
+                ("a", "b", {"type": "PREREQ", "weight": 1.0}),
+                ("b", "c", {"type": "FOOBAR"}),
+                ("c", "d", {"type": "PREREQ"}),
+            ]
+        )
+        calls = [(c.args[0], c.args[1]["rows"]) for c in session.run.call_args_list]
+        assert len(calls) == 2
+        (prereq,) = [rows for c, rows in calls if "[r:PREREQ]" in c]
+        assert [(r["src"], r["tgt"]) for r in prereq] == [("a", "b"), ("c", "d")]
+        (related,) = [rows for c, rows in calls if "[r:RELATED_TO]" in c]
+        assert related[0]["props"]["original_type"] == "FOOBAR"
+        assert all("(a:Entity {entity_id: row.src})" in c for c, _ in calls)
+
+
+class TestEntitySearch:
+    """Verify the full-text search path and its scan fallback."""
+
+    def test_fulltext_query_words_and_cjk(self):
+        from kg_rag.storage.neo4j_graph import _fulltext_query
+
+        assert _fulltext_query("Breadth-First") == "breadth* AND first*"
+        assert _fulltext_query("广度 BFS") == '"广度" AND bfs*'
+        assert _fulltext_query("a:(b)") == "a* AND b*"
+        assert _fulltext_query("***") == ""
+
+    @pytest.mark.asyncio
+    async def test_uses_fulltext_index_with_type_filter(self):
+        store, session = _make_store()
+        store._fulltext = True
+        await store.search_entities("bfs", "Algorithm", 5)
+
+        cypher = session.run.call_args.args[0]
+        assert cypher.startswith("CALL db.index.fulltext.queryNodes('entity_names', $lucene)")
+        assert "WHERE e:Algorithm" in cypher
+        assert session.run.call_args.args[1] == {"lucene": "bfs*", "limit": 5}
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_scan_when_index_missing(self):
+        from neo4j.exceptions import ClientError
+
+        store, session = _make_store()
+        store._fulltext = True
+        session.run.side_effect = [ClientError("no such index"), session.run.return_value]
+        await store.search_entities("bfs")
+
+        cypher = session.run.call_args.args[0]
+        assert "CONTAINS toLower($q)" in cypher
+        assert store._fulltext is False
+
+    @pytest.mark.asyncio
+    async def test_entity_merge_maintains_alias_text(self):
+        store, session = _make_store()
+        await store.upsert_node("id1", {"label": "Algorithm", "aliases": ["BFS"]})
+        cypher = session.run.call_args.args[0]
+        assert "SET n.alias_text = reduce(" in cypher
+
+
+
+class TestGraphSummary:
+    """Verify degree / per-type summary maintenance and the O(1) reads."""
+
+    @pytest.mark.asyncio
+    async def test_entity_merge_counts_created_and_retyped(self):
+        store, session = _make_store()
+        await store.upsert_node("id1", {"label": "Algorithm", "name": "BFS"})
+        cypher = session.run.call_args.args[0]
+        assert cypher.startswith("OPTIONAL MATCH (old:Entity {entity_id: $eid})")
+        assert "ON CREATE SET n.degree = 0" in cypher
+        assert "WHERE created OR old_type <> new_type" in cypher
+        assert "MERGE (s:GraphStat {key: 'entities_by_type:' + t})" in cypher
+
+    @pytest.mark.asyncio
+    async def test_user_merge_is_not_counted(self):
+        store, session = _make_store()
+        await store.upsert_node("u1", {"label": "User"})
+        assert "GraphStat" not in session.run.call_args.args[0]
+
+    @pytest.mark.asyncio
+    async def test_knowledge_edge_bumps_degree_and_relation_count(self):
+        store, session = _make_store()
+        await store.upsert_edge("a", "b", {"type": "PREREQ"})
+        cypher = session.run.call_args.args[0]
+        assert "ON CREATE SET a.degree = coalesce(a.degree, 0) + 1" in cypher
+        assert "{key: 'relations_by_type:' + 'PREREQ'}" in cypher
+
+    @pytest.mark.asyncio
+    async def test_parallel_edges_collapse_before_counting(self):
+        store, session = _make_store()
+        await store.upsert_edge("a", "b", {"type": "PREREQ"})
+        cypher = session.run.call_args.args[0]
+        collapse = cypher.index("WITH a, b, $props AS props, count(old) AS existing")
+        assert collapse < cypher.index("MERGE (a)-[r:PREREQ]->(b)")
+        assert "WITH a, b, existing, count(r) AS merged WITH count(*) AS written" in cypher
+        assert "sum(CASE WHEN existing = 0 THEN 1 ELSE 0 END) AS created" in cypher
+
+    @pytest.mark.integration
+    @pytest.mark.asyncio
+    async def test_duplicate_edge_is_not_counted_again_live(self):
+        from kg_rag.config import settings
+        from kg_rag.storage.neo4j_graph import Neo4jGraphStore
+
+        if not settings.neo4j_uri or not settings.neo4j_password:
+            pytest.skip("NEO4J_URI or NEO4J_PASSWORD not set")
+        store = Neo4jGraphStore()
+        await store.initialize()
+        ids = ["__dup_edge_a", "__dup_edge_b"]
+        try:
+            await store.write_cypher(
+                "CREATE (a:Entity {entity_id: $a, degree: 2}), "
+                "(b:Entity {entity_id: $b, degree: 2}), "
+                "(a)-[:PREREQ]->(b), (a)-[:PREREQ]->(b)",
+                {"a": ids[0], "b": ids[1]},
+            )
+            rows, _ = await store._write(
+                store._edge_merge("PREREQ", "$src", "$tgt", "$props"),
+                {"src": ids[0], "tgt": ids[1], "props": {"weight": 0.5}},
+            )
+            assert rows == [{"written": 1}]
+            degrees = await store.read_cypher(
+                "MATCH (n:Entity) WHERE n.entity_id IN $ids "
+                "RETURN n.entity_id AS id, n.degree AS degree ORDER BY id",
+                {"ids": ids},
+            )
+            assert [r["degree"] for r in degrees] == [2, 2]
+        finally:
+            await store.write_cypher(
+                "MATCH (n:Entity) WHERE n.entity_id IN $ids DETACH DELETE n",
+                {"ids": ids},
+            )
+            await store.finalize()
+
+    @pytest.mark.asyncio
+    async def test_profile_edge_bumps_degree_only(self):
+        store, session = _make_store()
+        await store.upsert_edge("u1", "b", {"type": "MASTERED"})
+        cypher = session.run.call_args.args[0]
+        assert "b.degree = coalesce(b.degree, 0) + 1" in cypher
+        assert "GraphStat" not in cypher
+
+    @pytest.mark.asyncio
+    async def test_delete_decrements_neighbours_and_summary(self):
+        store, session = _make_store()
+        await store.delete_node("id1")
+        cypher = session.run.call_args.args[0]
+        assert "FOREACH (m IN nbrs | SET m.degree = m.degree - 1)" in cypher
+        assert "MATCH (s:GraphStat {key: key}) SET s.count = s.count + d" in cypher
+
+    @pytest.mark.asyncio
+    async def test_bulk_delete_counts_shared_edges_once(self):
+        store, session = _make_store()
+        await store.delete_nodes_bulk(["a", "b", "a"])
+        assert session.execute_write.await_count == 1
+        cypher, params = session.run.call_args.args
+        assert params == {"ids": ["a", "b"]}
+        assert "WHERE NOT m IN doomed OR elementId(m) <= elementId(n)" in cypher
+        assert "[(n)--(m) WHERE NOT m IN doomed | m] AS nbrs" in cypher
+        assert "FOREACH (n IN doomed | DETACH DELETE n)" in cypher
+
+    @pytest.mark.asyncio
+    async def test_bulk_rows_deduplicated_before_counting(self):
+        store, session = _make_store()
+        await store.upsert_nodes_bulk(
+            [
+                ("a", {"label": "Algorithm", "name": "A"}),
+                ("a", {"label": "Algorithm", "description": "d"}),
+            ]
+        )
+        (row,) = session.run.call_args.args[1]["rows"]
+        assert row["props"]["name"] == "A" and row["props"]["description"] == "d"
+
+    @pytest.mark.asyncio
+    async def test_top_entities_reads_degree_index(self):
+        store, session = _make_store()
+        store._summary = True
+        await store.top_entities(10, "Algorithm")
+        cypher = session.run.call_args.args[0]
+        assert cypher.startswith(
+            "MATCH (e:Algorithm) WHERE e.degree >= 0 "
+            "WITH e ORDER BY e.degree DESC LIMIT $limit"
+        )
+        assert "count(" not in cypher
+
+    @pytest.mark.asyncio
+    async def test_graph_stats_reads_summary_nodes(self):
+        store, session = _make_store()
+        store._summary = True
+        rows = [
+            {"kind": "entities_by_type", "type": "Algorithm", "count": 3},
+            {"kind": "relations_by_type", "type": "USES", "count": 2},
+        ]
+        records = [MagicMock(**{"data.return_value": r}) for r in rows]
+        session.run.return_value.__aiter__.return_value = records
+
+        stats = await store.graph_stats()
+        assert session.run.call_args.args[0].startswith("MATCH (s:GraphStat)")
+        assert stats == {
+            "entities_by_type": {"Algorithm": 3},
+            "relations_by_type": {"USES": 2},
+        }
+
+    @pytest.mark.asyncio
+    async def test_reads_count_live_until_the_summary_is_built(self):
+        store, session = _make_store()  # no marker row
+        await store.top_entities(5)
+        marker, top = [c.args for c in session.run.call_args_list]
+        assert marker[1] == {"key": "_meta:summary"}
+        assert "COUNT { (e)--() }" in top[0] and "e.degree" not in top[0]
+
+        await store.graph_stats()
+        live = session.run.call_args.args[0]
+        assert "GraphStat" not in live and "UNION ALL" in live
+        assert not store._summary
+
+    @pytest.mark.asyncio
+    async def test_ensure_derived_builds_once_and_marks(self):
+        store, session = _make_store()
+        row = {"built": False, "refreshed": 0, "chunks": 0}
+        session.run.return_value.__aiter__.return_value = [
+            MagicMock(**{"data.return_value": row})
+        ]
+        store.refresh_summary = AsyncMock()
+        await store.ensure_derived()
+        statements = [c.args[0] for c in session.run.call_args_list]
+        assert "MATCH (cs:ChunkSource) DELETE cs" in statements
+        assert statements[-1].startswith("MERGE (s:GraphStat {key: $key})")
+        store.refresh_summary.assert_awaited_once()
+        assert store._summary
+
+        session.run.reset_mock()
+        await store.ensure_derived()
+        session.run.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_initialize_leaves_a_missing_summary_to_graph_refresh(self):
+        store, session = _make_store()
+        driver = store._driver
+        store._driver = None
+        with patch(
+            "kg_rag.storage.neo4j_graph.AsyncGraphDatabase.driver",
+            return_value=driver,
+        ):
+            await store.initialize()  # no GraphStat rows
+        session.execute_write.assert_not_awaited()
+        statements = [c.args[0] for c in session.run.call_args_list]
+        assert not [c for c in statements if "SET n.degree" in c]
+
+
+class TestNeighborhood:
+    """Verify the single-statement bounded BFS."""
+
+    @pytest.mark.asyncio
+    async def test_one_statement_one_expand_per_level(self):
+        store, session = _make_store()
+        hood = {"nodes": [{"id": "dp"}], "edges": [], "truncated": False}
+        record = MagicMock(**{"data.return_value": hood})
+        session.run.return_value.__aiter__.return_value = [record]
+
+        assert await store.neighborhood("dp", 3, limit=40, fanout=10) == hood
+        assert session.run.await_count == 1
+        cypher = session.run.call_args.args[0]
+        assert cypher.count("MATCH (f)--(n:Entity) WHERE NOT n IN seen") == 3
+        assert "*1.." not in cypher
+        assert session.run.call_args.args[1] == {"eid": "dp", "limit": 40, "fanout": 10}
+
+    @pytest.mark.asyncio
+    async def test_missing_centre_returns_none(self):
+        store, session = _make_store()
+        session.run.return_value.__aiter__.return_value = []
+        assert await store.neighborhood("nope") is None
+
+
+class TestTransactions:
+    """Verify the read/write split over managed transactions."""
+
+    @pytest.mark.asyncio
+    async def test_reads_use_read_sessions(self):
+        from neo4j import READ_ACCESS
+
+        store, session = _make_store()
+        await store.get_node("id1")
+        await store.query_cypher("MATCH (n) RETURN n LIMIT 1")
+        assert session.execute_read.await_count == 2
+        session.execute_write.assert_not_awaited()
+        kwargs = store._driver.session.call_args.kwargs
+        assert kwargs["default_access_mode"] == READ_ACCESS
+        assert kwargs["fetch_size"] > 0
+
+    @pytest.mark.asyncio
+    async def test_writes_use_write_sessions(self):
+        from neo4j import WRITE_ACCESS
+
+        store, session = _make_store()
+        await store.upsert_node("id1", {"label": "Algorithm"})
+        await store.query_cypher("MATCH (n {entity_id: $eid}) SET n.x = 1", {"eid": "x"})
+        await store.upsert_edges_bulk([("a", "b", {"type": "PREREQ"})])
+        assert session.execute_write.await_count == 3
+        session.execute_read.assert_not_awaited()
+        modes = {c.kwargs["default_access_mode"] for c in store._driver.session.call_args_list}
+        assert modes == {WRITE_ACCESS}
+
+    def test_read_only_routing(self):
+        from kg_rag.storage.base import is_read_only
+
+        assert is_read_only(
+            "CALL db.index.fulltext.queryNodes('entity_names', $q) "
+            "YIELD node RETURN node"
+        )
+        assert is_read_only(
+            "MATCH (c:Entity) CALL { WITH c MATCH (c)--(n) RETURN n } RETURN n"
+        )
+        assert not is_read_only("MATCH (c) CALL { WITH c SET c.x = 1 } RETURN c")
+        assert not is_read_only("CALL apoc.create.node(['X'], {})")
+        assert not is_read_only("call DB.createLabel('X')")
+        assert not is_read_only("MATCH (n) DETACH DELETE n")
+
+    @pytest.mark.asyncio
+    async def test_params_are_passed_as_a_dict(self):
+        # keys such as "query" must not collide with tx.run's own arguments
+        store, session = _make_store()
+        await store.query_cypher("RETURN $query AS q", {"query": "x"})
+        assert session.run.call_args.args == ("RETURN $query AS q", {"query": "x"})
+
+
+class TestStreamCypher:
+    """Verify batched streaming through one read transaction."""
+
+    @pytest.mark.asyncio
+    async def test_yields_fetch_size_batches(self):
+        from neo4j import READ_ACCESS
+
+        store, session = _make_store()
+        tx = AsyncMock()
+        result = MagicMock()
+        result.__aiter__.return_value = [
+            MagicMock(**{"data.return_value": {"i": i}}) for i in range(5)
+        ]
+        tx.run = AsyncMock(return_value=result)
+        tx.__aenter__ = AsyncMock(return_value=tx)
+        tx.__aexit__ = AsyncMock(return_value=False)
+        session.begin_transaction = AsyncMock(return_value=tx)
+
+        batches = [
+            [row["i"] for row in batch]
+            async for batch in store.stream_cypher(
+                "MATCH (n) RETURN n.i AS i", batch_size=2
+            )
+        ]
+        assert batches == [[0, 1], [2, 3], [4]]
+        kwargs = store._driver.session.call_args.kwargs
+        assert kwargs["default_access_mode"] == READ_ACCESS
+        assert kwargs["fetch_size"] == 2
+
+    @pytest.mark.asyncio
+    async def test_rejects_writes(self):
+        store, _ = _make_store()
+        with pytest.raises(ValueError):
+            async for _ in store.stream_cypher("MATCH (n) DETACH DELETE n"):
+                pass
+
+
+class TestMergeEntities:
+    """Verify the single-transaction merge statements."""
+
+    @staticmethod
+    def _results(*row_lists):
+        results = []
+        for rows in row_lists:
+            result = MagicMock()
+            result.__aiter__.return_value = [
+                MagicMock(**{"data.return_value": r}) for r in rows
+            ]
+            result.consume = AsyncMock()
+            results.append(result)
+        return results
+
+    @pytest.mark.asyncio
+    async def test_one_transaction_per_group_batch(self):
+        store, session = _make_store()
+        node = {"description": "", "aliases": [], "type": "Algorithm"}
+        nodes = [
+            {"id": "t", "name": "T", **node},
+            {"id": "a", "name": "A", **node, "description": "from a"},
+        ]
+        edges = [
+            # a -USES-> x, u1 -MASTERED-> a, a -PREREQ-> t (becomes a self-loop)
+            {"id": "a", "rid": "1", "type": "USES", "outgoing": True,
+             "from_user": False, "nbr": "x", "props": {"w": 1}},
+            {"id": "a", "rid": "2", "type": "MASTERED", "outgoing": False,
+             "from_user": True, "nbr": "u1", "props": {}},
+            {"id": "a", "rid": "3", "type": "PREREQ", "outgoing": True,
+             "from_user": False, "nbr": "t", "props": {}},
+        ]
+        session.run.side_effect = self._results(nodes, edges, *[[]] * 8)
+
+        result = await store.merge_entities(["a", "missing"], "t")
+        assert result == {"merged": ["a"], "missing": ["missing"], "edges": 2}
+        assert session.execute_write.await_count == 1
+
+        calls = [(c.args[0], c.args[1]) for c in session.run.call_args_list]
+        (uses,) = [p["rows"] for c, p in calls if "[r:USES]" in c]
+        assert uses == [{"src": "t", "tgt": "x", "props": {"w": 1}}]
+        (mastered,) = [p["rows"] for c, p in calls if "[r:MASTERED]" in c]
+        assert mastered == [{"src": "u1", "tgt": "t", "props": {}}]
+        assert not [c for c, _ in calls if "[r:PREREQ]" in c]
+
+        (text,) = [p["rows"] for c, p in calls if "SET n.description" in c]
+        assert text == [
+            {"id": "t", "description": "from a", "aliases": ["A"], "chunks": None}
+        ]
+        degrees = {
+            r["id"]: r["d"]
+            for c, p in calls if "SET m.degree" in c for r in p["rows"]
+        }
+        assert degrees == {"x": 1, "t": 1, "u1": 1}
+        (stats,) = [p["rows"] for c, p in calls if "MATCH (s:GraphStat {key: row.key})" in c]
+        assert {r["key"]: r["d"] for r in stats} == {
+            "relations_by_type:USES": -1,
+            "relations_by_type:PREREQ": -1,
+            "entities_by_type:Algorithm": -1,
+        }
+        assert calls[-1][0].endswith("DETACH DELETE n")
+        assert calls[-1][1] == {"ids": ["a"]}
+
+
+class TestChunkSources:
+    """Verify ``source_chunks`` provenance statements."""
+
+    @pytest.mark.asyncio
+    async def test_entity_merge_unions_source_chunks(self):
+        store, session = _make_store()
+        await store.upsert_node("id1", {"label": "Algorithm", "source_chunks": ["c1"]})
+        cypher = session.run.call_args.args[0]
+        assert "coalesce(old.source_chunks, []) AS old_chunks" in cypher
+        assert "old_chunks + [c IN n.source_chunks WHERE NOT c IN old_chunks]" in cypher
+        # new chunk ids are added to the chunk -> entity index
+        assert "MERGE (cs:ChunkSource {chunk_id: c})" in cypher
+
+    @pytest.mark.asyncio
+    async def test_orphans_are_deleted_in_one_statement(self):
+        store, session = _make_store()
+        session.run.side_effect = TestMergeEntities._results(
+            [{"id": "kept", "orphan": False}, {"id": "a", "orphan": True},
+             {"id": "b", "orphan": True}],
+            [], [],
+        )
+        result = await store.remove_chunk_sources(["c1", "c2"])
+        assert result == {"updated": 1, "deleted": ["a", "b"]}
+        assert session.execute_write.await_count == 1
+
+        calls = [(c.args[0], c.args[1]) for c in session.run.call_args_list]
+        assert calls[0][1] == {"ids": ["c1", "c2"]}
+        # entities are found through the chunk index, not a label scan
+        assert calls[0][0].startswith("MATCH (cs:ChunkSource) WHERE cs.chunk_id IN $ids")
+        assert "MATCH (n:Entity {entity_id: eid})" in calls[0][0]
+        assert [p for c, p in calls[1:] if "DETACH DELETE n" in c] == [
+            {"ids": ["a", "b"]},
+        ]
+        assert len(calls) == 3
+        assert calls[-1] == (
+            "MATCH (cs:ChunkSource) WHERE cs.chunk_id IN $ids DELETE cs",
+            {"ids": ["c1", "c2"]},
+        )
+
+    @pytest.mark.asyncio
+    async def test_no_chunks_is_a_no_op(self):
+        store, session = _make_store()
+        assert await store.remove_chunk_sources([]) == {"updated": 0, "deleted": []}
+        session.run.assert_not_awaited()
@@ -0,0 +1,87 @@
+"""Unit tests for the staged ingest pipeline."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from kg_rag.ingest.pipeline import Pipeline, Stage
+
+
+class TestPipeline:
+    @pytest.mark.asyncio
+    async def test_items_flow_through_every_stage(self):
+        seen = []
+
+        async def double(x):
+            return x * 2
+
+        async def collect(x):
+            seen.append(x)
+
+        pipeline = Pipeline(
+            [Stage("double", double, workers=3), Stage("collect", collect)],
+            queue_size=2,
+        )
+        await pipeline.run(range(10))
+
+        assert sorted(seen) == [x * 2 for x in range(10)]
+        stats = pipeline.stats()
+        assert stats["double"]["done"] == stats["collect"]["done"] == 10
+        assert stats["collect"]["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_stage_bounds_items_in_flight(self):
+        pulled = []
+        in_flight = 0
+        peak = 0
+
+        def source():
+            for i in range(20):
+                pulled.append(i)
+                yield i
+
+        async def fast(x):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            return x
+
+        async def slow(x):
+            nonlocal in_flight
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+
+        pipeline = Pipeline(
+            [Stage("fast", fast, workers=4), Stage("slow", slow)], queue_size=2
+        )
+        await pipeline.run(source())
+
+        assert len(pulled) == 20
+        # queue + the fast workers blocked on it + the one slow item
+        assert peak <= 2 + 4 + 1
+        assert pipeline.stats()["slow"]["max_queued"] <= 2
+
+    @pytest.mark.asyncio
+    async def test_failures_and_none_drop_items(self):
+        seen = []
+
+        async def check(x):
+            if x == 3:
+                raise ValueError("bad item")
+            return None if x % 2 else x
+
+        async def collect(x):
+            seen.append(x)
+
+        pipeline = Pipeline(
+            [Stage("check", check, workers=2), Stage("collect", collect)],
+            queue_size=4,
+        )
+        await pipeline.run(range(6))
+
+        assert sorted(seen) == [0, 2, 4]
+        ((item, exc),) = pipeline.failures
+        assert item == 3 and isinstance(exc, ValueError)
+        assert pipeline.stats()["check"]["failed"] == 1
@@ -10,14 +10,14 @@ class TestReadProfile:
     @pytest.mark.asyncio
     async def test_no_records(self):
         graph = AsyncMock()
-        graph.query_cypher.return_value = []
+        graph.get_user_relations.return_value = []
         out = await read_profile("u1", graph)
         assert "no profile data" in out.lower()
 
     @pytest.mark.asyncio
     async def test_formats_sections(self):
         graph = AsyncMock()
-        graph.query_cypher.return_value = [
+        graph.get_user_relations.return_value = [
             {"rel_type": "MASTERED", "name": "BFS", "confidence": 0.9},
             {"rel_type": "WEAK_AT", "name": "DP", "confidence": 0.4},
         ]
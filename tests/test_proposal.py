@@ -177,8 +177,11 @@ class TestApplyProposals:
         proposals = [self._make_proposal()]
         count = await apply_proposals(proposals, mock_graph)
         assert count == 1
-        assert mock_graph.upsert_node.await_count == 2  # User + Entity
-        assert mock_graph.upsert_edge.await_count == 1
+        nodes = mock_graph.upsert_nodes_bulk.await_args.args[0]
+        assert [data["label"] for _, data in nodes] == ["User", "Entity"]
+        edges = mock_graph.upsert_edges_bulk.await_args.args[0]
+        assert len(edges) == 1 and edges[0][0] == "u1"
+        assert edges[0][2]["type"] == "MASTERED"
 
     @pytest.mark.asyncio
     async def test_skips_invalid_relation_type(self):
@@ -188,14 +191,14 @@ class TestApplyProposals:
         proposals = [self._make_proposal(rel_type="INVALID_TYPE")]
         count = await apply_proposals(proposals, mock_graph)
         assert count == 0
-        mock_graph.upsert_node.assert_not_awaited()
+        mock_graph.upsert_nodes_bulk.assert_not_awaited()
 
     @pytest.mark.asyncio
     async def test_graph_error_handled(self):
         from kg_rag.memory.proposal import apply_proposals
 
         mock_graph = AsyncMock()
-        mock_graph.upsert_node.side_effect = RuntimeError("Neo4j down")
+        mock_graph.upsert_nodes_bulk.side_effect = RuntimeError("Neo4j down")
         proposals = [self._make_proposal()]
         count = await apply_proposals(proposals, mock_graph)
         assert count == 0
@@ -211,6 +214,9 @@ class TestApplyProposals:
         ]
         count = await apply_proposals(proposals, mock_graph)
         assert count == 2
+        # one User node shared by both proposals, plus two entities
+        assert len(mock_graph.upsert_nodes_bulk.await_args.args[0]) == 3
+        assert len(mock_graph.upsert_edges_bulk.await_args.args[0]) == 2
 
     @pytest.mark.asyncio
     async def test_empty_proposals(self):
@@ -219,4 +225,4 @@ class TestApplyProposals:
         mock_graph = AsyncMock()
         count = await apply_proposals([], mock_graph)
         assert count == 0
-        mock_graph.upsert_node.assert_not_awaited()
+        mock_graph.upsert_nodes_bulk.assert_not_awaited()